@@ -4,10 +4,25 @@ __all__ = [
     "config",
     "utils",
     "campus_map",
+    "checkpoint",
+    "detection_store",
+    "face_index",
+    "face_quality",
     "face_recognition_system",
+    "frame_source",
     "attendance_system",
     "location_identifier",
+    "motion_gate",
+    "onnx_detector",
+    "parallel",
     "person_tracker",
+    "reid",
+    "roi",
+    "track_identity",
+    "tracker",
+    "tracking_cache",
+    "tracklets",
+    "visualization",
     "camera_processor",
     "analytics",
     "dashboard",
@@ -1,7 +1,7 @@
-from .main import run_all_videos
+from .main import main
 
 
 if __name__ == "__main__":
-    run_all_videos()
+    main()
 
 
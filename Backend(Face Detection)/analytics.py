@@ -1,12 +1,12 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from typing import Dict, List
+from typing import Dict, Iterable
 
 from .utils import Detection
 
 
-def compute_peak_hours(detections: List[Detection], fps: float = 30.0, window_minutes: int = 15) -> Dict[int, int]:
+def compute_peak_hours(detections: Iterable[Detection], fps: float = 30.0, window_minutes: int = 15) -> Dict[int, int]:
     window = window_minutes * 60
     bucket_counts: Dict[int, int] = defaultdict(int)
     for d in detections:
@@ -15,11 +15,11 @@ def compute_peak_hours(detections: List[Detection], fps: float = 30.0, window_mi
     return dict(bucket_counts)
 
 
-def count_unique_tracks(detections: List[Detection]) -> int:
+def count_unique_tracks(detections: Iterable[Detection]) -> int:
     return len({(d.location, d.track_id) for d in detections})
 
 
-def corridor_congestion(detections: List[Detection]) -> float:
+def corridor_congestion(detections: Iterable[Detection]) -> float:
     # simple proxy: average simultaneous detections per minute bucket
     per_bucket = compute_peak_hours(detections, window_minutes=1)
     if not per_bucket:
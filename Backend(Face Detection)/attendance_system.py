@@ -30,6 +30,25 @@ class AttendanceSystem:
         self.daily_attendance[date][person_id]["total_detections"] += 1
         self.daily_attendance[date][person_id]["confidence_scores"].append(confidence)
 
+    def merge(self, daily_attendance: Dict[str, Dict[str, dict]]) -> None:
+        """Fold another AttendanceSystem's ``daily_attendance`` (e.g. from a worker process) into this one."""
+        for date, people in daily_attendance.items():
+            day = self.daily_attendance.setdefault(date, {})
+            for person_id, record in people.items():
+                if person_id not in day:
+                    day[person_id] = {
+                        "first_seen": record["first_seen"],
+                        "locations": list(record["locations"]),
+                        "total_detections": record["total_detections"],
+                        "confidence_scores": list(record["confidence_scores"]),
+                    }
+                    continue
+                mine = day[person_id]
+                mine["first_seen"] = min(mine["first_seen"], record["first_seen"])
+                mine["locations"] = sorted(mine["locations"] + record["locations"], key=lambda loc: loc["time"])
+                mine["total_detections"] += record["total_detections"]
+                mine["confidence_scores"].extend(record["confidence_scores"])
+
     def generate_attendance_report(self, date: Optional[str] = None) -> Dict[str, dict]:
         if date:
             return self.daily_attendance.get(date, {})
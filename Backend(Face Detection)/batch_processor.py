@@ -1,9 +1,22 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 from .camera_processor import CameraProcessor
-from .utils import Detection
+from .detection_store import DetectionBatch
+from .parallel import resolve_workers, worker_pool
+
+# Per-process CameraProcessor of pool workers, created once by _init_worker
+_worker_processor: Dict[str, CameraProcessor] = {}
+
+
+def _init_worker() -> None:
+    _worker_processor["processor"] = CameraProcessor.create()
+
+
+def _track_task(task: Tuple[str, str]) -> DetectionBatch:
+    video_file, location = task
+    return _worker_processor["processor"].track_video(video_file, location)
 
 
 class BatchVideoProcessor:
@@ -17,13 +30,18 @@ class BatchVideoProcessor:
         }
         self.processor = CameraProcessor.create()
 
-    def process_single_video(self, video_file: str, location: str) -> List[Detection]:
+    def process_single_video(self, video_file: str, location: str) -> DetectionBatch:
         return self.processor.track_video(video_file, location)
 
-    def process_video_group(self, location_type: str, video_files: List[str]) -> List[Detection]:
-        combined: List[Detection] = []
-        for vf in video_files:
-            combined.extend(self.process_single_video(vf, location_type))
+    def process_video_group(self, location_type: str, video_files: List[str], workers: int | None = None) -> DetectionBatch:
+        workers = min(resolve_workers(workers), len(video_files))
+        combined = DetectionBatch()
+        if workers <= 1:
+            for vf in video_files:
+                combined.extend(self.process_single_video(vf, location_type))
+            return combined
+        with worker_pool(workers, _init_worker) as pool:
+            # imap keeps the input order so the combined list matches the serial path
+            for detections in pool.imap(_track_task, [(vf, location_type) for vf in video_files], chunksize=1):
+                combined.extend(detections)
         return combined
-
-
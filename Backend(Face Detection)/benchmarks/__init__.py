@@ -0,0 +1,4 @@
+"""Micro-benchmarks for the campus tracker pipeline.
+
+Run a benchmark as a module, e.g. ``python -m snmimt_campus_tracker.benchmarks.gallery_matching``.
+"""
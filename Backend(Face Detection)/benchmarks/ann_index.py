@@ -0,0 +1,67 @@
+"""Recall@1 and queries/sec of the IVF gallery index against exact search."""
+
+from __future__ import annotations
+
+import time
+
+import numpy as np
+
+from ..face_index import BruteForceIndex, IVFIndex
+
+EMBEDDING_DIM = 512
+GALLERY_SIZES = (10_000, 50_000)
+N_PROBES = (1, 4, 8, 16, 32)
+
+
+def _synthetic_gallery(n: int, rng: np.random.Generator, n_modes: int = 128) -> np.ndarray:
+    # Face embeddings are not uniform on the sphere; cluster identities around a few modes
+    modes = rng.standard_normal((n_modes, EMBEDDING_DIM)).astype(np.float32)
+    picks = rng.integers(0, n_modes, size=n)
+    return modes[picks] + 0.8 * rng.standard_normal((n, EMBEDDING_DIM)).astype(np.float32)
+
+
+def _run_queries(index, queries: np.ndarray) -> tuple[list[str], float]:
+    start = time.perf_counter()
+    top1 = []
+    for q in queries:
+        ids, _ = index.search(q, 1)
+        top1.append(ids[0] if ids else None)
+    return top1, len(queries) / (time.perf_counter() - start)
+
+
+def run(sizes=GALLERY_SIZES, n_queries: int = 500, n_lists: int = 256, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    for n in sizes:
+        refs = _synthetic_gallery(n, rng)
+        ids = [f"student_{i:06d}" for i in range(n)]
+        picks = rng.integers(0, n, size=n_queries)
+        queries = refs[picks] + 0.5 * rng.standard_normal((n_queries, EMBEDDING_DIM)).astype(np.float32)
+
+        exact = BruteForceIndex()
+        exact.add(ids, refs)
+        truth, exact_qps = _run_queries(exact, queries)
+
+        ivf = IVFIndex(n_lists=n_lists)
+        start = time.perf_counter()
+        ivf.add(ids, refs)
+        build_s = time.perf_counter() - start
+
+        print(f"\n{n} identities (IVF build {build_s:.2f}s, {n_lists} lists)")
+        print(f"{'index':>14} {'recall@1':>9} {'qps':>10}")
+        print(f"{'exact':>14} {1.0:>9.3f} {exact_qps:>10.0f}")
+        for n_probe in N_PROBES:
+            ivf.n_probe = n_probe
+            found, qps = _run_queries(ivf, queries)
+            recall = float(np.mean([a == b for a, b in zip(found, truth)]))
+            print(f"{'ivf/' + str(n_probe):>14} {recall:>9.3f} {qps:>10.0f}")
+
+        extra = _synthetic_gallery(1_000, rng)
+        start = time.perf_counter()
+        for i, vec in enumerate(extra):
+            ivf.add([f"new_{i:04d}"], vec)
+        insert_s = time.perf_counter() - start
+        print(f"incremental inserts: {len(extra) / insert_s:.0f}/s")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,67 @@
+"""Cost of one checkpoint and its share of processing time per checkpoint interval.
+
+``python -m snmimt_campus_tracker.benchmarks.checkpoint_overhead``. Synthetic
+state: a camera at 25 fps with 15 people in view, 200 known tracks and 100
+people in the attendance log. Tracker state is not included (it needs
+ultralytics); it is a few KB per track.
+"""
+
+from __future__ import annotations
+
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from ..attendance_system import AttendanceSystem
+from ..checkpoint import CheckpointStore, VideoProgress
+from ..face_recognition_system import FaceMatch
+from ..utils import Detection
+
+FPS = 25
+PEOPLE_IN_VIEW = 15
+INTERVALS_S = (1, 5, 30, 120)
+
+
+def _progress(rng: np.random.Generator) -> VideoProgress:
+    progress = VideoProgress()
+    for track_id in range(200):
+        for frame in range(3):
+            det = Detection(track_id, (0, 0, 10, 10), 0.9, 0, frame, frame / FPS, "classroom")
+            progress.identities.update(det, FaceMatch(f"person_{track_id % 100}", 0.8))
+    attendance = AttendanceSystem()
+    for person in range(100):
+        attendance.log_attendance(f"person_{person}", "classroom", datetime.now(), float(rng.random()))
+    progress.attendance = attendance.daily_attendance
+    return progress
+
+
+def _rows(rng: np.random.Generator, interval_s: float):
+    n_frames = int(FPS * interval_s)
+    return [
+        Detection(int(t), tuple(int(v) for v in rng.integers(0, 1000, 4)), 0.8, 0, f, f / FPS, "classroom")
+        for f in range(n_frames)
+        for t in range(PEOPLE_IN_VIEW)
+    ]
+
+
+def run(repeats: int = 5) -> None:
+    rng = np.random.default_rng(0)
+    print(f"{'interval s':>10} {'rows':>7} {'ms/checkpoint':>14} {'overhead':>9}")
+    with tempfile.TemporaryDirectory() as root:
+        store = CheckpointStore(["bench.mp4"], Path(root))
+        for interval in INTERVALS_S:
+            progress = _progress(rng)
+            rows = _rows(rng, interval)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                store.save_progress("bench.mp4", progress, rows)
+            cost = (time.perf_counter() - start) / repeats
+            print(f"{interval:>10} {len(rows):>7} {cost * 1e3:>14.1f} {cost / interval:>9.2%}")
+            store.clear()
+
+
+if __name__ == "__main__":
+    run()
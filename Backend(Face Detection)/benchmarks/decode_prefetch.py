@@ -0,0 +1,62 @@
+"""Throughput of CameraProcessor with and without threaded decode prefetch.
+
+Uses YOLO when it is installed; otherwise a fixed CPU workload stands in for
+inference so the decode/inference overlap is still visible:
+``python -m snmimt_campus_tracker.benchmarks.decode_prefetch data/class1.mp4 data/ece1.mp4``.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from ..camera_processor import CameraProcessor
+from ..config import StreamConfig
+
+DEFAULT_VIDEOS = ("data/class1.mp4", "data/ece1.mp4", "data/mainentrance.mp4")
+
+
+def _simulated_inference(frame: np.ndarray) -> None:
+    # Roughly the shape of YOLO preprocessing plus some convolution work
+    small = cv2.resize(frame, (640, 640))
+    for _ in range(6):
+        small = cv2.GaussianBlur(small, (9, 9), 0)
+
+
+def _run_once(processor: CameraProcessor, video: str) -> dict:
+    for _, _, frame in processor.iter_frames(video):
+        if processor.model is not None:
+            processor._detect_persons(frame)
+        else:
+            _simulated_inference(frame)
+    return dict(processor.timings)
+
+
+def run(videos=DEFAULT_VIDEOS) -> None:
+    processor = CameraProcessor.create()
+    if processor.model is None:
+        print("ultralytics not available: simulating inference with a fixed OpenCV workload")
+    original = StreamConfig.prefetch_enabled
+    print(f"{'video':>18} {'prefetch':>8} {'fps':>7} {'decode s':>9} {'infer s':>8} {'wait s':>7} {'wall s':>7} {'overlap s':>9}")
+    try:
+        for video in videos:
+            if not Path(video).exists():
+                print(f"{video}: not found")
+                continue
+            for enabled in (False, True):
+                StreamConfig.prefetch_enabled = enabled
+                t = _run_once(processor, video)
+                overlap = t["decode_s"] + t["process_s"] - t["wall_s"]
+                print(
+                    f"{Path(video).name:>18} {str(enabled):>8} {t['frames'] / t['wall_s']:>7.1f} {t['decode_s']:>9.2f} "
+                    f"{t['process_s']:>8.2f} {t['wait_s']:>7.2f} {t['wall_s']:>7.2f} {max(overlap, 0.0):>9.2f}"
+                )
+    finally:
+        StreamConfig.prefetch_enabled = original
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:] or DEFAULT_VIDEOS)
@@ -0,0 +1,79 @@
+"""Memory per million detections: List[Detection] vs columnar DetectionBatch."""
+
+from __future__ import annotations
+
+import gc
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from ..detection_store import DetectionBatch
+from ..utils import Detection
+
+LOCATIONS = ("civil_hall", "classroom", "electronics_hall", "main_entrance", "main_hall")
+
+
+def _detections(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    boxes = rng.integers(0, 1900, size=(n, 4))
+    for i in range(n):
+        x1, y1, w, h = boxes[i].tolist()
+        yield Detection(
+            track_id=i % 500,
+            bbox_xyxy=(x1, y1, x1 + w // 10, y1 + h // 5),
+            confidence=0.5 + (i % 50) / 100.0,
+            class_id=0,
+            frame_index=i // 10,
+            timestamp=i / 300.0,
+            location=LOCATIONS[i % len(LOCATIONS)],
+            face_id="student_001" if i % 97 == 0 else None,
+        )
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current, elapsed
+
+
+def run(n: int = 1_000_000) -> None:
+    print(f"{n:,} detections")
+    print(f"{'store':>22} {'MB':>8} {'bytes/det':>10} {'build s':>8} {'iterate s':>10}")
+
+    def report(name, build):
+        obj, nbytes, build_s = _measure(build)
+        start = time.perf_counter()
+        count = sum(1 for _ in obj)
+        iterate_s = time.perf_counter() - start
+        assert count == n
+        print(f"{name:>22} {nbytes / 2**20:>8.1f} {nbytes / n:>10.1f} {build_s:>8.2f} {iterate_s:>10.2f}")
+        return obj
+
+    report("List[Detection]", lambda: list(_detections(n)))
+
+    def build_batch(**kwargs):
+        # Fed per frame, as CameraProcessor does
+        batch = DetectionBatch(**kwargs)
+        frame = []
+        for det in _detections(n):
+            frame.append(det)
+            if len(frame) == 10:
+                batch.extend(frame)
+                frame = []
+        batch.extend(frame)
+        return batch
+
+    report("DetectionBatch", lambda: build_batch(spill_threshold=n))
+    with tempfile.TemporaryDirectory() as tmp:
+        report("DetectionBatch (spill)", lambda: build_batch(spill_threshold=100_000, spill_dir=tmp))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,64 @@
+"""Face-stage cost per frame: per-person crops vs one frame-level detection pass.
+
+Needs the YOLO and InsightFace models plus a sample video, e.g.
+``python -m snmimt_campus_tracker.benchmarks.face_assignment data/class4.mp4``.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+import cv2
+
+from ..camera_processor import CameraProcessor
+from ..config import FaceConfig
+from ..face_recognition_system import FaceRecognitionSystem
+
+MODES = ("crop", "frame")
+
+
+def run(video_path: str = "data/class4.mp4", max_frames: int = 150, stride: int = 5) -> None:
+    processor = CameraProcessor.create()
+    face_system = FaceRecognitionSystem()
+    face_system.load_known_faces(FaceConfig.faces_dir)
+    if processor.model is None or face_system.model is None:
+        print("YOLO and InsightFace models are required for this benchmark")
+        return
+
+    frames = []
+    cap = cv2.VideoCapture(video_path)
+    index = 0
+    while len(frames) < max_frames:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if index % stride == 0:
+            boxes = [bbox for bbox, _, _ in processor._detect_persons(frame)]
+            frames.append((frame, boxes))
+        index += 1
+    cap.release()
+    if not frames:
+        print(f"Could not read frames from {video_path}")
+        return
+    persons = sum(len(b) for _, b in frames)
+    print(f"{video_path}: {len(frames)} frames, {persons / len(frames):.1f} persons/frame")
+
+    original_mode = FaceConfig.face_detection_mode
+    timings = {}
+    try:
+        for mode in MODES:
+            FaceConfig.face_detection_mode = mode
+            recognized = 0
+            start = time.perf_counter()
+            for frame, boxes in frames:
+                recognized += sum(m is not None for m in face_system.recognize_persons(frame, boxes))
+            timings[mode] = (time.perf_counter() - start) / len(frames)
+            print(f"{mode:>6}: {timings[mode] * 1e3:8.1f} ms/frame, {recognized} recognitions")
+    finally:
+        FaceConfig.face_detection_mode = original_mode
+    print(f"speedup: {timings['crop'] / timings['frame']:.1f}x")
+
+
+if __name__ == "__main__":
+    run(*sys.argv[1:2])
@@ -0,0 +1,79 @@
+"""Memory, load time and per-face latency of the InsightFace loading presets.
+
+Each preset is measured in a fresh process so resident memory is not shared.
+Needs InsightFace and the face images under ``faces/``:
+``python -m snmimt_campus_tracker.benchmarks.face_model_presets``.
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import resource
+import time
+from pathlib import Path
+
+import cv2
+
+from ..config import FACE_MODEL_PRESETS, FaceConfig
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+def _rss_mb() -> float:
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    # Peak RSS: kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if peak > 1 << 30 else peak / 1024.0
+
+
+def _measure(preset: str, repeats: int, queue) -> None:
+    from ..face_recognition_system import FaceAnalysis, FaceRecognitionSystem
+
+    if FaceAnalysis is None:
+        queue.put((preset, None))
+        return
+    for key, value in FACE_MODEL_PRESETS[preset].items():
+        setattr(FaceConfig, key, value)
+
+    images = [cv2.imread(str(p)) for p in sorted(FaceConfig.faces_dir.rglob("*")) if p.suffix.lower() in IMAGE_SUFFIXES]
+    images = [img for img in images if img is not None]
+
+    system = FaceRecognitionSystem()
+    before = _rss_mb()
+    start = time.perf_counter()
+    system.model = system._load_face_model()
+    load_s = time.perf_counter() - start
+    memory_mb = _rss_mb() - before
+
+    faces = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for img in images:
+            faces += len(system.model.get(img))
+    per_face_ms = (time.perf_counter() - start) / max(faces, 1) * 1e3
+    queue.put((preset, (load_s, memory_mb, per_face_ms, faces // max(repeats, 1))))
+
+
+def run(presets=tuple(FACE_MODEL_PRESETS), repeats: int = 5) -> None:
+    ctx = mp.get_context("spawn")
+    print(f"{'preset':>14} {'load s':>8} {'mem MB':>8} {'ms/face':>8} {'faces':>6}")
+    for preset in presets:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_measure, args=(preset, repeats, queue))
+        proc.start()
+        name, result = queue.get()
+        proc.join()
+        if result is None:
+            print("InsightFace is required for this benchmark")
+            return
+        load_s, memory_mb, per_face_ms, faces = result
+        print(f"{name:>14} {load_s:>8.2f} {memory_mb:>8.0f} {per_face_ms:>8.1f} {faces:>6}")
+
+
+if __name__ == "__main__":
+    run()
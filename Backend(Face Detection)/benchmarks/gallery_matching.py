@@ -0,0 +1,57 @@
+"""Compare the per-identity Python loop against vectorized gallery matching."""
+
+from __future__ import annotations
+
+import time
+
+import numpy as np
+
+from ..face_recognition_system import FaceRecognitionSystem
+
+EMBEDDING_DIM = 512
+GALLERY_SIZES = (1_000, 10_000, 50_000)
+
+
+def _loop_match(system: FaceRecognitionSystem, query: np.ndarray) -> str | None:
+    # The matching loop recognize() used before the gallery matrix
+    best_id = None
+    best_dist = 1e9
+    for person_id, ref_emb in system.embeddings.items():
+        dist = system._cosine_distance(query, ref_emb)
+        if dist < best_dist:
+            best_dist = dist
+            best_id = person_id
+    return best_id
+
+
+def _time_per_query(fn, queries: np.ndarray) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def run(sizes=GALLERY_SIZES, n_queries: int = 20, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    print(f"{'identities':>10} {'loop ms':>10} {'matrix ms':>10} {'top5 ms':>10} {'speedup':>8}")
+    for n in sizes:
+        system = FaceRecognitionSystem()
+        refs = rng.standard_normal((n, EMBEDDING_DIM)).astype(np.float32)
+        system.embeddings = {f"student_{i:06d}": refs[i] for i in range(n)}
+        system.rebuild_gallery()
+        # Queries are noisy copies of enrolled identities
+        picks = rng.integers(0, n, size=n_queries)
+        queries = refs[picks] + 0.3 * rng.standard_normal((n_queries, EMBEDDING_DIM)).astype(np.float32)
+
+        loop_s = _time_per_query(lambda q: _loop_match(system, q), queries)
+        mat_s = _time_per_query(lambda q: system.match_embedding(q, k=1), queries)
+        top5_s = _time_per_query(lambda q: system.match_embedding(q, k=5), queries)
+
+        for q in queries[:5]:
+            assert system.match_embedding(q, k=1)[0].identity == _loop_match(system, q)
+
+        print(f"{n:>10} {loop_s * 1e3:>10.3f} {mat_s * 1e3:>10.3f} {top5_s * 1e3:>10.3f} {loop_s / mat_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,80 @@
+"""Memory and throughput of online journey reconstruction over a simulated week.
+
+``python -m snmimt_campus_tracker.benchmarks.journey_online [days] [people]``.
+Every day ``people`` synthetic visitors each arrive at a random time, walk
+between the locations of ``TRAVEL_TIME_SECONDS`` for one to eight hours and
+leave; every visit is one tracklet with a noisy per-person embedding.
+Tracklets are fed to ``JourneyEngine`` minute by minute in the order they
+end, as a live system would close them. Traced memory after each day should
+stay flat.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+
+from ..config import TRAVEL_TIME_SECONDS
+from ..person_tracker import JourneyEngine
+from ..tracklets import Tracklet
+
+DIM = 128
+NOISE = 0.7
+DAY_S = 86_400
+
+
+def synthetic_day(day: int, people: int, rng: np.random.Generator) -> List[Tracklet]:
+    routes: Dict[str, List[str]] = defaultdict(list)
+    for a, b in TRAVEL_TIME_SECONDS:
+        routes[a].append(b)
+    locations = sorted(routes)
+    tracklets = []
+    for person in range(people):
+        base = rng.normal(size=DIM)
+        base /= np.linalg.norm(base)
+        t = day * DAY_S + float(rng.uniform(0, DAY_S - 8 * 3600))
+        leave = t + float(rng.uniform(3600, 8 * 3600))
+        loc = locations[rng.integers(len(locations))]
+        while t < leave:
+            dwell = float(rng.uniform(10, 60))
+            emb = base + rng.normal(size=DIM) * NOISE / np.sqrt(DIM)
+            track_id = day * 10_000_000 + person * 10_000 + len(tracklets) % 10_000
+            tracklets.append(Tracklet(loc, track_id, t, t + dwell, 0, 0, 1, (0, 0, 1, 1), 0.9, embedding=emb))
+            nxt = routes[loc][rng.integers(len(routes[loc]))]
+            t += dwell + TRAVEL_TIME_SECONDS[(loc, nxt)] * float(rng.uniform(0.85, 1.15))
+            loc = nxt
+    tracklets.sort(key=lambda tr: tr.end_time)
+    return tracklets
+
+
+def run(days: int = 7, people: int = 300) -> None:
+    rng = np.random.default_rng(0)
+    engine = JourneyEngine()
+    tracemalloc.start()
+    print(f"{'day':>3} {'tracklets':>9} {'segments':>9} {'seconds':>8} {'people held':>11} {'id slots':>8} {'traced MB':>9}")
+    for day in range(days):
+        tracklets = synthetic_day(day, people, rng)
+        start = time.perf_counter()
+        segments = 0
+        i = 0
+        for minute_end in range(day * DAY_S + 60, (day + 1) * DAY_S + 60, 60):
+            j = i
+            while j < len(tracklets) and tracklets[j].end_time < minute_end:
+                j += 1
+            segments += len(engine.add_tracklets(tracklets[i:j]))
+            i = j
+        elapsed = time.perf_counter() - start
+        del tracklets
+        current, _ = tracemalloc.get_traced_memory()
+        print(f"{day + 1:>3} {i:>9} {segments:>9} {elapsed:>8.1f} {len(engine.last_by_global):>11} "
+              f"{engine.reid._used:>8} {current / 1e6:>9.1f}")
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    run(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,106 @@
+"""Journey reconstruction on tracklets vs per-detection, on a synthetic 24-hour, 11-camera day.
+
+``python -m snmimt_campus_tracker.benchmarks.journey_tracklets [hours] [legacy_hours]``.
+Each camera sees ``TRACKS_PER_HOUR`` tracks of ``TRACK_LENGTH`` detections
+on average. The per-detection path needs a ``Detection`` object per row, so
+it only runs on the first ``legacy_hours`` and its figures are scaled up.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from ..detection_store import DetectionBatch
+from ..person_tracker import CrossCameraReIdentifier, reconstruct_person_journey
+from ..utils import Detection
+
+CAMERAS = 11
+TRACKS_PER_HOUR = 60
+TRACK_LENGTH = 200  # detections per track (8 s at 25 fps)
+FPS = 25.0
+
+
+def synthetic_day(hours: float, seed: int = 0) -> Dict[str, DetectionBatch]:
+    rng = np.random.default_rng(seed)
+    batches = {}
+    for cam in range(CAMERAS):
+        n_tracks = int(TRACKS_PER_HOUR * hours)
+        lengths = rng.poisson(TRACK_LENGTH, n_tracks).clip(1)
+        starts = np.sort(rng.uniform(0, hours * 3600, n_tracks))
+        track_id = np.repeat(np.arange(n_tracks, dtype=np.int32), lengths)
+        offset = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        timestamp = np.repeat(starts, lengths) + offset / FPS
+        n = track_id.shape[0]
+        columns = {
+            "track_id": track_id,
+            "bbox": rng.integers(0, 1280, (n, 4)),
+            "confidence": rng.uniform(0.5, 1.0, n),
+            "class_id": np.zeros(n),
+            "frame_index": np.round(timestamp * FPS),
+            "timestamp": timestamp,
+            "location": np.zeros(n),
+            "face_id": np.where(rng.random(n) < 0.05, rng.integers(0, 50, n), -1),
+        }
+        batches[f"cam{cam:02d}"] = DetectionBatch.from_columns(
+            columns, [f"cam{cam:02d}"], [f"person_{i}" for i in range(50)]
+        )
+    return batches
+
+
+def legacy_reconstruct(detections_by_camera: Dict[str, List[Detection]]) -> Dict[int, list]:
+    """The previous implementation: every detection sorted and correlated."""
+    all_dets: List[Tuple[str, Detection]] = []
+    for cam, dets in detections_by_camera.items():
+        for d in dets:
+            d.location = cam
+            all_dets.append((cam, d))
+    all_dets.sort(key=lambda x: x[1].timestamp)
+    reid = CrossCameraReIdentifier()
+    last_by_global: Dict[int, Detection] = {}
+    journeys: Dict[int, list] = {}
+    for cam, det in all_dets:
+        global_id = reid.assign_global_id(cam, det.track_id)
+        journeys.setdefault(global_id, [])
+        prev = last_by_global.get(global_id)
+        if prev is not None and prev.location and det.location:
+            reid.correlate(prev, det)
+        last_by_global[global_id] = det
+    return journeys
+
+
+def _measure(fn, *args) -> Tuple[float, float, object]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6, result
+
+
+def run(hours: float = 24.0, legacy_hours: float = 1.0) -> None:
+    day = synthetic_day(hours)
+    n_rows = sum(len(b) for b in day.values())
+    elapsed, peak, journeys = _measure(reconstruct_person_journey, day)
+    n_tracklets = sum(len(np.unique(b.columns()["track_id"])) for b in day.values())
+    print(f"{hours:g} h x {CAMERAS} cameras: {n_rows:,} detections, {n_tracklets:,} tracklets "
+          f"(avg {n_rows / max(n_tracklets, 1):.0f} detections each), {len(journeys):,} global ids")
+    print(f"{'path':>16} {'hours':>6} {'seconds':>8} {'peak MB':>8} {'s / 24h':>8}")
+    print(f"{'tracklets':>16} {hours:>6g} {elapsed:>8.2f} {peak:>8.1f} {elapsed * 24 / hours:>8.1f}")
+
+    sample = synthetic_day(legacy_hours)
+    elapsed, peak, _ = _measure(reconstruct_person_journey, sample)
+    print(f"{'tracklets':>16} {legacy_hours:>6g} {elapsed:>8.2f} {peak:>8.1f} {elapsed * 24 / legacy_hours:>8.1f}")
+    as_lists = {cam: list(batch) for cam, batch in sample.items()}
+    elapsed, peak, _ = _measure(legacy_reconstruct, as_lists)
+    print(f"{'per-detection':>16} {legacy_hours:>6g} {elapsed:>8.2f} {peak:>8.1f} {elapsed * 24 / legacy_hours:>8.1f}")
+    print("(per-detection peak excludes the Detection lists it is given; they cost ~400 MB per million rows)")
+
+
+if __name__ == "__main__":
+    run(*(float(a) for a in sys.argv[1:3]))
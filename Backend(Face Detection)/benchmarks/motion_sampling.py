@@ -0,0 +1,72 @@
+"""Effective FPS and detection recall of motion-gated sampling vs running YOLO on every frame.
+
+``python -m snmimt_campus_tracker.benchmarks.motion_sampling data/civilhall1.mp4 data/mainentrance.mp4``.
+Without ultralytics only the fraction of frames the gate would skip is reported.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+from ..camera_processor import CameraProcessor
+from ..config import ModelConfig, StreamConfig
+from ..utils import Detection, iou_matrix
+
+DEFAULT_VIDEOS = ("data/civilhall1.mp4", "data/mainentrance.mp4")
+
+
+def _by_frame(detections: List[Detection]) -> Dict[int, List[Detection]]:
+    frames: Dict[int, List[Detection]] = defaultdict(list)
+    for d in detections:
+        frames[d.frame_index].append(d)
+    return frames
+
+
+def recall(reference: List[Detection], candidate: List[Detection], iou: float = 0.5) -> float:
+    """Share of reference boxes matched (IoU >= ``iou``) by a candidate box on the same frame."""
+    ref, cand = _by_frame(reference), _by_frame(candidate)
+    total = matched = 0
+    for frame_index, ref_dets in ref.items():
+        total += len(ref_dets)
+        cand_dets = cand.get(frame_index)
+        if not cand_dets:
+            continue
+        ious = iou_matrix([d.bbox_xyxy for d in ref_dets], [d.bbox_xyxy for d in cand_dets])
+        matched += int((ious.max(axis=1) >= iou).sum())
+    return matched / total if total else 1.0
+
+
+def _timed(processor: CameraProcessor, video: str, adaptive: bool) -> tuple[List[Detection], float, dict]:
+    StreamConfig.adaptive_sampling = adaptive
+    start = time.perf_counter()
+    detections = [d for _, dets in processor.stream_video(video, Path(video).stem) for d in dets]
+    return detections, time.perf_counter() - start, dict(processor.timings)
+
+
+def run(videos=DEFAULT_VIDEOS) -> None:
+    processor = CameraProcessor.create()
+    original = (StreamConfig.adaptive_sampling, ModelConfig.save_visualization)
+    ModelConfig.save_visualization = False
+    try:
+        for video in videos:
+            if not Path(video).exists():
+                print(f"{video}: not found")
+                continue
+            full, full_s, full_t = _timed(processor, video, adaptive=False)
+            sampled, sampled_s, t = _timed(processor, video, adaptive=True)
+            frames = full_t["frames"]
+            print(f"\n{Path(video).name}: {frames} frames")
+            print(f"  detector frames: {t['detector_frames']} / {frames} ({t['skipped_frames']} skipped)")
+            print(f"  effective fps:  full {frames / full_s:.1f}, adaptive {frames / sampled_s:.1f}")
+            if processor.model is not None:
+                print(f"  recall@IoU0.5 vs full: {recall(full, sampled):.3f}")
+    finally:
+        StreamConfig.adaptive_sampling, ModelConfig.save_visualization = original
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:] or DEFAULT_VIDEOS)
@@ -0,0 +1,85 @@
+"""Person detection on ultralytics/PyTorch vs onnxruntime (fp32 and int8).
+
+``python -m snmimt_campus_tracker.benchmarks.onnx_backend data/class4.mp4``.
+Reports startup (model load), per-frame latency at batch 1, throughput at
+batch 8, and the share of ultralytics boxes the ONNX path reproduces
+(IoU >= 0.5). The first ONNX run exports ``yolov8n.onnx``, which needs
+ultralytics; exclude that run from startup comparisons.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from typing import List
+
+import cv2
+import numpy as np
+
+from ..camera_processor import CameraProcessor
+from ..config import ModelConfig
+from ..utils import iou_matrix
+
+BACKENDS = (("ultralytics", False), ("onnx", False), ("onnx", True))
+
+
+def _read_frames(video_path: str, n_frames: int) -> List[np.ndarray]:
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < n_frames:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def _agreement(reference, candidate) -> float:
+    matched = total = 0
+    for ref, cand in zip(reference, candidate):
+        total += len(ref)
+        if ref and cand:
+            ious = iou_matrix(np.array([b for b, _, _ in ref]), np.array([b for b, _, _ in cand]))
+            matched += int((ious.max(axis=1) >= 0.5).sum())
+    return matched / total if total else 1.0
+
+
+def run(video_path: str = "data/class4.mp4", n_frames: int = 64, warmup: int = 3) -> None:
+    frames = _read_frames(video_path, n_frames)
+    if not frames:
+        print(f"Could not read frames from {video_path}")
+        return
+    original = (ModelConfig.backend, ModelConfig.onnx_int8)
+    reference = None
+    print(f"{video_path}: {len(frames)} frames")
+    print(f"{'backend':>12} {'startup s':>10} {'ms/frame b1':>12} {'frames/s b8':>12} {'agreement':>10}")
+    try:
+        for backend, int8 in BACKENDS:
+            ModelConfig.backend, ModelConfig.onnx_int8 = backend, int8
+            start = time.perf_counter()
+            processor = CameraProcessor.create()
+            startup = time.perf_counter() - start
+            name = backend + ("-int8" if int8 else "")
+            if (backend == "onnx") != (processor.detector is not None) or (processor.model is None and processor.detector is None):
+                print(f"{name:>12} unavailable")
+                continue
+            for _ in range(warmup):
+                processor.detect_batch(frames[:1])
+            start = time.perf_counter()
+            boxes = [processor.detect_batch([f])[0] for f in frames]
+            single = (time.perf_counter() - start) / len(frames)
+            start = time.perf_counter()
+            for i in range(0, len(frames), 8):
+                processor.detect_batch(frames[i : i + 8])
+            throughput = len(frames) / (time.perf_counter() - start)
+            if reference is None and backend == "ultralytics":
+                reference = boxes
+            agreement = f"{_agreement(reference, boxes):.1%}" if reference is not None else "-"
+            print(f"{name:>12} {startup:>10.2f} {single * 1e3:>12.1f} {throughput:>12.1f} {agreement:>10}")
+    finally:
+        ModelConfig.backend, ModelConfig.onnx_int8 = original
+
+
+if __name__ == "__main__":
+    run(*sys.argv[1:2])
@@ -0,0 +1,34 @@
+"""End-to-end wall time of run_all_videos processing: serial vs a worker pool.
+
+Run from the directory holding ``data/`` and ``faces/``:
+``python -m snmimt_campus_tracker.benchmarks.parallel_videos 2 4``.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+
+from ..main import discover_video_files, process_videos
+
+
+def run(worker_counts=(2, 4)) -> None:
+    video_files = discover_video_files()
+    if not video_files:
+        print("No video files found in data/ or the current directory")
+        return
+    timings = {}
+    for workers in (1, *worker_counts):
+        start = time.perf_counter()
+        process_videos(video_files, workers)
+        timings[workers] = time.perf_counter() - start
+
+    print(f"\n{len(video_files)} videos on {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'wall s':>8} {'speedup':>8}")
+    for workers, elapsed in timings.items():
+        print(f"{workers:>8} {elapsed:>8.1f} {timings[1] / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    run(tuple(int(a) for a in sys.argv[1:]) or (2, 4))
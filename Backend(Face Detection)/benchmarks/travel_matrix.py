@@ -0,0 +1,60 @@
+"""Campus travel-time matrix: coverage, build and cache cost, and lookup speed.
+
+``python -m snmimt_campus_tracker.benchmarks.travel_matrix``. Prints the
+all-pairs matrix built from ``CampusMapConfig``, how many ordered location
+pairs have a travel time compared with ``TRAVEL_TIME_SECONDS`` alone, then
+times a fresh build, a load from the disk cache, scalar
+``transition_score`` calls and a vectorized lookup of a million pairs.
+"""
+
+from __future__ import annotations
+
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ..campus_map import CampusMap, TravelTimes, load_travel_times
+from ..config import TRAVEL_TIME_SECONDS
+from ..person_tracker import CrossCameraReIdentifier
+
+
+def _per_call(fn, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def run() -> None:
+    campus_map = CampusMap.from_config()
+    travel = campus_map.travel_times()
+    names = travel.locations
+    print(" " * 17 + "".join(f"{n[:12]:>13}" for n in names))
+    for i, a in enumerate(names):
+        print(f"{a:>17}" + "".join(f"{s:>13.0f}" if np.isfinite(s) else f"{'-':>13}" for s in travel.seconds[i]))
+    n_pairs = len(names) * (len(names) - 1)
+    covered = int(np.isfinite(travel.seconds).sum())
+    print(f"\npairs with a travel time: {covered}/{n_pairs} (TRAVEL_TIME_SECONDS alone: {len(TRAVEL_TIME_SECONDS)})")
+
+    key = campus_map.fingerprint()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "travel.npz"
+        build = _per_call(campus_map.travel_times, 100)
+        travel.save(path, key)
+        load = _per_call(lambda: TravelTimes.load(path, key), 100)
+    print(f"build {build * 1e3:.2f} ms, cache load {load * 1e3:.2f} ms")
+
+    reid = CrossCameraReIdentifier()
+    pairs = [(a, b) for a in names for b in names]
+    scalar = _per_call(lambda: [reid.transition_score(a, b, 100.0) for a, b in pairs], 200) / len(pairs)
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, len(names), (2, 1_000_000))
+    cached = load_travel_times()
+    vector = _per_call(lambda: cached.seconds[codes[0], codes[1]], 10) / codes.shape[1]
+    print(f"transition_score: {scalar * 1e6:.2f} us/pair, vectorized lookup: {vector * 1e9:.1f} ns/pair")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,48 @@
+"""Pipeline throughput with the visualization writer off, sampled and full.
+
+``python -m snmimt_campus_tracker.benchmarks.visualization data/class1.mp4``.
+Output goes to a temporary directory. Without ultralytics there are no
+detections, so the numbers show only the cost of encoding frames.
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from ..camera_processor import CameraProcessor
+from ..config import ModelConfig
+
+DEFAULT_VIDEOS = ("data/class1.mp4",)
+MODES = ("off", "sampled", "full")
+
+
+def run(videos=DEFAULT_VIDEOS) -> None:
+    processor = CameraProcessor.create()
+    if processor.model is None:
+        print("ultralytics not available: measuring decode + encode only")
+    original = (ModelConfig.save_visualization, ModelConfig.visualization_mode, ModelConfig.output_dir)
+    print(f"{'video':>18} {'mode':>8} {'frames':>7} {'fps':>7} {'wall s':>7} {'mp4 MB':>7}")
+    try:
+        for video in videos:
+            if not Path(video).exists():
+                print(f"{video}: not found")
+                continue
+            for mode in MODES:
+                with tempfile.TemporaryDirectory() as out:
+                    ModelConfig.save_visualization = True
+                    ModelConfig.visualization_mode = mode
+                    ModelConfig.output_dir = out
+                    start = time.perf_counter()
+                    frames = sum(1 for _ in processor.stream_video(video, "bench"))
+                    wall = time.perf_counter() - start
+                    size = sum(p.stat().st_size for p in Path(out).rglob("*.mp4")) / 1e6
+                print(f"{Path(video).name:>18} {mode:>8} {frames:>7} {frames / wall:>7.1f} {wall:>7.2f} {size:>7.1f}")
+    finally:
+        ModelConfig.save_visualization, ModelConfig.visualization_mode, ModelConfig.output_dir = original
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:] or DEFAULT_VIDEOS)
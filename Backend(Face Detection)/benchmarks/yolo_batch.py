@@ -0,0 +1,54 @@
+"""Throughput/latency curve of batched YOLO person detection.
+
+Needs ultralytics: ``python -m snmimt_campus_tracker.benchmarks.yolo_batch data/class4.mp4``.
+Latency is the time a frame waits for its batch to fill at the video's native
+frame rate plus the batch's inference time.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+import cv2
+
+from ..camera_processor import CameraProcessor
+
+BATCH_SIZES = (1, 2, 4, 8, 16)
+
+
+def run(video_path: str = "data/class4.mp4", n_frames: int = 64, warmup: int = 2) -> None:
+    processor = CameraProcessor.create()
+    if processor.model is None and processor.detector is None:
+        print("ultralytics or an ONNX detector is required for this benchmark")
+        return
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = []
+    while len(frames) < n_frames:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        print(f"Could not read frames from {video_path}")
+        return
+
+    print(f"{video_path}: {len(frames)} frames at {fps:.0f} fps")
+    print(f"{'batch':>6} {'frames/s':>9} {'ms/batch':>9} {'latency ms':>11}")
+    for batch_size in BATCH_SIZES:
+        for _ in range(warmup):
+            processor.detect_batch(frames[:batch_size])
+        batches = [frames[i : i + batch_size] for i in range(0, len(frames), batch_size)]
+        start = time.perf_counter()
+        for batch in batches:
+            processor.detect_batch(batch)
+        elapsed = time.perf_counter() - start
+        per_batch = elapsed / len(batches)
+        fill = (batch_size - 1) / fps
+        print(f"{batch_size:>6} {len(frames) / elapsed:>9.1f} {per_batch * 1e3:>9.1f} {(fill + per_batch) * 1e3:>11.1f}")
+
+
+if __name__ == "__main__":
+    run(*sys.argv[1:2])
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import pickle
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import cv2
 import numpy as np
@@ -12,8 +14,17 @@ try:
 except Exception:  # pragma: no cover
     YOLO = None  # type: ignore
 
-from .config import ModelConfig
+from .config import ModelConfig, StreamConfig, TrackingConfig
+from .detection_store import DetectionBatch
+from .frame_source import DecodeStats, LiveReader, PrefetchingReader, is_live_source, read_frames
+from .motion_gate import MotionGate, TrackCarrier
+from .onnx_detector import OnnxPersonDetector
+from .reid import appearance_embedding
+from .roi import CameraROI, DetectorStats, shift_box, yolo_input_shape
+from .tracker import DISCARDED, TENTATIVE, MultiObjectTracker
+from .tracking_cache import TrackingCache
 from .utils import Detection
+from .visualization import VisualizationWriter
 
 
 @dataclass
@@ -21,9 +32,22 @@ class CameraProcessor:
     model: YOLO | None
     conf: float
     iou: float
+    timings: Dict[str, float] = field(default_factory=dict)
+    rois: Dict[str, CameraROI] = field(default_factory=dict)
+    camera_stats: Dict[str, DetectorStats] = field(default_factory=dict)
+    detector: OnnxPersonDetector | None = None  # set with ModelConfig.backend = "onnx"; detection only, no tracking
+    frame_index: int = -1  # frame stream_video last handed out
+    tracker: MultiObjectTracker | None = None  # builtin tracker of the running stream
 
     @classmethod
     def create(cls) -> "CameraProcessor":
+        if ModelConfig.backend == "onnx":
+            try:
+                detector = OnnxPersonDetector.load()
+            except Exception as exc:
+                print(f"ONNX detector unavailable ({exc}); falling back to ultralytics")
+            else:
+                return cls(model=None, conf=ModelConfig.conf_threshold, iou=ModelConfig.iou_threshold, detector=detector)
         model = None
         if YOLO is not None:
             try:
@@ -32,98 +56,256 @@ class CameraProcessor:
                 model = None
         return cls(model=model, conf=ModelConfig.conf_threshold, iou=ModelConfig.iou_threshold)
 
-    def _detect_persons(self, frame_bgr: np.ndarray) -> List[Tuple[Tuple[int, int, int, int], float, int]]:
-        if self.model is None:
-            return []
-        res = self.model.predict(source=frame_bgr, conf=self.conf, iou=self.iou, device=ModelConfig.device, verbose=False)
+    def _boxes_from_result(self, r) -> List[Tuple[Tuple[int, int, int, int], float, int]]:
         outputs: List[Tuple[Tuple[int, int, int, int], float, int]] = []
-        for r in res:
-            if r.boxes is None:
+        if r.boxes is None:
+            return outputs
+        for b in r.boxes:
+            cls_id = int(b.cls.item()) if hasattr(b.cls, "item") else int(b.cls)
+            if cls_id != ModelConfig.person_class_id:
                 continue
-            for b in r.boxes:
-                cls_id = int(b.cls.item()) if hasattr(b.cls, "item") else int(b.cls)
-                if cls_id != ModelConfig.person_class_id:
-                    continue
-                conf = float(b.conf.item()) if hasattr(b.conf, "item") else float(b.conf)
-                xyxy = b.xyxy[0].tolist()
-                x1, y1, x2, y2 = map(int, xyxy)
-                outputs.append(((x1, y1, x2, y2), conf, cls_id))
+            conf = float(b.conf.item()) if hasattr(b.conf, "item") else float(b.conf)
+            xyxy = b.xyxy[0].tolist()
+            x1, y1, x2, y2 = map(int, xyxy)
+            outputs.append(((x1, y1, x2, y2), conf, cls_id))
         return outputs
 
-    def process_video(self, video_path: str | Path, location: str) -> List[Detection]:
-        cap = cv2.VideoCapture(str(video_path))
-        detections: List[Detection] = []
-        frame_index = 0
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-        while True:
-            ok, frame = cap.read()
-            if not ok:
-                break
-            boxes = self._detect_persons(frame)
-            for i, (bbox, conf, cls_id) in enumerate(boxes):
-                det = Detection(
-                    track_id=i,  # placeholder; tracking handled in track_video
-                    bbox_xyxy=bbox,
-                    confidence=conf,
-                    class_id=cls_id,
-                    frame_index=frame_index,
-                    timestamp=frame_index / fps,
-                    location=location,
+    def roi(self, location: Optional[str]) -> CameraROI:
+        key = location or ""
+        if key not in self.rois:
+            self.rois[key] = CameraROI.for_location(location)
+        return self.rois[key]
+
+    def _record_detector(self, location: Optional[str], crop: np.ndarray, frame: np.ndarray, seconds: float) -> None:
+        imgsz = self.roi(location).imgsz
+        if self.detector is not None:
+            size = self.detector.input_size(imgsz)
+            input_shape = (size, size)
+        else:
+            input_shape = yolo_input_shape(crop.shape, imgsz)
+        self.camera_stats.setdefault(location or "", DetectorStats()).record(crop.shape, frame.shape, seconds, input_shape)
+
+    def detect_batch(
+        self, frames: List[np.ndarray], locations: Optional[List[Optional[str]]] = None, conf: Optional[float] = None
+    ) -> List[List[Tuple[Tuple[int, int, int, int], float, int]]]:
+        """Run predict over several frames (from one video or several cameras).
+
+        Each frame is cropped to its camera's ROI (``locations`` gives the
+        camera of each frame) and boxes are mapped back to full-frame
+        coordinates. Frames sharing an inference size go through one predict
+        call. Returns the person boxes of each frame, in the order given,
+        scoring at least ``conf`` (default ``self.conf``).
+        """
+        if (self.model is None and self.detector is None) or not frames:
+            return [[] for _ in frames]
+        conf = self.conf if conf is None else conf
+        locations = locations or [None] * len(frames)
+        rois = [self.roi(loc) for loc in locations]
+        crops = [roi.crop(frame) for roi, frame in zip(rois, frames)]
+        groups: Dict[Optional[int], List[int]] = {}
+        for i, roi in enumerate(rois):
+            groups.setdefault(roi.imgsz, []).append(i)
+        outputs: List[List[Tuple[Tuple[int, int, int, int], float, int]]] = [[] for _ in frames]
+        for members in groups.values():
+            start = time.perf_counter()
+            if self.detector is not None:
+                boxes = self.detector.detect([crops[i][0] for i in members], rois[members[0]].imgsz, conf)
+            else:
+                res = self.model.predict(
+                    source=[crops[i][0] for i in members],
+                    conf=conf,
+                    iou=self.iou,
+                    device=ModelConfig.device,
+                    verbose=False,
+                    **rois[members[0]].predict_kwargs(),
                 )
-                detections.append(det)
-            frame_index += 1
-        cap.release()
-        return detections
+                boxes = [self._boxes_from_result(r) for r in res]
+            per_frame = (time.perf_counter() - start) / len(members)
+            for i, frame_boxes in zip(members, boxes):
+                crop, offset = crops[i]
+                outputs[i] = [(shift_box(bbox, offset), conf, cls_id) for bbox, conf, cls_id in frame_boxes]
+                self._record_detector(locations[i], crop, frames[i], per_frame)
+        return outputs
 
-    def track_video(self, video_path: str | Path, location: str) -> List[Detection]:
-        # For simplicity, use model.track if available, otherwise fallback to per-frame ids
-        if self.model is None:
-            return self.process_video(video_path, location)
+    @property
+    def builtin_tracking(self) -> bool:
+        """Track with ``tracker.MultiObjectTracker`` (always the case without an ultralytics model)."""
+        return self.model is None or TrackingConfig.tracker_backend == "builtin"
+
+    @property
+    def track_conf(self) -> float:
+        """Detector confidence of frames fed to the builtin tracker.
 
-        cap = cv2.VideoCapture(str(video_path))
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-        cap.release()
-
-        # Create output directory for visualizations
-        output_dir = Path("outputs") / location
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        results = self.model.track(
-            source=str(video_path),
-            conf=self.conf,
-            iou=self.iou,
-            device=ModelConfig.device,
-            verbose=False,
-            persist=True,
-            save=True,  # Always save visualizations
-            project="outputs",
-            name=location,
-            save_txt=True,  # Save detection coordinates
+        bytetrack extends existing tracks with boxes scoring under
+        ``TrackingConfig.high_conf``, so the detector has to keep them;
+        unmatched low boxes are still dropped by the tracker.
+        """
+        if self.builtin_tracking and TrackingConfig.tracker_type == "bytetrack":
+            return min(self.conf, TrackingConfig.high_conf * 0.5)
+        return self.conf
+
+    def _track_boxes(
+        self, frame: np.ndarray, boxes: List[Tuple[Tuple[int, int, int, int], float, int]], frame_index: int,
+        fps: float, location: str,
+    ) -> List[Detection]:
+        if self.tracker is None:
+            self.tracker = MultiObjectTracker()
+        features = None
+        if self.tracker.tracker_type == "deep_sort" and boxes:
+            embeddings = [appearance_embedding(frame, bbox) for bbox, _, _ in boxes]
+            if all(e is not None for e in embeddings):
+                features = np.stack(embeddings)
+        track_ids = self.tracker.update(
+            np.array([bbox for bbox, _, _ in boxes], dtype=np.float32).reshape(-1, 4),
+            np.array([conf for _, conf, _ in boxes], dtype=np.float32),
+            frame_index,
+            features,
         )
-        
+        return [
+            Detection(
+                track_id=int(track_id),
+                bbox_xyxy=bbox,
+                confidence=conf,
+                class_id=cls_id,
+                frame_index=frame_index,
+                timestamp=frame_index / fps,
+                location=location,
+            )
+            for (bbox, conf, cls_id), track_id in zip(boxes, track_ids.tolist())
+            if track_id not in (DISCARDED, TENTATIVE)
+        ][: ModelConfig.max_detections_per_frame]
+
+    def _detect_persons(
+        self, frame_bgr: np.ndarray, location: Optional[str] = None, conf: Optional[float] = None
+    ) -> List[Tuple[Tuple[int, int, int, int], float, int]]:
+        return self.detect_batch([frame_bgr], [location], conf)[0]
+
+    def process_video(self, video_path: str | Path, location: str) -> DetectionBatch:
+        cache = None
+        if self.model is not None or self.detector is not None:
+            cache = TrackingCache.open(video_path, location, "detect", self.conf, self.iou)
+        cached = cache.load() if cache is not None else None
+        if cached is not None:
+            return cached
+        detections = DetectionBatch()
+        gate = MotionGate() if StreamConfig.adaptive_sampling else None
+        carrier = TrackCarrier(use_velocity=False)
+        batch_size = max(1, ModelConfig.batch_size)
+        # Frames wait here until a full batch of detector frames is ready; None marks a gated frame
+        pending: List[Tuple[int, float, np.ndarray | None]] = []
+
+        def flush() -> None:
+            frames = [f for _, _, f in pending if f is not None]
+            boxes_per_frame = iter(self.detect_batch(frames, [location] * len(frames)))
+            for frame_index, timestamp, frame in pending:
+                if frame is None:
+                    detections.extend(carrier.predict(frame_index, timestamp))
+                    continue
+                frame_detections = [
+                    Detection(
+                        track_id=i,  # placeholder; tracking handled in track_video
+                        bbox_xyxy=bbox,
+                        confidence=conf,
+                        class_id=cls_id,
+                        frame_index=frame_index,
+                        timestamp=timestamp,
+                        location=location,
+                    )
+                    for i, (bbox, conf, cls_id) in enumerate(next(boxes_per_frame))
+                ]
+                carrier.observe(frame_detections)
+                detections.extend(frame_detections)
+            pending.clear()
+
+        def tracked() -> bool:
+            # The carrier lags behind detector frames still waiting in the batch; bring it up to date first
+            if any(f is not None for _, _, f in pending):
+                flush()
+            return bool(carrier)
+
+        for frame_index, fps, frame in self.iter_frames(video_path):
+            detect = gate is None or gate.should_detect(frame, has_tracks=tracked)
+            pending.append((frame_index, frame_index / fps, frame if detect else None))
+            if sum(f is not None for _, _, f in pending) >= batch_size:
+                flush()
+        flush()
+        self._record_sampling(gate)
+        if cache is not None:
+            cache.save(detections)
+        return detections
+
+    def process_videos_batched(self, videos: Dict[str | Path, str]) -> Dict[str, DetectionBatch]:
+        """Detect persons in several camera videos at once, batching one frame per camera.
+
+        ``videos`` maps video path to location, so one location can have
+        several videos; results are keyed by ``str(path)``. Frames are read
+        round-robin and grouped into batches of ``ModelConfig.batch_size``
+        across cameras.
+        """
+        batch_size = max(1, ModelConfig.batch_size)
+        locations = {str(path): loc for path, loc in videos.items()}
+        captures = {path: cv2.VideoCapture(path) for path in locations}
+        fps = {path: cap.get(cv2.CAP_PROP_FPS) or 30.0 for path, cap in captures.items()}
+        next_index = {path: 0 for path in captures}
+        results: Dict[str, DetectionBatch] = {path: DetectionBatch() for path in captures}
+        pending: List[Tuple[str, int, np.ndarray]] = []
+
+        def flush() -> None:
+            batch = self.detect_batch([f for _, _, f in pending], [locations[path] for path, _, _ in pending])
+            for (path, frame_index, _), boxes in zip(pending, batch):
+                results[path].extend(
+                    Detection(
+                        track_id=i,
+                        bbox_xyxy=bbox,
+                        confidence=conf,
+                        class_id=cls_id,
+                        frame_index=frame_index,
+                        timestamp=frame_index / fps[path],
+                        location=locations[path],
+                    )
+                    for i, (bbox, conf, cls_id) in enumerate(boxes)
+                )
+            pending.clear()
+
+        try:
+            while captures:
+                for path in list(captures):
+                    ok, frame = captures[path].read()
+                    if not ok:
+                        captures.pop(path).release()
+                        continue
+                    pending.append((path, next_index[path], frame))
+                    next_index[path] += 1
+                    if len(pending) >= batch_size:
+                        flush()
+            flush()
+        finally:
+            for cap in captures.values():
+                cap.release()
+        return results
+
+    def _record_sampling(self, gate: MotionGate | None) -> None:
+        if gate is not None:
+            self.timings["detector_frames"] = gate.detected
+            self.timings["skipped_frames"] = gate.skipped
+
+    def _parse_track_result(
+        self, r, frame_index: int, fps: float, location: str, offset: Tuple[int, int] = (0, 0)
+    ) -> List[Detection]:
         detections: List[Detection] = []
-        unique_tracks = set()  # Track unique person IDs
-        
-        for r in results:
-            if r.boxes is None:
+        if r.boxes is None:
+            return detections
+        for b in r.boxes:
+            cls_id = int(b.cls.item()) if hasattr(b.cls, "item") else int(b.cls)
+            if cls_id != ModelConfig.person_class_id:
                 continue
-            frame_index = int(getattr(r, "frame_idx", 0))
-            frame_detections = 0
-            
-            for b in r.boxes:
-                cls_id = int(b.cls.item()) if hasattr(b.cls, "item") else int(b.cls)
-                if cls_id != ModelConfig.person_class_id:
-                    continue
-                conf = float(b.conf.item()) if hasattr(b.conf, "item") else float(b.conf)
-                xyxy = b.xyxy[0].tolist()
-                x1, y1, x2, y2 = map(int, xyxy)
-                track_id = int(b.id.item()) if getattr(b, "id", None) is not None else -1
-                
-                # Count unique tracks
-                if track_id >= 0:
-                    unique_tracks.add(track_id)
-                
-                det = Detection(
+            conf = float(b.conf.item()) if hasattr(b.conf, "item") else float(b.conf)
+            xyxy = b.xyxy[0].tolist()
+            x1, y1, x2, y2 = map(int, xyxy)
+            x1, y1, x2, y2 = shift_box((x1, y1, x2, y2), offset)
+            track_id = int(b.id.item()) if getattr(b, "id", None) is not None else -1
+            detections.append(
+                Detection(
                     track_id=track_id,
                     bbox_xyxy=(x1, y1, x2, y2),
                     confidence=conf,
@@ -132,17 +314,245 @@ class CameraProcessor:
                     timestamp=frame_index / fps,
                     location=location,
                 )
-                detections.append(det)
-                frame_detections += 1
-                
-                # Limit detections per frame to avoid false positives
-                if frame_detections >= ModelConfig.max_detections_per_frame:
-                    break
-        
+            )
+            # Limit detections per frame to avoid false positives
+            if len(detections) >= ModelConfig.max_detections_per_frame:
+                break
+        return detections
+
+    def tracker_state(self) -> Optional[bytes]:
+        """Pickled tracker state of the running stream, or None if there is none or it cannot be pickled."""
+        if self.builtin_tracking:
+            return pickle.dumps(self.tracker) if self.tracker is not None else None
+        trackers = getattr(getattr(self.model, "predictor", None), "trackers", None)
+        if not trackers:
+            return None
+        try:
+            return pickle.dumps(trackers)
+        except Exception:
+            return None
+
+    def _restore_tracker(self, state: bytes, crop: np.ndarray, roi: CameraROI) -> None:
+        if self.builtin_tracking:
+            self.tracker = pickle.loads(state)
+            return
+        if getattr(self.model, "predictor", None) is None:
+            # ultralytics creates the predictor and its trackers on the first track call
+            self.model.track(source=crop, conf=self.conf, iou=self.iou, device=ModelConfig.device,
+                             verbose=False, persist=True, **roi.predict_kwargs())
+        self.model.predictor.trackers = pickle.loads(state)
+
+    def _reset_tracker(self) -> None:
+        self.tracker = None
+        predictor = getattr(self.model, "predictor", None)
+        for tracker in getattr(predictor, "trackers", None) or []:
+            tracker.reset()
+
+    def iter_frames(self, video_path: str | Path, start_frame: int = 0) -> Iterator[Tuple[int, float, np.ndarray]]:
+        """Decode a video once, yielding (frame_index, fps, frame) without keeping old frames.
+
+        With ``StreamConfig.prefetch_enabled`` decoding runs on a background
+        thread so it overlaps with whatever the consumer does per frame.
+        Live sources (and files when ``StreamConfig.replay_realtime`` is set)
+        go through ``LiveReader``, which drops frames that would blow the
+        latency budget. Stage timings of the last run, including lag for
+        live sources, are left in ``self.timings``. ``start_frame`` skips
+        the frames before it (files only, replayed or not).
+        """
+        live = None
+        if is_live_source(video_path) or StreamConfig.replay_realtime:
+            live = LiveReader(video_path, start_frame=start_frame)
+            # Items carry the capture time as well, so lag covers the whole pipeline
+            fps, frames, stats = live.fps, iter(live), live.stats
+        elif StreamConfig.prefetch_enabled:
+            reader = PrefetchingReader(video_path, start_frame=start_frame)
+            fps, frames, stats = reader.fps, iter(reader), reader.stats
+        else:
+            cap = cv2.VideoCapture(str(video_path))
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            stats = DecodeStats()
+            frames = read_frames(cap, stats, start_frame)
+        start = time.perf_counter()
+        process_s = 0.0
+        try:
+            for item in frames:
+                frame_index, frame = item[0], item[-1]
+                t0 = time.perf_counter()
+                yield frame_index, fps, frame
+                process_s += time.perf_counter() - t0
+                if live is not None:
+                    live.lag.record(time.monotonic() - item[1])
+        finally:
+            frames.close()
+            self.timings = {
+                "wall_s": time.perf_counter() - start,
+                "decode_s": stats.decode_s,
+                "wait_s": stats.wait_s,
+                "process_s": process_s,
+                "frames": stats.frames,
+                "dropped": stats.dropped,
+            }
+            if live is not None:
+                self.timings.update(live.lag.summary())
+
+    def stream_video(
+        self,
+        video_path: str | Path,
+        location: str,
+        start_frame: int = 0,
+        tracker_state: Optional[bytes] = None,
+        writer_part: int = 0,
+    ) -> Iterator[Tuple[np.ndarray, List[Detection]]]:
+        """Single pass over a video: each decoded frame is tracked and handed on with its detections.
+
+        Only the frame currently flowing through the pipeline is held in memory;
+        consumers (face recognition) work on it before the next one is decoded.
+        Detections of unchanged videos are replayed from the tracking cache
+        instead of running the detector; frames are still decoded for the
+        consumer. To resume an interrupted pass, start at ``start_frame``
+        with the tracker restored from ``tracker_state``; the visualization
+        video then goes to part file ``writer_part``.
+        """
+        cache = None
+        if self.model is not None or self.detector is not None:
+            cache = TrackingCache.open(video_path, location, "stream", self.conf, self.iou)
+        cached = cache.load() if cache is not None else None
+        # A resumed pass is partial, so it is never written to the cache
+        recorded = DetectionBatch() if cache is not None and cached is None and start_frame == 0 else None
+        cached_rows = iter(cached) if cached is not None else None
+        next_cached = next(cached_rows, None) if cached_rows is not None else None
+        if cached is None:
+            self._reset_tracker()
+        writer = None
+        roi = self.roi(location)
+        gate = MotionGate() if StreamConfig.adaptive_sampling and cached is None else None
+        carrier = TrackCarrier()
+        try:
+            for frame_index, fps, frame in self.iter_frames(video_path, start_frame):
+                if writer is None:
+                    writer = VisualizationWriter(
+                        Path(ModelConfig.output_dir) / location, Path(video_path).stem, fps,
+                        start_frame=start_frame, part=writer_part,
+                    )
+                if cached_rows is not None:
+                    # Cached rows are in frame order; take those of this frame
+                    detections = []
+                    while next_cached is not None and next_cached.frame_index <= frame_index:
+                        if next_cached.frame_index == frame_index:
+                            detections.append(next_cached)
+                        next_cached = next(cached_rows, None)
+                elif gate is not None and not gate.should_detect(frame, has_tracks=bool(carrier)):
+                    # Static scene: carry tracks forward instead of running the detector
+                    detections = carrier.predict(frame_index, frame_index / fps)
+                elif self.builtin_tracking:
+                    if tracker_state is not None:
+                        self._restore_tracker(tracker_state, frame, roi)
+                        tracker_state = None
+                    detections = self._track_boxes(
+                        frame, self._detect_persons(frame, location, self.track_conf), frame_index, fps, location
+                    )
+                    carrier.observe(detections)
+                else:
+                    crop, offset = roi.crop(frame)
+                    if tracker_state is not None:
+                        self._restore_tracker(tracker_state, crop, roi)
+                        tracker_state = None
+                    start = time.perf_counter()
+                    results = self.model.track(
+                        source=crop,
+                        conf=self.conf,
+                        iou=self.iou,
+                        device=ModelConfig.device,
+                        verbose=False,
+                        persist=True,
+                        **roi.predict_kwargs(),
+                    )
+                    self._record_detector(location, crop, frame, time.perf_counter() - start)
+                    detections = self._parse_track_result(results[0], frame_index, fps, location, offset)
+                    carrier.observe(detections)
+                if recorded is not None:
+                    recorded.extend(detections)
+                self.frame_index = frame_index
+                yield frame, detections
+                # Handed to the writer only once the consumer is done, so face ids are filled in
+                writer.submit(frame_index, frame, detections)
+            # Only a complete pass is cached
+            if recorded is not None:
+                cache.save(recorded)
+        finally:
+            if writer is not None:
+                writer.close()
+            self._record_sampling(gate)
+
+    def track_video(self, video_path: str | Path, location: str) -> DetectionBatch:
+        if self.model is None and self.detector is None:
+            return self.process_video(video_path, location)
+
+        # ultralytics can only track whole frames of a file source; crop and track frame by frame instead
+        streamed = self.roi(location).roi is not None or self.builtin_tracking
+        # A streamed pass caches its own output, so both share that one entry
+        cache = TrackingCache.open(video_path, location, "stream" if streamed else "track", self.conf, self.iou)
+        if cache is not None:
+            cached = cache.load()
+            if cached is not None:
+                print(f"  💾 Tracking results loaded from cache ({len(cached)} detections)")
+                return cached
+
+        detections = DetectionBatch()
+        if streamed:
+            for _, frame_dets in self.stream_video(video_path, location):
+                detections.extend(frame_dets)
+        else:
+            cap = cv2.VideoCapture(str(video_path))
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            cap.release()
+
+            output_dir = Path(ModelConfig.output_dir) / location
+            writer = VisualizationWriter(output_dir, Path(video_path).stem, fps)
+
+            # Annotation and encoding happen on the writer thread, not inside ultralytics
+            results = self.model.track(
+                source=str(video_path),
+                conf=self.conf,
+                iou=self.iou,
+                device=ModelConfig.device,
+                verbose=False,
+                persist=True,
+                stream=True,
+                save=False,
+                save_txt=False,
+                **self.roi(location).predict_kwargs(),
+            )
+
+            try:
+                for frame_index, r in enumerate(results):
+                    frame_dets = self._parse_track_result(r, frame_index, fps, location)
+                    writer.submit(frame_index, r.orig_img, frame_dets)
+                    detections.extend(frame_dets)
+                    # The stream decodes the file too; Results.speed holds the model's own ms for this frame
+                    model_s = sum((getattr(r, "speed", None) or {}).values()) / 1000
+                    self._record_detector(location, r.orig_img, r.orig_img, model_s)
+            finally:
+                writer.close()
+            if writer.mode != "off":
+                print(f"  📁 Visualizations saved to: {output_dir}/ ({writer.written} frames, {writer.dropped} dropped)")
+
+        track_ids = detections.columns()["track_id"]
+        unique_tracks = np.unique(track_ids[track_ids >= 0])
+
         print(f"  📊 Unique people tracked: {len(unique_tracks)}")
         print(f"  📊 Total detections: {len(detections)}")
-        print(f"  📁 Visualizations saved to: outputs/{location}/")
-        
+        self.print_detector_stats(location)
+        if cache is not None and not streamed:
+            cache.save(detections)
         return detections
 
-
+    def print_detector_stats(self, location: str) -> None:
+        stats = self.camera_stats.get(location)
+        if stats is None or not stats.frames:
+            return
+        s = stats.summary()
+        print(
+            f"  🎯 {location} detector: {s['megapixels_per_frame']:.2f} MP/frame "
+            f"({s['roi_share']:.0%} of the frame), {s['detector_ms']:.1f} ms/frame over {s['frames']} frames"
+        )
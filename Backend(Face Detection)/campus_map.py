@@ -1,10 +1,17 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from .config import CampusMapConfig
+import numpy as np
+
+from .config import TRAVEL_TIME_SECONDS, CampusMapConfig
+
+_travel_times: Dict[str, "TravelTimes"] = {}
 
 
 @dataclass
@@ -12,6 +19,8 @@ class CampusMap:
     image_path: Path
     camera_positions: Dict[str, Tuple[int, int]]
     pixel_to_meter_ratio: float
+    walkable_edges: List[Tuple[str, str]] = field(default_factory=list)
+    walking_speed_mps: float = 1.2
 
     @classmethod
     def from_config(cls) -> "CampusMap":
@@ -19,6 +28,8 @@ class CampusMap:
             image_path=CampusMapConfig.aerial_image,
             camera_positions=CampusMapConfig.camera_positions,
             pixel_to_meter_ratio=CampusMapConfig.pixel_to_meter_ratio,
+            walkable_edges=list(CampusMapConfig.walkable_edges),
+            walking_speed_mps=CampusMapConfig.walking_speed_mps,
         )
 
     def distance_meters(self, point_a: Tuple[int, int], point_b: Tuple[int, int]) -> float:
@@ -27,4 +38,122 @@ class CampusMap:
         pixel_dist = ((ax - bx) ** 2 + (ay - by) ** 2) ** 0.5
         return pixel_dist * self.pixel_to_meter_ratio
 
+    def walk_seconds(self, location_a: str, location_b: str) -> Optional[float]:
+        """Straight-line walking time between two cameras, or None if either has no position."""
+        a = self.camera_positions.get(location_a)
+        b = self.camera_positions.get(location_b)
+        if a is None or b is None:
+            return None
+        return self.distance_meters(a, b) / self.walking_speed_mps
+
+    def travel_times(self, measured: Optional[Dict[Tuple[str, str], float]] = None) -> "TravelTimes":
+        """Shortest travel time between every pair of locations over the walkway graph.
+
+        Each walkable edge costs its straight-line walking time, except that a
+        measured time (``TRAVEL_TIME_SECONDS`` by default) replaces it in its
+        direction; measured pairs are edges even if not listed as walkable.
+        Unconnected pairs are inf, as is the diagonal (staying put is not a
+        transition).
+        """
+        measured = TRAVEL_TIME_SECONDS if measured is None else measured
+        names = sorted(set(self.camera_positions) | {n for e in self.walkable_edges for n in e} | {n for p in measured for n in p})
+        index = {name: i for i, name in enumerate(names)}
+        seconds = np.full((len(names), len(names)), np.inf)
+        for a, b in self.walkable_edges:
+            walk = self.walk_seconds(a, b)
+            if walk is not None:
+                i, j = index[a], index[b]
+                seconds[i, j] = seconds[j, i] = min(seconds[i, j], walk)
+        for (a, b), measured_s in measured.items():
+            seconds[index[a], index[b]] = float(measured_s)
+        np.fill_diagonal(seconds, 0.0)
+        # Floyd-Warshall, one vectorized relaxation per intermediate location
+        for k in range(len(names)):
+            seconds = np.minimum(seconds, seconds[:, k : k + 1] + seconds[k : k + 1, :])
+        np.fill_diagonal(seconds, np.inf)
+        return TravelTimes(names, seconds)
+
+    def fingerprint(self, measured: Optional[Dict[Tuple[str, str], float]] = None) -> str:
+        measured = TRAVEL_TIME_SECONDS if measured is None else measured
+        payload = {
+            "positions": {k: list(v) for k, v in self.camera_positions.items()},
+            "pixel_to_meter_ratio": self.pixel_to_meter_ratio,
+            "walkable_edges": [list(e) for e in self.walkable_edges],
+            "walking_speed_mps": self.walking_speed_mps,
+            "measured": sorted([a, b, float(s)] for (a, b), s in measured.items()),
+        }
+        blob = json.dumps(payload, sort_keys=True).encode()
+        return hashlib.blake2b(blob, digest_size=12).hexdigest()
+
+
+@dataclass
+class TravelTimes:
+    """All-pairs travel seconds between campus locations, indexed by interned location id.
+
+    ``seconds[code(a), code(b)]`` is the expected time from ``a`` to ``b``;
+    inf means no path. ``lookup`` is the scalar form.
+    """
+
+    locations: List[str]
+    seconds: np.ndarray
+
+    def __post_init__(self) -> None:
+        self.index = {name: i for i, name in enumerate(self.locations)}
+
+    def code(self, location: str) -> int:
+        return self.index.get(location, -1)
+
+    def codes(self, locations: Iterable[str]) -> np.ndarray:
+        return np.array([self.index.get(loc, -1) for loc in locations], dtype=np.int32)
+
+    def lookup(self, from_location: str, to_location: str) -> Optional[float]:
+        i = self.index.get(from_location)
+        j = self.index.get(to_location)
+        if i is None or j is None:
+            return None
+        value = self.seconds[i, j]
+        return float(value) if value != np.inf else None
+
+    def max_seconds(self) -> float:
+        finite = self.seconds[np.isfinite(self.seconds)]
+        return float(finite.max()) if finite.size else 0.0
+
+    def save(self, path: Path, key: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+        np.savez(tmp, locations=np.array(self.locations), seconds=self.seconds, key=np.array(key))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, key: str) -> Optional["TravelTimes"]:
+        try:
+            with np.load(path) as data:
+                if str(data["key"]) != key:
+                    return None
+                return cls([str(n) for n in data["locations"]], data["seconds"])
+        except Exception:
+            return None
+
+
+def load_travel_times(campus_map: Optional[CampusMap] = None, cache_path: Optional[Path] = None) -> TravelTimes:
+    """Travel times of the configured campus map, from memory, the disk cache, or built afresh.
 
+    Results are keyed by a hash of the map geometry, walkways and measured
+    times, so they are rebuilt only when one of them changes. The disk
+    cache (``cache_path`` or ``CampusMapConfig.travel_cache``) is only used
+    when one is set; nothing is written otherwise.
+    """
+    campus_map = campus_map or CampusMap.from_config()
+    key = campus_map.fingerprint()
+    if key not in _travel_times:
+        path = cache_path or CampusMapConfig.travel_cache
+        travel = TravelTimes.load(Path(path), key) if path is not None and Path(path).exists() else None
+        if travel is None:
+            travel = campus_map.travel_times()
+            if path is not None:
+                try:
+                    travel.save(Path(path), key)
+                except OSError:
+                    pass
+        _travel_times[key] = travel
+    return _travel_times[key]
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .config import CAMERA_SETTINGS, FaceConfig, ModelConfig, StoreConfig, TrackingConfig
+from .detection_store import DetectionBatch
+from .reid import TrackletAppearance
+from .track_identity import TrackIdentityResolver
+from .tracking_cache import detector_settings
+from .utils import Detection
+
+
+@dataclass
+class VideoProgress:
+    """Everything needed to pick a video up again after its last processed frame."""
+
+    frame_index: int = -1
+    identities: TrackIdentityResolver = field(default_factory=TrackIdentityResolver)
+    tracker_state: Optional[bytes] = None
+    attendance: Dict[str, Dict[str, dict]] = field(default_factory=dict)
+    recognition_count: int = 0
+    segments: int = 0
+    writer_part: int = 0  # each resumed pass writes its visualization to a new part file
+    appearance: TrackletAppearance = field(default_factory=TrackletAppearance)
+
+
+def pipeline_fingerprint() -> str:
+    """Hash of the settings that change the detections, identities or attendance of a pass."""
+    payload = {
+        "detector": detector_settings(),
+        "conf": ModelConfig.conf_threshold,
+        "iou": ModelConfig.iou_threshold,
+        "cameras": CAMERA_SETTINGS,
+        "identity": {k: v for k, v in vars(TrackingConfig).items() if k.startswith("identity_")},
+        # Thread counts change speed, not results
+        "face": {k: v for k, v in vars(FaceConfig).items() if not k.startswith(("_", "ort_"))},
+    }
+    blob = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(blob, digest_size=8).hexdigest()
+
+
+def _write_atomic(path: Path, payload: object) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+class CheckpointStore:
+    """Checkpoints of one run over a list of videos, under ``StoreConfig.checkpoint_dir``.
+
+    Per video there is a progress file (last frame, track identities,
+    tracker state, attendance and track appearance so far), plus one
+    ``.npz`` segment holding the detections added since the previous
+    checkpoint, so each checkpoint only writes new rows. A finished video
+    leaves a small ``.done`` record (its detection count and attendance)
+    instead. Attendance is restored exactly as it was at the checkpoint, so
+    work redone after a crash cannot log a person twice. A run is
+    identified by its videos and ``pipeline_fingerprint()``, so a restart
+    with other detector, tracker or face settings starts over instead of
+    mixing in old results. Files are written atomically; the store is
+    picklable and can be handed to worker processes.
+    """
+
+    def __init__(self, video_files: Sequence[str], root: Optional[Path] = None) -> None:
+        identity = "\n".join([pipeline_fingerprint(), *sorted(video_files)])
+        run_id = hashlib.blake2b(identity.encode(), digest_size=8).hexdigest()
+        self.dir = Path(root or StoreConfig.checkpoint_dir) / run_id
+
+    def _path(self, video_file: str, suffix: str) -> Path:
+        return self.dir / f"{Path(video_file).name}.{suffix}"
+
+    def done(self, video_file: str) -> Optional[Tuple[int, Dict[str, Dict[str, dict]]]]:
+        path = self._path(video_file, "done")
+        if not path.exists():
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def progress(self, video_file: str) -> Optional[VideoProgress]:
+        path = self._path(video_file, "progress")
+        if not path.exists():
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def load_segments(self, video_file: str, progress: VideoProgress) -> DetectionBatch:
+        detections = DetectionBatch()
+        # Segments past progress.segments belong to a checkpoint that never completed
+        for i in range(progress.segments):
+            detections.extend(DetectionBatch.load(self._path(video_file, f"seg{i:05d}.npz")))
+        return detections
+
+    def save_progress(self, video_file: str, progress: VideoProgress, new_rows: List[Detection]) -> float:
+        """Write a checkpoint; returns the seconds it took."""
+        start = time.perf_counter()
+        self.dir.mkdir(parents=True, exist_ok=True)
+        if new_rows:
+            segment = DetectionBatch()
+            segment.extend(new_rows)
+            segment.save(self._path(video_file, f"seg{progress.segments:05d}.npz"))
+            progress.segments += 1
+        _write_atomic(self._path(video_file, "progress"), progress)
+        return time.perf_counter() - start
+
+    def mark_done(self, video_file: str, n_detections: int, daily_attendance: Dict[str, Dict[str, dict]]) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self._path(video_file, "done"), (n_detections, daily_attendance))
+        for path in self.dir.glob(f"{Path(video_file).name}.seg*.npz"):
+            path.unlink()
+        self._path(video_file, "progress").unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.dir, ignore_errors=True)
@@ -6,20 +6,86 @@ PROJECT_ROOT = Path(__file__).resolve().parent
 
 class ModelConfig:
     yolo_weights: str = "yolov8n.pt"  # auto-download by ultralytics
+    backend: str = "ultralytics"  # "ultralytics" or "onnx" (onnxruntime with NumPy pre/post-processing)
+    onnx_weights: str = "yolov8n.onnx"  # exported from yolo_weights on first use if missing
+    onnx_int8: bool = False  # use a dynamically int8-quantized copy (<name>-int8.onnx)
+    onnx_imgsz: int = 640
+    onnx_threads: int = 0  # onnxruntime intra-op threads; 0 = onnxruntime default
     device: str = "cpu"  # force CPU on macOS (no CUDA)
     person_class_id: int = 0  # COCO class id for person
     conf_threshold: float = 0.5  # increased from 0.25 to reduce false positives
     iou_threshold: float = 0.45
     save_visualization: bool = True  # save detection visualizations
     max_detections_per_frame: int = 20  # limit detections per frame
+    batch_size: int = 1  # frames per predict call in process_video / process_videos_batched
+    visualization_mode: str = "sampled"  # "off", "sampled" or "full"; ignored when save_visualization is False
+    visualization_every_n: int = 30  # sampled mode: keep every Nth frame plus frames with a recognized face
+    visualization_queue: int = 16  # frames buffered for the background writer
+    save_detections_txt: bool = True  # append detections to outputs/<location>/<video>.txt
+    output_dir: str = "outputs"
 
 
 class TrackingConfig:
-    tracker_type: str = "deep_sort"  # "deep_sort" or "bytetrack" (via ultralytics track API)
-    max_age: int = 30
-    n_init: int = 3
-    max_cosine_distance: float = 0.2
-    nn_budget: int | None = None
+    tracker_backend: str = "ultralytics"  # "ultralytics" (model.track) or "builtin" (tracker.py, any detector/source)
+    tracker_type: str = "bytetrack"  # builtin association: "sort", "bytetrack" or "deep_sort" (appearance features per box)
+    max_age: int = 30  # frames a lost track is kept for re-association
+    n_init: int = 3  # matches before a track is confirmed and reported
+    max_cosine_distance: float = 0.2  # deep_sort appearance gate
+    nn_budget: int | None = None  # appearance features kept per track; None = 100
+    match_iou: float = 0.3  # minimum IoU between a predicted track box and its detection
+    high_conf: float = 0.5  # bytetrack: detections below this only extend existing tracks; the detector keeps boxes down to half of it
+    identity_min_votes: int = 3  # face matches needed before a track's identity is trusted
+    identity_vote_ratio: float = 0.6  # share of the track's vote mass the winner must hold
+    identity_reverify_interval: int = 90  # frames between re-checks of a confirmed track; 0 = never
+
+
+class ReIDConfig:
+    window_s: float = 5.0  # tracklets entering within one window are assigned to global ids together
+    max_gap_s: float | None = None  # absence after which a person is forgotten; None = travel_slack x longest campus travel time
+    travel_slack: float = 2.0
+    appearance_weight: float = 0.7  # cost weight of the embedding cosine distance
+    travel_weight: float = 0.3  # cost weight of the campus travel-time prior
+    max_appearance_distance: float = 0.4  # tracklets further apart never match
+    face_bonus: float = 0.3  # subtracted when both tracklets carry the same face id; different ids never match
+    max_cost: float = 0.5  # assignments costlier than this start a new global id
+    embedding_momentum: float = 0.8  # weight of a global id's embedding when a tracklet joins it
+    tracklet_timeout_s: float = 2.0  # online journeys: a camera track unseen this long is closed into a tracklet
+    max_open_track_s: float = 4 * 3600.0  # online journeys: a track open this long is split so it cannot hold back linking
+    appearance_every_n: int = 5  # recognition pass: frames between appearance samples of a tracked person
+
+
+class StreamConfig:
+    prefetch_enabled: bool = True  # decode on a background thread while inference runs
+    prefetch_depth: int = 8  # decoded frames buffered ahead of inference
+    prefetch_policy: str = "block"  # "block" (keep every frame) or "drop" (discard oldest when full)
+    adaptive_sampling: bool = False  # run the person detector only on frames with motion
+    motion_threshold: float = 0.01  # fraction of changed pixels that triggers detection
+    motion_pixel_delta: int = 25  # grey-level change that counts a pixel as changed
+    motion_width: int = 160  # width of the downscaled frame used for the motion score
+    max_stride: int = 15  # longest run of skipped frames while the scene is empty
+    active_stride: int = 3  # longest run of skipped frames while people are tracked
+    latency_budget_s: float = 0.5  # live sources: frames older than this when dequeued are dropped
+    live_buffer: int = 2  # live sources: captured frames held for inference; the oldest is dropped when full
+    replay_realtime: bool = False  # replay files at their native fps as if they were cameras
+    reconnect_attempts: int = 5  # network sources: reopen tries after the stream drops
+    reconnect_delay_s: float = 2.0
+
+
+class StoreConfig:
+    chunk_rows: int = 65_536  # detections per sealed column chunk
+    spill_threshold: int | None = 2_000_000  # rows kept in RAM before chunks go to memory-mapped files; None = never
+    spill_dir: Path | None = None  # None = system temp dir
+    tracking_cache: bool = True  # reuse detection/tracking results of unchanged videos
+    tracking_cache_dir: Path = PROJECT_ROOT / ".tracking_cache"
+    tracking_cache_refresh: bool = False  # ignore cached results and recompute them (--refresh-cache)
+    checkpoint_enabled: bool = True  # periodically save progress so an interrupted run resumes (--fresh starts over)
+    checkpoint_dir: Path = PROJECT_ROOT / ".checkpoints"
+    checkpoint_interval_s: float = 30.0  # seconds of processing between checkpoints of a video
+
+
+class ParallelConfig:
+    workers: int = 1  # video worker processes; 1 = serial, 0 = one per CPU core
+    threads_per_worker: int = 0  # torch/onnxruntime/OpenCV threads per worker; 0 = cores // workers
 
 
 class FaceConfig:
@@ -29,6 +95,37 @@ class FaceConfig:
     detector_backend: str = "retinaface"  # for deepface
     recognition_model: str = "Facenet512"  # for deepface
     recognition_threshold: float = 0.4  # lower is stricter for some models
+    model_name: str = "buffalo_l"  # InsightFace model pack used for embeddings
+    # Only these InsightFace modules are loaded; None loads all (gender/age, 3D/2D landmarks too)
+    allowed_modules: tuple[str, ...] | None = ("detection", "recognition")
+    det_size: tuple[int, int] = (640, 640)  # face detector input size
+    det_thresh: float = 0.5
+    ort_intra_op_threads: int = 0  # 0 = onnxruntime default (all cores)
+    ort_inter_op_threads: int = 0
+    ort_execution_mode: str = "sequential"  # or "parallel"
+    embedding_cache_name: str = ".embedding_cache.npz"  # stored inside faces_dir
+    index_type: str = "exact"  # "exact" (brute force) or "ivf" (approximate, for very large galleries)
+    ivf_n_lists: int = 256  # k-means cells for the IVF index
+    ivf_n_probe: int = 8  # cells scanned per query; higher = better recall, slower
+    face_detection_mode: str = "frame"  # "frame" (detect once, assign to persons) or "crop" (per person box)
+    quality_gate_enabled: bool = True  # skip tiny/blurred/profile faces before embedding
+    min_face_size: int = 32  # pixels, shorter side of the detected face box
+    min_face_sharpness: float = 30.0  # Laplacian variance on a 64x64 grayscale face crop
+    max_face_yaw: float = 0.35  # nose offset from eye midpoint, in eye distances
+    max_face_pitch: float = 0.25  # nose offset from halfway between eyes and mouth, in face heights
+
+
+FACE_MODEL_PRESETS = {
+    "full": {"allowed_modules": None, "det_size": (640, 640)},
+    "slim": {"allowed_modules": ("detection", "recognition"), "det_size": (640, 640)},
+    "fast": {"allowed_modules": ("detection", "recognition"), "det_size": (320, 320)},
+    "fast_1thread": {
+        "allowed_modules": ("detection", "recognition"),
+        "det_size": (320, 320),
+        "ort_intra_op_threads": 1,
+        "ort_inter_op_threads": 1,
+    },
+}
 
 
 class CampusMapConfig:
@@ -40,9 +137,22 @@ class CampusMapConfig:
         "main_entrance": (380, 400),
         "civil_hall": (320, 380),
         "classroom": (450, 380),
+        "main_hall": (380, 330),  # placeholder like the others
     }
-
-
+    # Walkways between camera locations. Pairs listed in TRAVEL_TIME_SECONDS use the
+    # measured time; others take the straight-line distance at walking_speed_mps.
+    walkable_edges = [
+        ("main_entrance", "civil_hall"),
+        ("main_entrance", "electronics_hall"),
+        ("main_entrance", "classroom"),
+        ("main_entrance", "main_hall"),
+        ("civil_hall", "classroom"),
+    ]
+    walking_speed_mps: float = 1.2
+    travel_cache: Path | None = None  # file to keep all-pairs travel times in across runs; None = memory only
+
+
+# Measured walking times; they override the map geometry for their pair
 TRAVEL_TIME_SECONDS = {
     ("main_entrance", "civil_hall"): 90,
     ("civil_hall", "main_entrance"): 90,
@@ -85,3 +195,14 @@ LOCATION_PATTERNS = {
 }
 
 
+# Per-camera detector settings, keyed like LOCATION_PATTERNS. "roi" is None (whole
+# frame), a rectangle (x1, y1, x2, y2) or a polygon [(x, y), ...] in fractions of the
+# frame size; the detector only sees that region. "imgsz" is YOLO's inference size
+# (None = model default). E.g. a doorway band: {"roi": (0.3, 0.2, 0.7, 1.0), "imgsz": 480}
+CAMERA_SETTINGS = {
+    "civil_hall": {"roi": None, "imgsz": None},
+    "classroom": {"roi": None, "imgsz": None},
+    "electronics_hall": {"roi": None, "imgsz": None},
+    "main_entrance": {"roi": None, "imgsz": None},
+    "main_hall": {"roi": None, "imgsz": None},
+}
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import weakref
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .config import StoreConfig
+from .utils import Detection
+
+COLUMNS: Dict[str, tuple] = {
+    "track_id": (np.int32, ()),
+    "bbox": (np.int32, (4,)),
+    "confidence": (np.float32, ()),
+    "class_id": (np.int16, ()),
+    "frame_index": (np.int32, ()),
+    "timestamp": (np.float64, ()),
+    "location": (np.int16, ()),  # index into DetectionBatch.locations, -1 = None
+    "face_id": (np.int32, ()),  # index into DetectionBatch.face_ids, -1 = None
+}
+
+
+class StringTable:
+    """Interns strings as small ints; -1 stands for None."""
+
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        idx = self._index.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self.values.append(value)
+            self._index[value] = idx
+        return idx
+
+    def lookup(self, idx: int) -> Optional[str]:
+        return None if idx < 0 else self.values[idx]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def _empty_columns(capacity: int) -> Dict[str, np.ndarray]:
+    return {name: np.empty((capacity, *shape), dtype=dtype) for name, (dtype, shape) in COLUMNS.items()}
+
+
+class DetectionBatch:
+    """Struct-of-arrays store for detections, a drop-in for ``List[Detection]`` consumers.
+
+    Rows are appended into a growing in-memory chunk that is sealed every
+    ``chunk_rows`` rows. Once more than ``spill_threshold`` rows are stored,
+    sealed chunks are written to ``.npy`` files and memory-mapped back, so
+    resident memory stays bounded. Iterating yields ``Detection`` objects
+    built on the fly; use ``columns()`` for vectorized access. Arguments
+    left as None take their ``StoreConfig`` value.
+    """
+
+    def __init__(
+        self,
+        chunk_rows: Optional[int] = None,
+        spill_threshold: Optional[int] = None,
+        spill_dir: Optional[Path] = None,
+    ) -> None:
+        chunk_rows = StoreConfig.chunk_rows if chunk_rows is None else chunk_rows
+        self.chunk_rows = max(1, chunk_rows)
+        self.spill_threshold = StoreConfig.spill_threshold if spill_threshold is None else spill_threshold
+        self._spill_root = StoreConfig.spill_dir if spill_dir is None else spill_dir
+        self._spill_path: Optional[Path] = None
+        self.locations = StringTable()
+        self.face_ids = StringTable()
+        self._chunks: List[Dict[str, np.ndarray]] = []
+        self._active = _empty_columns(min(self.chunk_rows, 1024))
+        self._n_active = 0
+        self._n_sealed = 0
+
+    def __len__(self) -> int:
+        return self._n_sealed + self._n_active
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._n_active + extra
+        capacity = self._active["track_id"].shape[0]
+        if needed <= capacity:
+            return
+        capacity = max(needed, min(2 * capacity, self.chunk_rows))
+        grown = _empty_columns(capacity)
+        for name, col in self._active.items():
+            grown[name][: self._n_active] = col[: self._n_active]
+        self._active = grown
+
+    def _seal(self) -> None:
+        if self._n_active == 0:
+            return
+        chunk = {name: col[: self._n_active].copy() for name, col in self._active.items()}
+        self._n_sealed += self._n_active
+        self._n_active = 0
+        self._active = _empty_columns(min(self.chunk_rows, 1024))
+        if self.spill_threshold is not None and len(self) > self.spill_threshold:
+            chunk = self._spill(chunk, len(self._chunks))
+        self._chunks.append(chunk)
+
+    def _spill(self, chunk: Dict[str, np.ndarray], number: int) -> Dict[str, np.ndarray]:
+        if self._spill_path is None:
+            root = None if self._spill_root is None else str(self._spill_root)
+            if root is not None:
+                Path(root).mkdir(parents=True, exist_ok=True)
+            self._spill_path = Path(tempfile.mkdtemp(prefix="detections-", dir=root))
+            weakref.finalize(self, shutil.rmtree, str(self._spill_path), True)
+        spilled = {}
+        for name, col in chunk.items():
+            path = self._spill_path / f"{number:06d}_{name}.npy"
+            np.save(path, col)
+            # r+ so face ids can still be written back after spilling
+            spilled[name] = np.load(path, mmap_mode="r+")
+        return spilled
+
+    def append(self, det: Detection) -> None:
+        self._reserve(1)
+        i = self._n_active
+        a = self._active
+        a["track_id"][i] = det.track_id
+        a["bbox"][i] = det.bbox_xyxy
+        a["confidence"][i] = det.confidence
+        a["class_id"][i] = det.class_id
+        a["frame_index"][i] = det.frame_index
+        a["timestamp"][i] = det.timestamp
+        a["location"][i] = self.locations.intern(det.location)
+        a["face_id"][i] = self.face_ids.intern(det.face_id)
+        self._n_active += 1
+        if self._n_active >= self.chunk_rows:
+            self._seal()
+
+    def extend(self, detections: Iterable[Detection]) -> None:
+        if isinstance(detections, DetectionBatch):
+            self._extend_batch(detections)
+            return
+        if not isinstance(detections, list):
+            detections = list(detections)
+        # Column-wise bulk copies; far cheaper than one append per row
+        start = 0
+        while start < len(detections):
+            take = min(len(detections) - start, self.chunk_rows - self._n_active)
+            rows = detections[start : start + take]
+            self._reserve(take)
+            dst = slice(self._n_active, self._n_active + take)
+            a = self._active
+            a["track_id"][dst] = [d.track_id for d in rows]
+            a["bbox"][dst] = [d.bbox_xyxy for d in rows]
+            a["confidence"][dst] = [d.confidence for d in rows]
+            a["class_id"][dst] = [d.class_id for d in rows]
+            a["frame_index"][dst] = [d.frame_index for d in rows]
+            a["timestamp"][dst] = [d.timestamp for d in rows]
+            a["location"][dst] = [self.locations.intern(d.location) for d in rows]
+            a["face_id"][dst] = [self.face_ids.intern(d.face_id) for d in rows]
+            self._n_active += take
+            start += take
+            if self._n_active >= self.chunk_rows:
+                self._seal()
+
+    def _extend_batch(self, other: DetectionBatch) -> None:
+        # Remap the other batch's interned strings into this batch's tables
+        loc_map = np.array([self.locations.intern(v) for v in other.locations.values] + [-1], dtype=np.int16)
+        face_map = np.array([self.face_ids.intern(v) for v in other.face_ids.values] + [-1], dtype=np.int32)
+        for chunk in other._iter_chunks():
+            n = chunk["track_id"].shape[0]
+            start = 0
+            while start < n:
+                take = min(n - start, self.chunk_rows - self._n_active)
+                self._reserve(take)
+                dst = slice(self._n_active, self._n_active + take)
+                for name, col in chunk.items():
+                    src = col[start : start + take]
+                    if name == "location":
+                        src = loc_map[src]  # -1 indexes the trailing -1
+                    elif name == "face_id":
+                        src = face_map[src]
+                    self._active[name][dst] = src
+                self._n_active += take
+                start += take
+                if self._n_active >= self.chunk_rows:
+                    self._seal()
+
+    def _iter_chunks(self) -> Iterator[Dict[str, np.ndarray]]:
+        yield from self._chunks
+        if self._n_active:
+            yield {name: col[: self._n_active] for name, col in self._active.items()}
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """All rows as contiguous in-memory column arrays."""
+        chunks = list(self._iter_chunks())
+        if not chunks:
+            return {name: col[:0] for name, col in _empty_columns(0).items()}
+        return {name: np.concatenate([c[name] for c in chunks]) for name in COLUMNS}
+
+    def __iter__(self) -> Iterator[Detection]:
+        locations, faces = self.locations.values, self.face_ids.values
+        for chunk in self._iter_chunks():
+            rows = zip(
+                chunk["track_id"].tolist(),
+                chunk["bbox"].tolist(),
+                chunk["confidence"].tolist(),
+                chunk["class_id"].tolist(),
+                chunk["frame_index"].tolist(),
+                chunk["timestamp"].tolist(),
+                chunk["location"].tolist(),
+                chunk["face_id"].tolist(),
+            )
+            for track_id, bbox, conf, cls_id, frame_index, ts, loc, face in rows:
+                yield Detection(
+                    track_id=track_id,
+                    bbox_xyxy=tuple(bbox),
+                    confidence=conf,
+                    class_id=cls_id,
+                    frame_index=frame_index,
+                    timestamp=ts,
+                    location=locations[loc] if loc >= 0 else None,
+                    face_id=faces[face] if face >= 0 else None,
+                )
+
+    def set_face_ids_by_track(self, identities: Dict[int, str]) -> None:
+        """Write a face id onto every row of each given track (vectorized per chunk)."""
+        if not identities:
+            return
+        track_ids = np.fromiter(identities.keys(), dtype=np.int64)
+        face_codes = np.array([self.face_ids.intern(v) for v in identities.values()], dtype=np.int32)
+        order = np.argsort(track_ids)
+        track_ids, face_codes = track_ids[order], face_codes[order]
+        for chunk in self._iter_chunks():
+            pos = np.searchsorted(track_ids, chunk["track_id"])
+            pos = np.clip(pos, 0, len(track_ids) - 1)
+            hit = track_ids[pos] == chunk["track_id"]
+            chunk["face_id"][hit] = face_codes[pos[hit]]
+
+    def nbytes(self) -> int:
+        """Bytes held in memory (spilled chunks excluded)."""
+        total = sum(col.nbytes for col in self._active.values())
+        for chunk in self._chunks:
+            total += sum(col.nbytes for col in chunk.values() if not isinstance(col, np.memmap))
+        return total
+
+    def save(self, path: str | Path) -> None:
+        """Write all rows and string tables to one ``.npz`` file (written atomically)."""
+        path = Path(path)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f,
+                locations=np.array(self.locations.values, dtype=str),
+                face_ids=np.array(self.face_ids.values, dtype=str),
+                **self.columns(),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def from_columns(
+        cls, columns: Dict[str, np.ndarray], locations: Iterable[str] = (), face_ids: Iterable[str] = ()
+    ) -> "DetectionBatch":
+        """Build a batch from whole column arrays (``COLUMNS`` layout, codes into the given string tables)."""
+        batch = cls()
+        for value in locations:
+            batch.locations.intern(value)
+        for value in face_ids:
+            batch.face_ids.intern(value)
+        n = columns["track_id"].shape[0]
+        for start in range(0, n, batch.chunk_rows):
+            stop = min(start + batch.chunk_rows, n)
+            chunk = {name: np.asarray(columns[name][start:stop], dtype=dtype).copy() for name, (dtype, _) in COLUMNS.items()}
+            batch._n_sealed += stop - start
+            if batch.spill_threshold is not None and len(batch) > batch.spill_threshold:
+                chunk = batch._spill(chunk, len(batch._chunks))
+            batch._chunks.append(chunk)
+        return batch
+
+    @classmethod
+    def load(cls, path: str | Path) -> "DetectionBatch":
+        with np.load(path) as data:
+            return cls.from_columns(
+                {name: data[name] for name in COLUMNS}, data["locations"].tolist(), data["face_ids"].tolist()
+            )
+
+    def __getstate__(self) -> dict:
+        # Ship rows by value (e.g. back from a worker process), never the spill files
+        state = self.__dict__.copy()
+        state["_chunks"] = [{name: np.array(col) for name, col in chunk.items()} for chunk in self._chunks]
+        state["_spill_path"] = None
+        return state
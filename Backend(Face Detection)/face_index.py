@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    return vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-6)
+
+
+def _top_k(sims: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest similarities, best first."""
+    k = min(k, sims.shape[0])
+    if k <= 0:
+        return np.empty((0,), dtype=np.int64)
+    if k < sims.shape[0]:
+        top = np.argpartition(-sims, k - 1)[:k]
+    else:
+        top = np.arange(sims.shape[0])
+    return top[np.argsort(-sims[top], kind="stable")]
+
+
+class GalleryIndex(ABC):
+    """Cosine-similarity index over L2-normalized face embeddings.
+
+    ``add`` inserts identities incrementally; ``search`` returns the ids and
+    similarities of the k nearest entries, best first.
+    """
+
+    def __init__(self) -> None:
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._size = 0
+        self.ids: List[str] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[: self._size]
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        vectors = _normalize(vectors)
+        if len(ids) != vectors.shape[0]:
+            raise ValueError("ids and vectors must have the same length")
+        if len(ids) == 0:
+            return
+        needed = self._size + vectors.shape[0]
+        if self._vectors.shape[1] != vectors.shape[1]:
+            if self._size:
+                raise ValueError(f"expected {self._vectors.shape[1]}-d vectors, got {vectors.shape[1]}-d")
+            self._vectors = np.empty((0, vectors.shape[1]), dtype=np.float32)
+        if needed > self._vectors.shape[0]:
+            # Grow geometrically so repeated single inserts stay amortized O(1)
+            capacity = max(needed, 2 * self._vectors.shape[0], 64)
+            grown = np.empty((capacity, vectors.shape[1]), dtype=np.float32)
+            grown[: self._size] = self._vectors[: self._size]
+            self._vectors = grown
+        start = self._size
+        self._vectors[start:needed] = vectors
+        self._size = needed
+        self.ids.extend(str(i) for i in ids)
+        self._on_add(start, needed)
+
+    def _on_add(self, start: int, stop: int) -> None:
+        pass
+
+    @abstractmethod
+    def search(self, query: np.ndarray, k: int = 1) -> Tuple[List[str], np.ndarray]:
+        ...
+
+
+class BruteForceIndex(GalleryIndex):
+    """Exact search: one matrix-vector product over the whole gallery."""
+
+    def search(self, query: np.ndarray, k: int = 1) -> Tuple[List[str], np.ndarray]:
+        if self._size == 0:
+            return [], np.empty((0,), dtype=np.float32)
+        sims = self.vectors @ _normalize(query)[0]
+        top = _top_k(sims, k)
+        return [self.ids[i] for i in top], sims[top]
+
+
+class IVFIndex(GalleryIndex):
+    """Inverted-file index: spherical k-means cells, search only the closest ``n_probe``.
+
+    Raising ``n_probe`` trades speed for recall; ``n_probe == n_lists`` is exact.
+    Until ``train_min_per_list * n_lists`` vectors are present the index searches
+    exhaustively, then it trains itself once. New vectors after training are
+    assigned to their nearest centroid without retraining; call ``train()`` to
+    rebalance after large enrollments.
+    """
+
+    def __init__(
+        self,
+        n_lists: int = 256,
+        n_probe: int = 8,
+        train_min_per_list: int = 8,
+        kmeans_iters: int = 10,
+        seed: int = 0,
+    ) -> None:
+        super().__init__()
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_min_per_list = train_min_per_list
+        self.kmeans_iters = kmeans_iters
+        self._rng = np.random.default_rng(seed)
+        self.centroids: np.ndarray | None = None
+        self._lists: List[List[int]] = []
+        self._list_arrays: List[np.ndarray | None] = []
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def _assign(self, vectors: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        out = np.empty((vectors.shape[0],), dtype=np.int64)
+        for s in range(0, vectors.shape[0], chunk):
+            out[s : s + chunk] = np.argmax(vectors[s : s + chunk] @ self.centroids.T, axis=1)
+        return out
+
+    def train(self) -> None:
+        data = self.vectors
+        n_lists = min(self.n_lists, data.shape[0])
+        if n_lists == 0:
+            return
+        sample_size = min(data.shape[0], n_lists * 64)
+        sample = data[self._rng.choice(data.shape[0], size=sample_size, replace=False)]
+        centroids = sample[self._rng.choice(sample_size, size=n_lists, replace=False)].copy()
+        for _ in range(self.kmeans_iters):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=n_lists)
+            empty = counts == 0
+            # Re-seed empty cells from random samples instead of leaving them dead
+            sums[empty] = sample[self._rng.choice(sample_size, size=int(empty.sum()))]
+            centroids = _normalize(sums)
+        self.centroids = centroids
+        self._lists = [[] for _ in range(n_lists)]
+        self._list_arrays = [None] * n_lists
+        self._on_add(0, self._size)
+
+    def _on_add(self, start: int, stop: int) -> None:
+        if not self.is_trained:
+            if self._size >= self.n_lists * self.train_min_per_list:
+                self.train()
+            return
+        labels = self._assign(self._vectors[start:stop])
+        for offset, label in enumerate(labels.tolist()):
+            self._lists[label].append(start + offset)
+            self._list_arrays[label] = None
+
+    def _list_array(self, label: int) -> np.ndarray:
+        arr = self._list_arrays[label]
+        if arr is None:
+            arr = np.asarray(self._lists[label], dtype=np.int64)
+            self._list_arrays[label] = arr
+        return arr
+
+    def search(self, query: np.ndarray, k: int = 1) -> Tuple[List[str], np.ndarray]:
+        if self._size == 0:
+            return [], np.empty((0,), dtype=np.float32)
+        q = _normalize(query)[0]
+        if not self.is_trained:
+            sims = self.vectors @ q
+            top = _top_k(sims, k)
+            return [self.ids[i] for i in top], sims[top]
+        probes = _top_k(self.centroids @ q, self.n_probe)
+        candidates = np.concatenate([self._list_array(int(p)) for p in probes])
+        if candidates.size == 0:
+            return [], np.empty((0,), dtype=np.float32)
+        sims = self._vectors[candidates] @ q
+        top = _top_k(sims, k)
+        return [self.ids[i] for i in candidates[top]], sims[top]
+
+
+def create_index(index_type: str = "exact", **kwargs) -> GalleryIndex:
+    if index_type in {"exact", "brute_force"}:
+        return BruteForceIndex()
+    if index_type == "ivf":
+        return IVFIndex(**kwargs)
+    raise ValueError(f"Unknown gallery index type: {index_type!r}")
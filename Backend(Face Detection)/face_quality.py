@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .config import FaceConfig
+
+
+class FaceQualityGate:
+    """Cheap pre-filter run on detector output before the embedding model.
+
+    Rejects faces that are too small, too blurred (variance of the Laplacian,
+    as in ``LocationIdentifier.signature_from_frame``) or turned too far
+    away from the camera (yaw/pitch estimated from the five detector keypoints).
+    ``accepted`` and ``rejected`` count decisions so thresholds can be tuned.
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        min_face_size: Optional[int] = None,
+        min_sharpness: Optional[float] = None,
+        max_yaw: Optional[float] = None,
+        max_pitch: Optional[float] = None,
+    ) -> None:
+        self.enabled = FaceConfig.quality_gate_enabled if enabled is None else enabled
+        self.min_face_size = FaceConfig.min_face_size if min_face_size is None else min_face_size
+        self.min_sharpness = FaceConfig.min_face_sharpness if min_sharpness is None else min_sharpness
+        self.max_yaw = FaceConfig.max_face_yaw if max_yaw is None else max_yaw
+        self.max_pitch = FaceConfig.max_face_pitch if max_pitch is None else max_pitch
+        self.accepted = 0
+        self.rejected: Counter[str] = Counter()
+
+    @staticmethod
+    def sharpness(frame_bgr: np.ndarray, bbox_xyxy: Tuple[float, float, float, float]) -> float:
+        x1, y1, x2, y2 = (int(v) for v in bbox_xyxy)
+        h, w = frame_bgr.shape[:2]
+        crop = frame_bgr[max(y1, 0) : min(y2, h), max(x1, 0) : min(x2, w)]
+        if crop.size == 0:
+            return 0.0
+        # Normalise the crop size so the score does not depend on face resolution
+        gray = cv2.cvtColor(cv2.resize(crop, (64, 64), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+    @staticmethod
+    def pose(kps: np.ndarray) -> Tuple[float, float]:
+        """Rough (yaw, pitch) from keypoints: eyes, nose, mouth corners.
+
+        Yaw is the nose's horizontal offset from the eye midpoint in units of
+        eye distance; pitch is how far the nose sits from halfway between the
+        eye and mouth lines (0 = frontal for both).
+        """
+        kps = np.asarray(kps, dtype=np.float32).reshape(5, 2)
+        left_eye, right_eye, nose, left_mouth, right_mouth = kps
+        eye_mid = (left_eye + right_eye) / 2.0
+        mouth_mid = (left_mouth + right_mouth) / 2.0
+        eye_dist = max(float(np.linalg.norm(right_eye - left_eye)), 1e-6)
+        yaw = abs(float(nose[0] - eye_mid[0])) / eye_dist
+        face_height = max(float(mouth_mid[1] - eye_mid[1]), 1e-6)
+        pitch = abs(float(nose[1] - eye_mid[1]) / face_height - 0.5)
+        return yaw, pitch
+
+    def check(
+        self, frame_bgr: np.ndarray, bbox_xyxy: Tuple[float, float, float, float], kps: Optional[np.ndarray]
+    ) -> Optional[str]:
+        """Return the rejection reason, or None if the face may be embedded."""
+        if not self.enabled:
+            return None
+        reason = None
+        x1, y1, x2, y2 = bbox_xyxy
+        if min(x2 - x1, y2 - y1) < self.min_face_size:
+            reason = "too_small"
+        elif kps is not None and self._bad_pose(kps):
+            reason = "pose"
+        elif self.sharpness(frame_bgr, bbox_xyxy) < self.min_sharpness:
+            reason = "blurred"
+        if reason is None:
+            self.accepted += 1
+        else:
+            self.rejected[reason] += 1
+        return reason
+
+    def _bad_pose(self, kps: np.ndarray) -> bool:
+        yaw, pitch = self.pose(kps)
+        return yaw > self.max_yaw or pitch > self.max_pitch
+
+    def stats(self) -> Dict[str, int]:
+        return {"accepted": self.accepted, **{f"rejected_{k}": v for k, v in sorted(self.rejected.items())}}
+
+    def reset(self) -> None:
+        self.accepted = 0
+        self.rejected.clear()
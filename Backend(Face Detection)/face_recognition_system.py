@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 import cv2
@@ -13,7 +14,15 @@ try:
 except Exception:
     FaceAnalysis = None  # type: ignore
 
+try:
+    import onnxruntime as ort
+except Exception:
+    ort = None  # type: ignore
+
 from .config import FaceConfig
+from .face_index import GalleryIndex, create_index
+from .face_quality import FaceQualityGate
+from .utils import assign_faces_to_boxes
 
 
 @dataclass
@@ -23,12 +32,23 @@ class FaceMatch:
     bbox_xyxy: Tuple[int, int, int, int] | None = None
 
 
+@dataclass
+class FaceCandidate:
+    identity: str
+    distance: float
+    confidence: float
+    margin: float  # similarity lead over the next-ranked identity
+
+
 class FaceRecognitionSystem:
     def __init__(self) -> None:
         self.known_faces_dir = FaceConfig.faces_dir
         self.model: FaceAnalysis | None = None
         self.embeddings: dict[str, np.ndarray] = {}
         self.threshold = 0.95  # Very lenient threshold for testing
+        # Gallery of pre-normalized embeddings behind a pluggable search index
+        self.index: GalleryIndex = self._new_index()
+        self.quality_gate = FaceQualityGate()
 
     def load_known_faces(self, faces_dir: str | Path) -> None:
         self.known_faces_dir = Path(faces_dir)
@@ -37,9 +57,12 @@ class FaceRecognitionSystem:
         if FaceAnalysis is None:
             return
 
-        # Initialize InsightFace FaceAnalysis (will download models on first run)
-        self.model = FaceAnalysis(name='buffalo_l')
-        self.model.prepare(ctx_id=-1)  # CPU mode
+        self.model = self._load_face_model()
+
+        cache_path = self.known_faces_dir / FaceConfig.embedding_cache_name
+        cache = self._load_embedding_cache(cache_path)
+        fresh: Dict[str, Tuple[int, int, Optional[np.ndarray]]] = {}
+        embedded = 0
 
         # Build embeddings index
         self.embeddings.clear()
@@ -55,43 +78,138 @@ class FaceRecognitionSystem:
             for img_path in person_dir.glob('*'):
                 if img_path.suffix.lower() not in {'.jpg', '.jpeg', '.png'}:
                     continue
-                img = cv2.imread(str(img_path))
-                if img is None:
-                    continue
-                faces = self.model.get(img)
-                if not faces:
-                    continue
-                face = faces[0]
-                emb = face.normed_embedding
-                if emb is None:
-                    # Align crop if embedding missing
-                    aimg = norm_crop(img, face.kps)
-                    faces2 = self.model.get(aimg)
-                    if not faces2:
-                        continue
-                    emb = faces2[0].normed_embedding
-                    if emb is None:
+                key = img_path.relative_to(self.known_faces_dir).as_posix()
+                stat = img_path.stat()
+                cached = cache.get(key)
+                if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+                    emb = cached[2]
+                else:
+                    img = cv2.imread(str(img_path))
+                    if img is None:
                         continue
+                    emb = self._embed(img)
+                    embedded += 1
+                # Images without a usable face are cached too so they are not retried
+                fresh[key] = (stat.st_size, stat.st_mtime_ns, emb)
+                if emb is None:
+                    continue
                 # Average embeddings for same person
                 if person_id in self.embeddings:
                     self.embeddings[person_id] = (self.embeddings[person_id] + emb) / 2.0
                 else:
                     self.embeddings[person_id] = emb
 
+        if embedded or fresh.keys() != cache.keys():
+            self._save_embedding_cache(cache_path, fresh)
+        self.rebuild_gallery()
+
+    def _load_face_model(self) -> FaceAnalysis:
+        """Build FaceAnalysis with only the configured modules, detector size and ORT session options."""
+        allowed = list(FaceConfig.allowed_modules) if FaceConfig.allowed_modules is not None else None
+        # Initialize InsightFace FaceAnalysis (will download models on first run)
+        model = FaceAnalysis(name=FaceConfig.model_name, allowed_modules=allowed, providers=["CPUExecutionProvider"])
+        model.prepare(ctx_id=-1, det_size=tuple(FaceConfig.det_size), det_thresh=FaceConfig.det_thresh)  # CPU mode
+        options = self._session_options()
+        if options is not None:
+            # insightface does not forward SessionOptions, so re-open the kept models with them
+            for module in model.models.values():
+                module.session = ort.InferenceSession(
+                    module.model_file, sess_options=options, providers=["CPUExecutionProvider"]
+                )
+        return model
+
+    def _session_options(self) -> Optional["ort.SessionOptions"]:
+        if ort is None:
+            return None
+        if not (
+            FaceConfig.ort_intra_op_threads
+            or FaceConfig.ort_inter_op_threads
+            or FaceConfig.ort_execution_mode != "sequential"
+        ):
+            return None
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = FaceConfig.ort_intra_op_threads
+        options.inter_op_num_threads = FaceConfig.ort_inter_op_threads
+        if FaceConfig.ort_execution_mode == "parallel":
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        else:
+            options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return options
+
+    def _load_embedding_cache(self, cache_path: Path) -> Dict[str, Tuple[int, int, Optional[np.ndarray]]]:
+        """Read the on-disk embedding cache; a missing file or a change of model or detector settings yields an empty cache."""
+        if not cache_path.exists():
+            return {}
+        try:
+            with np.load(cache_path, allow_pickle=False) as data:
+                if str(data["key"]) != self._embedding_cache_key():
+                    return {}
+                return {
+                    str(key): (int(size), int(mtime), emb.copy() if ok else None)
+                    for key, size, mtime, ok, emb in zip(
+                        data["paths"], data["sizes"], data["mtimes"], data["has_embedding"], data["embeddings"]
+                    )
+                }
+        except Exception:
+            return {}
+
+    @staticmethod
+    def _embedding_cache_key() -> str:
+        # The detector input size and threshold change which face is found and how it is cropped
+        width, height = FaceConfig.det_size
+        return f"{FaceConfig.model_name}|{width}x{height}|{FaceConfig.det_thresh}"
+
+    def _save_embedding_cache(self, cache_path: Path, entries: Dict[str, Tuple[int, int, Optional[np.ndarray]]]) -> None:
+        keys = sorted(entries)
+        dim = next((e[2].shape[-1] for e in entries.values() if e[2] is not None), 0)
+        embeddings = np.zeros((len(keys), dim), dtype=np.float32)
+        for i, key in enumerate(keys):
+            if entries[key][2] is not None:
+                embeddings[i] = entries[key][2]
+        # Per-process temp name: parallel workers may rewrite the cache at the same time
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("wb") as f:
+            np.savez(
+                f,
+                key=np.array(self._embedding_cache_key()),
+                paths=np.array(keys, dtype=str),
+                sizes=np.array([entries[k][0] for k in keys], dtype=np.int64),
+                mtimes=np.array([entries[k][1] for k in keys], dtype=np.int64),
+                has_embedding=np.array([entries[k][2] is not None for k in keys], dtype=bool),
+                embeddings=embeddings,
+            )
+        tmp_path.replace(cache_path)
+
+    def _new_index(self) -> GalleryIndex:
+        if FaceConfig.index_type == "ivf":
+            return create_index("ivf", n_lists=FaceConfig.ivf_n_lists, n_probe=FaceConfig.ivf_n_probe)
+        return create_index(FaceConfig.index_type)
+
+    def rebuild_gallery(self) -> None:
+        """Re-index ``self.embeddings`` from scratch."""
+        self.index = self._new_index()
+        if not self.embeddings:
+            return
+        ids = list(self.embeddings.keys())
+        mat = np.stack([np.asarray(self.embeddings[i], dtype=np.float32).ravel() for i in ids])
+        self.index.add(ids, mat)
+
+    def enroll(self, person_id: str, embedding: np.ndarray) -> None:
+        """Add one identity without rebuilding the index; re-enrolling an id re-indexes."""
+        if person_id in self.embeddings:
+            self.embeddings[person_id] = (self.embeddings[person_id] + embedding) / 2.0
+            self.rebuild_gallery()
+            return
+        self.embeddings[person_id] = embedding
+        self.index.add([person_id], np.asarray(embedding, dtype=np.float32).reshape(1, -1))
+
     def _cosine_distance(self, a: np.ndarray, b: np.ndarray) -> float:
         a = a / (np.linalg.norm(a) + 1e-6)
         b = b / (np.linalg.norm(b) + 1e-6)
         return 1.0 - float(np.dot(a, b))
 
-    def recognize(self, frame_bgr: np.ndarray, face_bbox: Tuple[int, int, int, int]) -> Optional[FaceMatch]:
-        if self.model is None or not self.embeddings:
-            return None
-        x1, y1, x2, y2 = face_bbox
-        x1, y1 = max(x1, 0), max(y1, 0)
-        x2, y2 = max(x2, x1 + 1), max(y2, y1 + 1)
-        face_img = frame_bgr[y1:y2, x1:x2]
-        if face_img.size == 0:
-            return None
+    def _embed(self, face_img: np.ndarray) -> Optional[np.ndarray]:
         faces = self.model.get(face_img)
         if not faces:
             return None
@@ -103,20 +221,137 @@ class FaceRecognitionSystem:
             if not faces2 or faces2[0].normed_embedding is None:
                 return None
             query_emb = faces2[0].normed_embedding
+        return query_emb
 
-        # Find best match by cosine distance
-        best_id = None
-        best_dist = 1e9
-        for person_id, ref_emb in self.embeddings.items():
-            dist = self._cosine_distance(query_emb, ref_emb)
-            if dist < best_dist:
-                best_dist = dist
-                best_id = person_id
+    def _crop(self, frame_bgr: np.ndarray, face_bbox: Tuple[int, int, int, int]) -> np.ndarray:
+        x1, y1, x2, y2 = face_bbox
+        x1, y1 = max(x1, 0), max(y1, 0)
+        x2, y2 = max(x2, x1 + 1), max(y2, y1 + 1)
+        return frame_bgr[y1:y2, x1:x2]
+
+    def match_embedding(self, query_emb: np.ndarray, k: int = 1) -> List[FaceCandidate]:
+        """Rank gallery identities against one embedding via the gallery index."""
+        if len(self.index) == 0:
+            return []
+        k = max(1, k)
+        # Fetch one extra so the last returned candidate also has a margin
+        ids, sims = self.index.search(query_emb, k + 1)
+        candidates: List[FaceCandidate] = []
+        for rank in range(min(k, len(ids))):
+            sim = float(sims[rank])
+            next_sim = float(sims[rank + 1]) if rank + 1 < len(ids) else 0.0
+            candidates.append(
+                FaceCandidate(
+                    identity=ids[rank],
+                    distance=1.0 - sim,
+                    confidence=float(max(0.0, sim)),
+                    margin=sim - next_sim,
+                )
+            )
+        return candidates
+
+    def recognize_topk(
+        self, frame_bgr: np.ndarray, face_bbox: Tuple[int, int, int, int], k: int = 5
+    ) -> List[FaceCandidate]:
+        if self.model is None or len(self.index) == 0:
+            return []
+        face_img = self._crop(frame_bgr, face_bbox)
+        if face_img.size == 0:
+            return []
+        det_boxes, kpss = self.model.det_model.detect(face_img, max_num=1, metric="default")
+        if det_boxes is None or len(det_boxes) == 0 or kpss is None:
+            return []
+        if self.quality_gate.check(face_img, det_boxes[0, :4], kpss[0]) is not None:
+            return []
+        query_emb = self._embed_aligned([norm_crop(face_img, kpss[0])])[0]
+        return self.match_embedding(query_emb, k)
 
-        if best_id is None or best_dist > self.threshold:
+    def recognize(self, frame_bgr: np.ndarray, face_bbox: Tuple[int, int, int, int]) -> Optional[FaceMatch]:
+        candidates = self.recognize_topk(frame_bgr, face_bbox, k=1)
+        if not candidates:
+            return None
+        best = candidates[0]
+        if best.distance > self.threshold:
             return None
+        return FaceMatch(identity=best.identity, confidence=best.confidence, bbox_xyxy=face_bbox)
+
+    def _embed_aligned(self, aligned: List[np.ndarray]) -> np.ndarray:
+        """Run the recognition ONNX model once on a stack of aligned 112x112 crops."""
+        rec_model = self.model.models["recognition"]
+        try:
+            return np.asarray(rec_model.get_feat(aligned), dtype=np.float32).reshape(len(aligned), -1)
+        except Exception:
+            # Models exported with a fixed batch size of 1 cannot take a stacked blob
+            return np.concatenate([np.asarray(rec_model.get_feat(img), dtype=np.float32).reshape(1, -1) for img in aligned])
 
-        confidence = float(max(0.0, 1.0 - best_dist))
-        return FaceMatch(identity=best_id, confidence=confidence, bbox_xyxy=face_bbox)
+    def recognize_batch(
+        self,
+        frame_bgr: np.ndarray,
+        boxes: Sequence[Tuple[int, int, int, int]],
+        person_boxes: bool = False,
+        active: Sequence[bool] | None = None,
+    ) -> List[Optional[FaceMatch]]:
+        """Recognize faces inside many boxes of one frame.
 
+        Faces are detected once on the whole frame, assigned to the boxes that
+        contain them, aligned, and embedded in a single recognition batch.
+        Returns one match (or None) per box; ``bbox_xyxy`` is the detected face box.
+        Pass ``person_boxes=True`` for whole-body boxes so faces near the top win.
+        Boxes flagged False in ``active`` still claim their faces during
+        assignment but are not embedded and always get None. Faces rejected by
+        ``self.quality_gate`` are not embedded either.
+        """
+        results: List[Optional[FaceMatch]] = [None] * len(boxes)
+        if self.model is None or len(self.index) == 0 or not len(boxes):
+            return results
+        if active is not None and not any(active):
+            return results
+        det_boxes, kpss = self.model.det_model.detect(frame_bgr, max_num=0, metric="default")
+        if det_boxes is None or len(det_boxes) == 0 or kpss is None:
+            return results
+        assignment = assign_faces_to_boxes(det_boxes[:, :4], np.asarray(boxes), prefer_top=person_boxes)
+        matched = [
+            (i, int(f))
+            for i, f in enumerate(assignment.tolist())
+            if f >= 0
+            and (active is None or active[i])
+            and self.quality_gate.check(frame_bgr, det_boxes[f, :4], kpss[f]) is None
+        ]
+        if not matched:
+            return results
+        aligned = [norm_crop(frame_bgr, kpss[f]) for _, f in matched]
+        embeddings = self._embed_aligned(aligned)
+        for (box_i, face_i), emb in zip(matched, embeddings):
+            candidates = self.match_embedding(emb, k=1)
+            if not candidates or candidates[0].distance > self.threshold:
+                continue
+            x1, y1, x2, y2 = det_boxes[face_i, :4].astype(int).tolist()
+            results[box_i] = FaceMatch(
+                identity=candidates[0].identity,
+                confidence=candidates[0].confidence,
+                bbox_xyxy=(x1, y1, x2, y2),
+            )
+        return results
+
+    def recognize_persons(
+        self,
+        frame_bgr: np.ndarray,
+        person_boxes: Sequence[Tuple[int, int, int, int]],
+        active: Sequence[bool] | None = None,
+    ) -> List[Optional[FaceMatch]]:
+        """Recognize the face of each person box according to ``FaceConfig.face_detection_mode``.
 
+        "frame" detects faces once on the whole frame and assigns them to person
+        boxes; "crop" runs ``recognize`` on the top 40% of every person box.
+        Only boxes flagged True in ``active`` (default: all) are recognized.
+        """
+        if FaceConfig.face_detection_mode == "frame":
+            return self.recognize_batch(frame_bgr, person_boxes, person_boxes=True, active=active)
+        matches: List[Optional[FaceMatch]] = []
+        for i, (x1, y1, x2, y2) in enumerate(person_boxes):
+            if active is not None and not active[i]:
+                matches.append(None)
+                continue
+            height = max(0, y2 - y1)
+            matches.append(self.recognize(frame_bgr, (x1, y1, x2, y1 + int(0.4 * height))))
+        return matches
@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import os
+import queue
+import stat
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Iterator, Tuple
+
+import cv2
+import numpy as np
+
+from .config import StreamConfig
+
+_END = object()
+
+NETWORK_PREFIXES = ("rtsp://", "rtsps://", "rtmp://", "http://", "https://", "udp://", "tcp://")
+
+
+@dataclass
+class DecodeStats:
+    frames: int = 0
+    dropped: int = 0
+    decode_s: float = 0.0  # time spent in cap.read() on the decoder thread
+    wait_s: float = 0.0  # time the consumer waited for a decoded frame
+    blocked_s: float = 0.0  # time the decoder waited for space in the queue
+
+
+def skip_frames(cap: cv2.VideoCapture, n: int) -> int:
+    """Advance past ``n`` frames without converting them; returns how many were skipped.
+
+    ``grab`` walks every frame, unlike ``CAP_PROP_POS_FRAMES`` seeks, which
+    can land off by a few frames in some containers.
+    """
+    skipped = 0
+    while skipped < n and cap.grab():
+        skipped += 1
+    return skipped
+
+
+def read_frames(cap: cv2.VideoCapture, stats: DecodeStats, start_frame: int = 0) -> Iterator[Tuple[int, np.ndarray]]:
+    """Synchronous counterpart of ``PrefetchingReader``: decode on the caller's thread."""
+    frame_index = skip_frames(cap, start_frame)
+    try:
+        while True:
+            start = time.perf_counter()
+            ok, frame = cap.read()
+            stats.decode_s += time.perf_counter() - start
+            if not ok:
+                break
+            stats.frames += 1
+            yield frame_index, frame
+            frame_index += 1
+    finally:
+        cap.release()
+
+
+class PrefetchingReader:
+    """Decode a video on a background thread into a bounded queue.
+
+    With ``policy="block"`` the decoder waits when the queue is full (every
+    frame is delivered); with ``policy="drop"`` the oldest queued frame is
+    discarded instead, so a slow consumer always sees recent frames.
+    Frame indices are those of the source, so dropped frames leave gaps.
+    """
+
+    def __init__(
+        self,
+        source: str | Path,
+        depth: int | None = None,
+        policy: str | None = None,
+        start_frame: int = 0,
+    ) -> None:
+        depth = StreamConfig.prefetch_depth if depth is None else depth
+        policy = StreamConfig.prefetch_policy if policy is None else policy
+        if policy not in {"block", "drop"}:
+            raise ValueError(f"Unknown prefetch policy: {policy!r}")
+        self.cap = cv2.VideoCapture(str(source))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.depth = max(1, depth)
+        self.policy = policy
+        self.start_frame = start_frame
+        self.stats = DecodeStats()
+        self._queue: queue.Queue = queue.Queue(maxsize=self.depth)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._decode_loop, name="frame-decoder", daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> None:
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                if self.policy == "drop" and item is not _END:
+                    try:
+                        self._queue.get_nowait()
+                        self.stats.dropped += 1
+                    except queue.Empty:
+                        pass
+        self.stats.blocked_s += time.perf_counter() - start
+
+    def _decode_loop(self) -> None:
+        try:
+            frame_index = skip_frames(self.cap, self.start_frame)
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                ok, frame = self.cap.read()
+                self.stats.decode_s += time.perf_counter() - start
+                if not ok:
+                    break
+                self._put((frame_index, frame))
+                frame_index += 1
+        finally:
+            # The decoder thread owns the capture so it is never released mid-read
+            self.cap.release()
+            self._put(_END)
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        try:
+            while True:
+                start = time.perf_counter()
+                item = self._queue.get()
+                self.stats.wait_s += time.perf_counter() - start
+                if item is _END:
+                    break
+                self.stats.frames += 1
+                yield item
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self._stop.set()
+        # Unblock a decoder stuck on a full queue
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._thread.join(timeout=1.0)
+
+
+def is_network_source(source: str | Path) -> bool:
+    return str(source).lower().startswith(NETWORK_PREFIXES)
+
+
+def is_live_source(source: str | Path) -> bool:
+    """Cameras, not files: stream URLs, webcam indices, /dev/video*, FIFOs and GStreamer pipelines."""
+    s = str(source)
+    if s.isdigit() or is_network_source(s) or s.startswith("/dev/video") or "appsink" in s:
+        return True
+    try:
+        return stat.S_ISFIFO(os.stat(s).st_mode)
+    except OSError:
+        return False
+
+
+def open_capture(source: str | Path) -> cv2.VideoCapture:
+    s = str(source)
+    if s.isdigit():
+        return cv2.VideoCapture(int(s))
+    if "appsink" in s:
+        return cv2.VideoCapture(s, cv2.CAP_GSTREAMER)
+    return cv2.VideoCapture(s)
+
+
+@dataclass
+class LagStats:
+    """End-to-end lag (capture to end of processing) of one live source."""
+
+    processed: int = 0
+    stale: int = 0  # dropped because older than the latency budget when dequeued
+    overflow: int = 0  # dropped by the capture thread because the buffer was full
+    reconnects: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+    recent: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    def record(self, lag_s: float) -> None:
+        self.processed += 1
+        self.total_s += lag_s
+        self.max_s = max(self.max_s, lag_s)
+        self.recent.append(lag_s)
+
+    def summary(self) -> dict:
+        recent = sorted(self.recent)
+        return {
+            "processed": self.processed,
+            "stale": self.stale,
+            "overflow": self.overflow,
+            "reconnects": self.reconnects,
+            "lag_mean_s": self.total_s / self.processed if self.processed else 0.0,
+            "lag_p95_s": recent[int(0.95 * (len(recent) - 1))] if recent else 0.0,
+            "lag_max_s": self.max_s,
+        }
+
+
+class LiveReader:
+    """Capture a live source on a background thread, keeping only fresh frames.
+
+    The capture thread never waits for inference: the buffer holds
+    ``buffer`` frames and the oldest is discarded when it is full. Frames
+    whose age exceeds ``latency_budget_s`` when the consumer dequeues them
+    are dropped as stale. Network sources are reopened after a dropped
+    connection. A regular file is replayed at its native frame rate, which
+    makes it a stand-in camera for testing; a replay begins at
+    ``start_frame``, which live sources ignore. Yields ``(frame_index,
+    capture_time, frame)`` with ``time.monotonic()`` capture times.
+    """
+
+    def __init__(
+        self,
+        source: str | Path,
+        latency_budget_s: float | None = None,
+        buffer: int | None = None,
+        start_frame: int = 0,
+    ) -> None:
+        buffer = StreamConfig.live_buffer if buffer is None else buffer
+        self.source = source
+        self.replay = not is_live_source(source)
+        self.start_frame = start_frame if self.replay else 0
+        self.latency_budget_s = StreamConfig.latency_budget_s if latency_budget_s is None else latency_budget_s
+        self.cap = open_capture(source)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.stats = DecodeStats()
+        self.lag = LagStats()
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, buffer))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._capture_loop, name="live-capture", daemon=True)
+        self._thread.start()
+
+    def _read(self) -> Tuple[bool, np.ndarray | None]:
+        ok, frame = self.cap.read()
+        attempts = StreamConfig.reconnect_attempts if is_network_source(self.source) else 0
+        while not ok and attempts > 0 and not self._stop.is_set():
+            attempts -= 1
+            self.lag.reconnects += 1
+            self.cap.release()
+            time.sleep(StreamConfig.reconnect_delay_s)
+            self.cap = open_capture(self.source)
+            ok, frame = self.cap.read()
+        return ok, frame
+
+    def _capture_loop(self) -> None:
+        try:
+            frame_index = first = skip_frames(self.cap, self.start_frame)
+            start = time.monotonic()
+            while not self._stop.is_set():
+                if self.replay:
+                    # Pace the file like a camera: frame n is not available before n / fps
+                    delay = start + (frame_index - first) / self.fps - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                t0 = time.perf_counter()
+                ok, frame = self._read()
+                self.stats.decode_s += time.perf_counter() - t0
+                if not ok:
+                    break
+                self._offer((frame_index, time.monotonic(), frame))
+                frame_index += 1
+        finally:
+            self.cap.release()
+            self._offer(_END)
+
+    def _offer(self, item) -> None:
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.lag.overflow += 1
+                    self.stats.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def __iter__(self) -> Iterator[Tuple[int, float, np.ndarray]]:
+        try:
+            while True:
+                start = time.perf_counter()
+                item = self._queue.get()
+                self.stats.wait_s += time.perf_counter() - start
+                if item is _END:
+                    break
+                if time.monotonic() - item[1] > self.latency_budget_s:
+                    self.lag.stale += 1
+                    self.stats.dropped += 1
+                    continue
+                self.stats.frames += 1
+                yield item
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self._stop.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._thread.join(timeout=1.0)
@@ -1,17 +1,26 @@
 from __future__ import annotations
 
+import argparse
+import os
+import shutil
+import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 import cv2
 import numpy as np
 
 from .attendance_system import AttendanceSystem
 from .camera_processor import CameraProcessor
-from .config import LOCATION_PATTERNS, VIDEO_FILE_MAPPING
+from .checkpoint import CheckpointStore, VideoProgress
+from .config import LOCATION_PATTERNS, VIDEO_FILE_MAPPING, ReIDConfig, StoreConfig, StreamConfig
+from .detection_store import DetectionBatch
 from .face_recognition_system import FaceRecognitionSystem
+from .frame_source import is_live_source
 from .location_identifier import LocationIdentifier
-from .utils import now_ts, resolve_video_path
+from .parallel import resolve_workers, threads_per_worker, worker_pool
+from .reid import TrackletAppearance, appearance_embedding
+from .utils import Detection, now_ts, resolve_video_path
 
 
 class SNMIMTCampusTracker:
@@ -25,50 +34,138 @@ class SNMIMTCampusTracker:
             "classroom": {"building": "main_engineering_building", "floor": "ground_floor", "type": "classroom_interior"},
         }
 
-    def process_video_with_recognition(self, video_file: str, location: str, face_system: FaceRecognitionSystem, attendance: AttendanceSystem):
-        video_path = resolve_video_path(video_file)
-        detections = self.camera_processor.track_video(str(video_path), location)
+    def process_video_with_recognition(
+        self,
+        video_file: str,
+        location: str,
+        face_system: FaceRecognitionSystem,
+        attendance: AttendanceSystem,
+        checkpoints: CheckpointStore | None = None,
+        appearance: TrackletAppearance | None = None,
+    ):
+        """Track and recognize one video, logging attendance into ``attendance``.
+
+        With ``checkpoints`` the video's progress is saved every
+        ``StoreConfig.checkpoint_interval_s`` and a previous partial pass is
+        resumed; ``attendance`` should then hold this video only, since it is
+        what gets snapshotted. With ``appearance``, each tracked person's
+        ``appearance_embedding`` is sampled every
+        ``ReIDConfig.appearance_every_n`` frames and added to it under
+        ``(location, track_id)``, ready for ``reconstruct_person_journey``.
+        """
+        live = is_live_source(video_file)
+        video_path = video_file if live else resolve_video_path(video_file)
+        if live:
+            checkpoints = None
         
-        print(f"  🔍 Running face recognition on {len(detections)} detections...")
+        print(f"  🔍 Tracking and recognizing in a single pass...")
         
-        # Process face recognition for each detection
-        cap = cv2.VideoCapture(str(video_path))
-        frame_cache = {}
-        recognition_count = 0
+        detections = DetectionBatch()
+        # Gate counts are reported per video; the face system is shared by every video of a worker
+        face_system.quality_gate.reset()
+        progress = checkpoints.progress(video_file) if checkpoints is not None else None
+        # Identities whose track could not be carried over a resume; their first re-confirmation is not logged again
+        already_logged: set[str] = set()
+        if progress is not None:
+            detections.extend(checkpoints.load_segments(video_file, progress))
+            attendance.merge(progress.attendance)
+            if progress.tracker_state is None and progress.identities.tracks:
+                already_logged = {s.identity for s in progress.identities.tracks.values() if s.identity is not None}
+                progress.identities.tracks.clear()
+            progress.writer_part += 1
+            print(f"  ↩️  Resuming at frame {progress.frame_index + 1} ({len(detections)} detections restored)")
+        else:
+            progress = VideoProgress()
+        identities = progress.identities
+        recognition_count = progress.recognition_count
+        since_checkpoint: List[Detection] = []
+        last_checkpoint = time.perf_counter()
+        checkpoint_s, n_checkpoints = 0.0, 0
         
-        for det in detections:
-            frame_idx = det.frame_index
-            if frame_idx not in frame_cache:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-                ok, frame = cap.read()
-                if not ok:
+        # Each decoded frame flows through tracking and recognition before the next is read
+        frames = self.camera_processor.stream_video(
+            video_path, location, start_frame=progress.frame_index + 1, tracker_state=progress.tracker_state,
+            writer_part=progress.writer_part,
+        )
+        for frame, frame_dets in frames:
+            face_dets = []
+            for det in frame_dets:
+                x1, y1, x2, y2 = det.bbox_xyxy
+                if x2 - x1 <= 0 or y2 - y1 <= 0:
                     continue
-                frame_cache[frame_idx] = frame
-            frame = frame_cache[frame_idx]
-
-            x1, y1, x2, y2 = det.bbox_xyxy
-            width = max(0, x2 - x1)
-            height = max(0, y2 - y1)
-            if width == 0 or height == 0:
-                continue
-                
-            # Try to recognize face in the upper portion of person bbox
-            face_box = (x1, y1, x2, y1 + int(0.4 * height))
-            match = face_system.recognize(frame, face_box)
-            
-            if match is not None:
-                det.face_id = match.identity
-                attendance.log_attendance(match.identity, location, now_ts(), match.confidence)
-                recognition_count += 1
-                print(f"    ✅ Recognized: {match.identity} (confidence: {match.confidence:.2f})")
+                face_dets.append(det)
+
+            # Tracks with a confirmed identity skip the face model
+            active = identities.select(face_dets)
+            if any(active):
+                matches = face_system.recognize_persons(frame, [det.bbox_xyxy for det in face_dets], active)
+                for det, match, was_active in zip(face_dets, matches, active):
+                    if not was_active:
+                        continue
+                    if det.track_id < 0 and match is not None:
+                        det.face_id = match.identity
+                    # Attendance is logged once per confirmed track identity, not per frame
+                    if identities.update(det, match):
+                        identity = det.face_id if det.track_id < 0 else identities.identity(det.track_id)
+                        if det.track_id >= 0 and identity in already_logged:
+                            already_logged.discard(identity)
+                            continue
+                        attendance.log_attendance(identity, location, now_ts(), match.confidence)
+                        recognition_count += 1
+                        print(f"    ✅ Recognized: {identity} (confidence: {match.confidence:.2f})")
+            # Label tracked people with their identity so far (the visualization writer keys on it)
+            for det in frame_dets:
+                if det.track_id >= 0:
+                    det.face_id = identities.identity(det.track_id)
+            if appearance is not None:
+                for det in frame_dets:
+                    if det.track_id >= 0 and det.frame_index % max(1, ReIDConfig.appearance_every_n) == 0:
+                        progress.appearance.add(location, det.track_id, appearance_embedding(frame, det.bbox_xyxy))
+            # Stored after recognition so face ids of untracked detections are kept
+            detections.extend(frame_dets)
+
+            if checkpoints is not None:
+                since_checkpoint.extend(frame_dets)
+                if time.perf_counter() - last_checkpoint >= StoreConfig.checkpoint_interval_s:
+                    progress.frame_index = self.camera_processor.frame_index
+                    progress.tracker_state = self.camera_processor.tracker_state()
+                    progress.attendance = attendance.daily_attendance
+                    progress.recognition_count = recognition_count
+                    checkpoint_s += checkpoints.save_progress(video_file, progress, since_checkpoint)
+                    n_checkpoints += 1
+                    since_checkpoint = []
+                    last_checkpoint = time.perf_counter()
         
-        cap.release()
+        identities.propagate(detections)
+        if appearance is not None:
+            appearance.merge(progress.appearance)
+        track_ids = detections.columns()["track_id"]
+        unique_tracks = np.unique(track_ids[track_ids >= 0])
+        print(f"  📊 Unique people tracked: {len(unique_tracks)}")
+        print(f"  📊 Total detections: {len(detections)}")
+        t = self.camera_processor.timings
+        if t:
+            print(f"  ⏱️  decode {t['decode_s']:.1f}s, processing {t['process_s']:.1f}s, wall {t['wall_s']:.1f}s")
+            if "lag_mean_s" in t:
+                print(
+                    f"  📡 {location} lag: mean {t['lag_mean_s'] * 1000:.0f}ms, p95 {t['lag_p95_s'] * 1000:.0f}ms, "
+                    f"max {t['lag_max_s'] * 1000:.0f}ms; dropped {t['stale']} stale + {t['overflow']} overflow, "
+                    f"{t['reconnects']} reconnects"
+                )
+        self.camera_processor.print_detector_stats(location)
+        if n_checkpoints:
+            share = checkpoint_s / t["wall_s"] if t.get("wall_s") else 0.0
+            print(f"  💾 {n_checkpoints} checkpoints, {checkpoint_s:.2f}s ({share:.1%} of wall time)")
+        print(f"  🧮 Face model runs: {identities.recognitions}, skipped via track identity: {identities.skipped}")
+        print(f"  🧪 Face quality gate: {face_system.quality_gate.stats()}")
         
         if recognition_count > 0:
             print(f"  🎯 Total recognitions: {recognition_count}")
         else:
             print(f"  ⚠️  No faces recognized in this video")
-            
+
+        if checkpoints is not None:
+            checkpoints.mark_done(video_file, len(detections), attendance.daily_attendance)
         return detections
 
 
@@ -97,12 +194,116 @@ def discover_video_files() -> List[str]:
     return ordered
 
 
-def run_all_videos() -> None:
-    tracker = SNMIMTCampusTracker(campus_image=str(Path("data/campus_aerial.jpg")))
+# Per-process state of pool workers, loaded once by _init_video_worker
+_worker_state: Dict[str, object] = {}
+
+
+# Config classes the command line can override; spawned workers get a copy of their settings
+_CLI_CONFIGS = (StreamConfig, StoreConfig)
+
+
+def _cli_settings() -> List[Dict[str, object]]:
+    return [{k: v for k, v in vars(cls).items() if not k.startswith("_")} for cls in _CLI_CONFIGS]
+
+
+def _init_video_worker(faces_dir: str, settings: List[Dict[str, object]]) -> None:
+    # Spawned workers re-import config, so command-line overrides are re-applied here
+    for cls, values in zip(_CLI_CONFIGS, settings):
+        for name, value in values.items():
+            setattr(cls, name, value)
+    _worker_state["tracker"] = SNMIMTCampusTracker()
     face_system = FaceRecognitionSystem()
-    face_system.load_known_faces("faces/")
+    face_system.load_known_faces(faces_dir)
+    _worker_state["face_system"] = face_system
+
+
+def _process_video_task(task: Tuple[str, str, CheckpointStore | None]) -> Tuple[str, int, Dict[str, Dict[str, dict]]]:
+    video_file, location, checkpoints = task
     attendance = AttendanceSystem()
+    print(f"Processing {video_file} (location: {location}) in worker {os.getpid()}...")
+    detections = _worker_state["tracker"].process_video_with_recognition(
+        video_file, location, _worker_state["face_system"], attendance, checkpoints
+    )
+    return video_file, len(detections), attendance.daily_attendance
+
 
+def process_videos(
+    video_files: List[str], workers: int | None = None, locations: Dict[str, str] | None = None
+) -> Tuple[AttendanceSystem, int]:
+    """Process videos serially or on a pool of worker processes; returns merged attendance and detection count.
+
+    ``locations`` maps a source to its location; sources not in it are
+    identified from their file name. With ``StoreConfig.checkpoint_enabled``
+    videos finished by an interrupted run are taken from its checkpoints
+    and a partly processed video resumes where it stopped.
+    """
+    locations = locations or {}
+    attendance = AttendanceSystem()
+    total_detections = 0
+    checkpoints = CheckpointStore(video_files) if StoreConfig.checkpoint_enabled else None
+
+    tasks = []
+    for video_file in video_files:
+        done = checkpoints.done(video_file) if checkpoints is not None else None
+        if done is not None:
+            n_detections, daily = done
+            attendance.merge(daily)
+            total_detections += n_detections
+            print(f"  ✓ {video_file}: {n_detections} people detected (from checkpoint)")
+            continue
+        tasks.append((video_file, locations.get(video_file) or identify_video_location(video_file), checkpoints))
+    workers = min(resolve_workers(workers), len(tasks))
+
+    if tasks and workers <= 1:
+        tracker = SNMIMTCampusTracker(campus_image=str(Path("data/campus_aerial.jpg")))
+        face_system = FaceRecognitionSystem()
+        face_system.load_known_faces("faces/")
+        for video_file, location, _ in tasks:
+            print(f"Processing {video_file} (location: {location})...")
+            # Per-video attendance, so a checkpoint snapshots this video only
+            video_attendance = AttendanceSystem()
+            detections = tracker.process_video_with_recognition(
+                video_file, location, face_system, video_attendance, checkpoints
+            )
+            attendance.merge(video_attendance.daily_attendance)
+            total_detections += len(detections)
+            print(f"  ✓ {len(detections)} people detected")
+    elif tasks:
+        print(f"Using {workers} worker processes, {threads_per_worker(workers)} threads each")
+        with worker_pool(workers, _init_video_worker, ("faces/", _cli_settings())) as pool:
+            # chunksize=1: idle workers pull the next video as soon as they finish one
+            for video_file, n_detections, daily in pool.imap_unordered(_process_video_task, tasks, chunksize=1):
+                attendance.merge(daily)
+                total_detections += n_detections
+                print(f"  ✓ {video_file}: {n_detections} people detected")
+
+    if checkpoints is not None:
+        checkpoints.clear()
+    return attendance, total_detections
+
+
+def run_live(sources: Dict[str, str], workers: int | None = None) -> None:
+    """Process live cameras ({source: location}) until they end or Ctrl-C; one worker per camera at least."""
+    # Files given as sources stand in for cameras
+    StreamConfig.replay_realtime = True
+    # A worker reads its camera until the stream ends, so fewer workers than cameras would leave some unread
+    if workers is not None and 0 < workers < len(sources):
+        print(f"Using {len(sources)} workers instead of {workers}: each live source needs its own")
+    workers = max(workers or 0, len(sources))
+    print(f"Streaming {len(sources)} live sources (latency budget {StreamConfig.latency_budget_s:.2f}s):")
+    for source, location in sources.items():
+        print(f"  - {location}: {source}")
+    try:
+        attendance, total_detections = process_videos(list(sources), workers, sources)
+    except KeyboardInterrupt:
+        print("\nStopped.")
+        return
+    print(f"\nTotal people detected: {total_detections}")
+    for date, people in attendance.generate_attendance_report().items():
+        print(f"Date: {date}: {', '.join(people)}")
+
+
+def run_all_videos(workers: int | None = None) -> None:
     video_files = discover_video_files()
     if not video_files:
         print("No video files found in data/ folder or current directory!")
@@ -114,17 +315,14 @@ def run_all_videos() -> None:
         print(f"  - {vf}")
     print()
 
-    total_detections = 0
-    for video_file in video_files:
-        location = identify_video_location(video_file)
-        print(f"Processing {video_file} (location: {location})...")
-        detections = tracker.process_video_with_recognition(video_file, location, face_system, attendance)
-        total_detections += len(detections)
-        print(f"  ✓ {len(detections)} people detected")
+    start = time.perf_counter()
+    attendance, total_detections = process_videos(video_files, workers)
+    elapsed = time.perf_counter() - start
 
     print(f"\n=== Processing Complete ===")
     print(f"Total videos processed: {len(video_files)}")
     print(f"Total people detected: {total_detections}")
+    print(f"Wall time: {elapsed:.1f}s")
 
     daily_report = attendance.generate_attendance_report()
     principal_tracking = attendance.get_principal_tracking()
@@ -143,7 +341,51 @@ def run_all_videos() -> None:
         print(f"  Visited: {movements['locations_visited']}")
 
 
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Process campus camera videos")
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="worker processes (default: ParallelConfig.workers; 0 = one per CPU core)",
+    )
+    parser.add_argument(
+        "--live", action="append", default=[], metavar="LOCATION=SOURCE",
+        help="stream a camera (RTSP/HTTP URL, webcam index, /dev/video*, FIFO or file); repeatable",
+    )
+    parser.add_argument(
+        "--replay", action="store_true",
+        help="replay files at their native frame rate, as if they were cameras",
+    )
+    parser.add_argument("--latency-budget", type=float, default=None, help="seconds; stale frames are dropped")
+    parser.add_argument("--refresh-cache", action="store_true", help="recompute cached tracking results")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the tracking cache")
+    parser.add_argument("--fresh", action="store_true", help="discard checkpoints of an interrupted run and start over")
+    parser.add_argument("--no-checkpoint", action="store_true", help="do not write checkpoints")
+    args = parser.parse_args(argv)
+    if args.fresh:
+        shutil.rmtree(StoreConfig.checkpoint_dir, ignore_errors=True)
+    if args.no_checkpoint:
+        StoreConfig.checkpoint_enabled = False
+    if args.refresh_cache:
+        StoreConfig.tracking_cache_refresh = True
+    if args.no_cache:
+        StoreConfig.tracking_cache = False
+    if args.replay:
+        StreamConfig.replay_realtime = True
+    if args.latency_budget is not None:
+        StreamConfig.latency_budget_s = args.latency_budget
+    if args.live:
+        sources = {}
+        for spec in args.live:
+            location, sep, source = spec.partition("=")
+            if not sep:
+                parser.error(f"--live expects LOCATION=SOURCE, got {spec!r}")
+            sources[source] = location
+        run_live(sources, workers=args.workers)
+        return
+    run_all_videos(workers=args.workers)
+
+
 if __name__ == "__main__":
-    run_all_videos()
+    main()
 
 
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import Callable, Dict, List
+
+import cv2
+import numpy as np
+
+from .config import StreamConfig
+from .utils import Detection
+
+
+class MotionGate:
+    """Decide per frame whether the person detector has to run.
+
+    The motion score is the fraction of pixels that changed by more than
+    ``pixel_delta`` between a downscaled, blurred grayscale copy of the
+    frame and the one the detector last saw. The detector runs when the
+    score reaches ``threshold`` or when the stride limit is hit:
+    ``max_stride`` frames for an empty scene, ``active_stride`` while people
+    are being tracked.
+    """
+
+    def __init__(
+        self,
+        threshold: float | None = None,
+        pixel_delta: int | None = None,
+        max_stride: int | None = None,
+        active_stride: int | None = None,
+        width: int | None = None,
+    ) -> None:
+        max_stride = StreamConfig.max_stride if max_stride is None else max_stride
+        active_stride = StreamConfig.active_stride if active_stride is None else active_stride
+        self.threshold = StreamConfig.motion_threshold if threshold is None else threshold
+        self.pixel_delta = StreamConfig.motion_pixel_delta if pixel_delta is None else pixel_delta
+        self.max_stride = max(1, max_stride)
+        self.active_stride = max(1, active_stride)
+        self.width = StreamConfig.motion_width if width is None else width
+        self._reference: np.ndarray | None = None
+        self._since_detect = 0
+        self.detected = 0
+        self.skipped = 0
+
+    def _small(self, frame_bgr: np.ndarray) -> np.ndarray:
+        h, w = frame_bgr.shape[:2]
+        size = (self.width, max(1, int(h * self.width / max(w, 1))))
+        # INTER_LINEAR is ~30x cheaper than INTER_AREA here; the blur absorbs the aliasing
+        gray = cv2.cvtColor(cv2.resize(frame_bgr, size, interpolation=cv2.INTER_LINEAR), cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def motion_score(self, small: np.ndarray) -> float:
+        if self._reference is None or self._reference.shape != small.shape:
+            return 1.0
+        return float(np.count_nonzero(cv2.absdiff(small, self._reference) > self.pixel_delta)) / small.size
+
+    def should_detect(self, frame_bgr: np.ndarray, has_tracks: bool | Callable[[], bool]) -> bool:
+        """``has_tracks`` may be a callable, asked only when motion alone does not decide."""
+        small = self._small(frame_bgr)
+        self._since_detect += 1
+        detect = self.motion_score(small) >= self.threshold
+        if not detect and self._since_detect >= min(self.active_stride, self.max_stride):
+            tracked = has_tracks() if callable(has_tracks) else has_tracks
+            detect = self._since_detect >= (self.active_stride if tracked else self.max_stride)
+        if detect:
+            self._reference = small
+            self._since_detect = 0
+            self.detected += 1
+            return True
+        self.skipped += 1
+        return False
+
+
+class TrackCarrier:
+    """Carry the last detections through frames the detector skipped.
+
+    Boxes are moved with each track's constant per-frame velocity estimated
+    from its last two observations (``use_velocity=False`` keeps them still,
+    for detections without real track ids).
+    """
+
+    def __init__(self, use_velocity: bool = True) -> None:
+        self.use_velocity = use_velocity
+        self.last: Dict[int, Detection] = {}
+        self.velocity: Dict[int, np.ndarray] = {}
+
+    def observe(self, detections: List[Detection]) -> None:
+        current: Dict[int, Detection] = {}
+        velocity: Dict[int, np.ndarray] = {}
+        for i, det in enumerate(detections):
+            # Untracked detections (id -1) get distinct negative keys
+            key = det.track_id if det.track_id >= 0 else -1 - i
+            prev = self.last.get(key)
+            if self.use_velocity and det.track_id >= 0 and prev is not None and det.frame_index > prev.frame_index:
+                steps = det.frame_index - prev.frame_index
+                velocity[det.track_id] = (np.asarray(det.bbox_xyxy, dtype=np.float32) - np.asarray(prev.bbox_xyxy, dtype=np.float32)) / steps
+            current[key] = det
+        self.last = current
+        self.velocity = velocity
+
+    def predict(self, frame_index: int, timestamp: float) -> List[Detection]:
+        predicted: List[Detection] = []
+        for key, det in self.last.items():
+            bbox = det.bbox_xyxy
+            v = self.velocity.get(key)
+            if v is not None:
+                moved = np.asarray(bbox, dtype=np.float32) + v * (frame_index - det.frame_index)
+                bbox = tuple(int(round(c)) for c in moved.tolist())
+            predicted.append(replace(det, bbox_xyxy=bbox, frame_index=frame_index, timestamp=timestamp, face_id=None))
+        return predicted
+
+    def __bool__(self) -> bool:
+        return bool(self.last)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except Exception:
+    ort = None  # type: ignore
+
+from .config import ModelConfig
+
+Box = Tuple[Tuple[int, int, int, int], float, int]
+
+# Grey YOLO pads letterboxed images with
+PAD_VALUE = 114
+
+
+def letterbox(frame_bgr: np.ndarray, size: int) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """Resize keeping the aspect ratio and pad to ``size`` x ``size``; returns (image, scale, (pad_x, pad_y))."""
+    h, w = frame_bgr.shape[:2]
+    scale = min(size / h, size / w)
+    nh, nw = int(round(h * scale)), int(round(w * scale))
+    resized = cv2.resize(frame_bgr, (nw, nh), interpolation=cv2.INTER_LINEAR) if (nh, nw) != (h, w) else frame_bgr
+    pad_x, pad_y = (size - nw) // 2, (size - nh) // 2
+    out = np.full((size, size, 3), PAD_VALUE, dtype=np.uint8)
+    out[pad_y : pad_y + nh, pad_x : pad_x + nw] = resized
+    return out, scale, (pad_x, pad_y)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy non-maximum suppression over xyxy boxes; returns kept indices by descending score."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep: List[int] = []
+    while order.size:
+        i = order[0]
+        keep.append(int(i))
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+class OnnxPersonDetector:
+    """YOLOv8 person detector run directly on onnxruntime, without torch or ultralytics.
+
+    Expects the standard YOLOv8 export: input ``(N, 3, S, S)`` RGB in
+    [0, 1], output ``(N, 4 + classes, anchors)`` with cxcywh boxes. Models
+    exported with a fixed batch of 1 are run one frame at a time; with a
+    fixed input size the per-camera ``imgsz`` is ignored.
+    """
+
+    def __init__(
+        self,
+        model_path: str | Path,
+        conf: Optional[float] = None,
+        iou: Optional[float] = None,
+        imgsz: Optional[int] = None,
+    ) -> None:
+        imgsz = ModelConfig.onnx_imgsz if imgsz is None else imgsz
+        if ort is None:
+            raise RuntimeError("onnxruntime is not installed")
+        self.model_path = Path(model_path)
+        self.conf = ModelConfig.conf_threshold if conf is None else conf
+        self.iou = ModelConfig.iou_threshold if iou is None else iou
+        self.session = ort.InferenceSession(
+            str(self.model_path), sess_options=self._session_options(), providers=["CPUExecutionProvider"]
+        )
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        batch, _, height, _ = inp.shape
+        self.fixed_batch = isinstance(batch, int)
+        self.fixed_size = height if isinstance(height, int) else None
+        self.imgsz = self.fixed_size or imgsz
+
+    @staticmethod
+    def _session_options() -> "ort.SessionOptions":
+        options = ort.SessionOptions()
+        if ModelConfig.onnx_threads > 0:
+            options.intra_op_num_threads = ModelConfig.onnx_threads
+            options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return options
+
+    @classmethod
+    def load(cls) -> "OnnxPersonDetector":
+        """Open ``onnx_weights_path()``, exporting (and quantizing) ``yolo_weights`` first if it is missing."""
+        path = onnx_weights_path()
+        if not path.exists():
+            export_onnx(ModelConfig.yolo_weights, path, int8=ModelConfig.onnx_int8)
+        return cls(path)
+
+    def input_size(self, imgsz: Optional[int] = None) -> int:
+        """Side of the square input frames are letterboxed to."""
+        if self.fixed_size or not imgsz:
+            return self.imgsz
+        return max(32, int(round(imgsz / 32)) * 32)
+
+    def detect(self, frames: List[np.ndarray], imgsz: Optional[int] = None, conf: Optional[float] = None) -> List[List[Box]]:
+        """Person boxes per frame scoring at least ``conf`` (default ``self.conf``), in frame pixel coordinates."""
+        conf = self.conf if conf is None else conf
+        if not frames:
+            return []
+        size = self.input_size(imgsz)
+        prepared = [letterbox(f, size) for f in frames]
+        # BGR HWC uint8 -> RGB CHW float in [0, 1]
+        blob = np.stack([img for img, _, _ in prepared])[..., ::-1].transpose(0, 3, 1, 2)
+        blob = np.ascontiguousarray(blob, dtype=np.float32) / 255.0
+        if self.fixed_batch:
+            outputs = np.concatenate([self.session.run(None, {self.input_name: blob[i : i + 1]})[0] for i in range(len(frames))])
+        else:
+            outputs = self.session.run(None, {self.input_name: blob})[0]
+        return [
+            self._postprocess(out, scale, pad, frame.shape[:2], conf)
+            for out, (_, scale, pad), frame in zip(outputs, prepared, frames)
+        ]
+
+    def _postprocess(
+        self, out: np.ndarray, scale: float, pad: Tuple[int, int], shape: Tuple[int, int], conf: float
+    ) -> List[Box]:
+        scores = out[4 + ModelConfig.person_class_id]
+        keep = scores >= conf
+        if not keep.any():
+            return []
+        cx, cy, w, h = out[:4, keep]
+        scores = scores[keep]
+        boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+        order = nms(boxes, scores, self.iou)[: ModelConfig.max_detections_per_frame]
+        boxes = (boxes[order] - (pad[0], pad[1], pad[0], pad[1])) / scale
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, shape[1])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, shape[0])
+        return [
+            (tuple(int(v) for v in box), float(score), ModelConfig.person_class_id)
+            for box, score in zip(boxes.tolist(), scores[order].tolist())
+        ]
+
+
+def onnx_weights_path() -> Path:
+    """The model file the ONNX backend runs: ``onnx_weights``, or its ``-int8`` sibling with ``onnx_int8``."""
+    path = Path(ModelConfig.onnx_weights)
+    if ModelConfig.onnx_int8:
+        path = path.with_name(f"{path.stem}-int8{path.suffix}")
+    return path
+
+
+def export_onnx(weights: str | Path, output: str | Path, int8: bool = False) -> Path:
+    """Export YOLO weights to ONNX with a dynamic batch/size (needs ultralytics once), optionally int8-quantized."""
+    from ultralytics import YOLO
+
+    output = Path(output)
+    exported = Path(YOLO(str(weights)).export(format="onnx", dynamic=True, simplify=True, imgsz=ModelConfig.onnx_imgsz))
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(str(exported), str(output), weight_type=QuantType.QUInt8)
+    elif exported.resolve() != output.resolve():
+        exported.replace(output)
+    return output
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Sequence
+
+import cv2
+
+from .config import FaceConfig, ModelConfig, ParallelConfig
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    workers = ParallelConfig.workers if workers is None else workers
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def threads_per_worker(workers: int) -> int:
+    if ParallelConfig.threads_per_worker > 0:
+        return ParallelConfig.threads_per_worker
+    return max(1, (os.cpu_count() or 1) // max(workers, 1))
+
+
+def limit_threads(n_threads: int) -> None:
+    """Cap torch, OpenCV and onnxruntime thread pools in the current process."""
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(n_threads)
+    cv2.setNumThreads(n_threads)
+    try:
+        import torch
+
+        torch.set_num_threads(n_threads)
+    except Exception:
+        pass
+    # Picked up by FaceRecognitionSystem and OnnxPersonDetector when they open their ONNX sessions
+    FaceConfig.ort_intra_op_threads = n_threads
+    FaceConfig.ort_inter_op_threads = 1
+    ModelConfig.onnx_threads = n_threads
+
+
+@contextmanager
+def worker_pool(
+    workers: int, initializer: Callable[..., None], initargs: Sequence = ()
+) -> Iterator[mp.pool.Pool]:
+    """Spawn a pool whose workers each run ``initializer`` once with capped thread counts.
+
+    The thread environment variables are set before the workers start so
+    libraries read them at import time; ``limit_threads`` is applied again
+    inside each worker for libraries that only honour runtime calls.
+    """
+    n_threads = threads_per_worker(workers)
+    saved = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(n_threads)
+    try:
+        ctx = mp.get_context("spawn")
+        with ctx.Pool(workers, initializer=_init_worker, initargs=(n_threads, initializer, tuple(initargs))) as pool:
+            yield pool
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def _init_worker(n_threads: int, initializer: Callable[..., None], initargs: tuple) -> None:
+    limit_threads(n_threads)
+    initializer(*initargs)
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+import heapq
+import math
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
-from .config import TRAVEL_TIME_SECONDS
+import numpy as np
+
+from .campus_map import load_travel_times
+from .config import ReIDConfig
+from .reid import ReIDEngine, TrackletAppearance, window_start
+from .tracklets import FaceVotes, Tracklet, build_tracklets
 from .utils import Detection
 
 
@@ -16,11 +23,18 @@ class JourneySegment:
     confidence: float
 
 
+# Minimum confidence of a transition before it becomes a journey segment
+MIN_TRANSITION_SCORE = 0.4
+# Clock seconds between scans for closed tracklets and stale state in JourneyEngine
+MAINTENANCE_INTERVAL_S = 1.0
+
+
 class CrossCameraReIdentifier:
     def __init__(self) -> None:
         # map of global_id to last known appearance
         self.global_id_counter = 0
         self.track_to_global: Dict[str, int] = {}
+        self.travel = load_travel_times()
 
     def _key(self, camera: str, track_id: int) -> str:
         return f"{camera}:{track_id}"
@@ -28,18 +42,20 @@ class CrossCameraReIdentifier:
     def correlate(self, prev: Detection, curr: Detection) -> float:
         # simple appearance-free temporal rule: check time between camera pairs
         if prev.location and curr.location:
-            travel = TRAVEL_TIME_SECONDS.get((prev.location, curr.location))
-            if travel is None:
-                # allow transitions inside same area types
-                return 0.2
-            dt = curr.timestamp - prev.timestamp
-            # Score higher if dt close to expected travel
-            if dt <= 0:
-                return 0.0
-            ratio = abs(dt - travel) / max(travel, 1e-3)
-            return max(0.0, 1.0 - ratio)
+            return self.transition_score(prev.location, curr.location, curr.timestamp - prev.timestamp)
         return 0.0
 
+    def transition_score(self, from_location: str, to_location: str, dt: float) -> float:
+        travel = self.travel.lookup(from_location, to_location)
+        if travel is None:
+            # allow transitions inside same area types
+            return 0.2
+        # Score higher if dt close to expected travel
+        if dt <= 0:
+            return 0.0
+        ratio = abs(dt - travel) / max(travel, 1e-3)
+        return max(0.0, 1.0 - ratio)
+
     def assign_global_id(self, camera: str, track_id: int) -> int:
         key = self._key(camera, track_id)
         if key not in self.track_to_global:
@@ -48,39 +64,184 @@ class CrossCameraReIdentifier:
         return self.track_to_global[key]
 
 
-def reconstruct_person_journey(detections_by_camera: Dict[str, List[Detection]]) -> Dict[int, List[JourneySegment]]:
-    # Flatten and sort by time
-    all_dets: List[Tuple[str, Detection]] = []
-    for cam, dets in detections_by_camera.items():
-        for d in dets:
-            d.location = cam
-            all_dets.append((cam, d))
-    all_dets.sort(key=lambda x: x[1].timestamp)
+def reconstruct_person_journey(
+    detections_by_camera: Dict[str, Iterable[Detection]], embeddings: Optional[TrackletAppearance] = None
+) -> Dict[int, List[JourneySegment]]:
+    """Journeys per global id, built on tracklets rather than individual detections.
+
+    Each ``(camera, track_id)`` is first collapsed into one ``Tracklet``, so
+    the work scales with the number of tracks, not detections. The camera
+    key is used as the location; detections are left untouched. Appearance
+    embeddings collected per track, as ``process_video_with_recognition``
+    does when given a ``TrackletAppearance``, are attached before linking.
+    """
+    tracklets = build_tracklets(detections_by_camera)
+    if embeddings is not None:
+        embeddings.attach(tracklets)
+    return reconstruct_journeys_from_tracklets(tracklets)
 
+
+def reconstruct_journeys_from_tracklets(
+    tracklets: List[Tracklet], engine: Optional[ReIDEngine] = None
+) -> Dict[int, List[JourneySegment]]:
+    """A transition runs from one tracklet's exit to the next tracklet's entry of the same global id.
+
+    Global ids come from ``ReIDEngine``, which links tracklets across cameras.
+    """
+    engine = engine or ReIDEngine()
     reid = CrossCameraReIdentifier()
-    last_by_global: Dict[int, Detection] = {}
+    tracklets = sorted(tracklets, key=lambda t: t.start_time)
+    last_by_global: Dict[int, Tracklet] = {}
     journeys: Dict[int, List[JourneySegment]] = {}
 
-    for cam, det in all_dets:
-        global_id = reid.assign_global_id(cam, det.track_id)
+    for tracklet, global_id in zip(tracklets, engine.assign(tracklets)):
         if global_id not in journeys:
             journeys[global_id] = []
 
         prev = last_by_global.get(global_id)
-        if prev is not None and prev.location and det.location:
-            conf = reid.correlate(prev, det)
-            if conf > 0.4:  # threshold for accepting a transition
-                journeys[global_id].append(
-                    JourneySegment(
-                        from_location=prev.location,
-                        to_location=det.location,
-                        start_time=prev.timestamp,
-                        end_time=det.timestamp,
-                        confidence=conf,
-                    )
-                )
-        last_by_global[global_id] = det
+        if prev is not None:
+            segment = _transition(reid, prev, tracklet)
+            if segment is not None:
+                journeys[global_id].append(segment)
+        last_by_global[global_id] = tracklet
 
     return journeys
 
 
+def _transition(reid: CrossCameraReIdentifier, prev: Tracklet, tracklet: Tracklet) -> Optional[JourneySegment]:
+    conf = reid.transition_score(prev.camera, tracklet.camera, tracklet.start_time - prev.end_time)
+    if conf <= MIN_TRANSITION_SCORE:
+        return None
+    return JourneySegment(
+        from_location=prev.camera,
+        to_location=tracklet.camera,
+        start_time=prev.end_time,
+        end_time=tracklet.start_time,
+        confidence=conf,
+    )
+
+
+class JourneyEngine:
+    """Online journey reconstruction for live cameras, in bounded memory.
+
+    Detections are fed as they arrive (complete tracklets can be fed too).
+    A camera track becomes a tracklet once it has not been seen for
+    ``ReIDConfig.tracklet_timeout_s``. Tracklets are handed to the
+    ``ReIDEngine`` in entry order, whole ReID windows at a time, and no
+    tracklet is linked before a track that entered earlier and is still
+    open, so the segments are those ``reconstruct_journeys_from_tracklets``
+    finds for the same tracklets. Each is returned as
+    ``(global_id, JourneySegment)`` by the call that completes it. Time is
+    the latest timestamp seen. A person unseen for the ReID engine's
+    ``max_gap_s`` before the oldest pending entry cannot start another
+    segment, so their state is dropped then. Closed tracklets wait for
+    the open tracks that entered before them, so a track open longer than
+    ``ReIDConfig.max_open_track_s`` is closed and continued as a new
+    tracklet of the same camera track; memory then stays flat however long
+    the run. Untracked detections (id -1) are ignored.
+    """
+
+    def __init__(self, reid: Optional[ReIDEngine] = None) -> None:
+        self.reid = reid or ReIDEngine()
+        self.scorer = CrossCameraReIdentifier()
+        self.clock = -math.inf
+        self.open_tracks: Dict[Tuple[str, int], Tracklet] = {}
+        self._faces: Dict[Tuple[str, int], FaceVotes] = {}
+        self._embeddings: Dict[Tuple[str, int], np.ndarray] = {}
+        self._closed: List[Tuple[float, int, Tracklet]] = []  # heap by entry time
+        self._pushed = 0
+        self.last_by_global: Dict[int, Tracklet] = {}
+        self._next_maintenance = -math.inf
+
+    def add_detections(
+        self, detections: Iterable[Detection], embeddings: Optional[Sequence[Optional[np.ndarray]]] = None
+    ) -> List[Tuple[int, JourneySegment]]:
+        """Extend the open tracks; ``embeddings``, if given, has one appearance vector (or None) per detection."""
+        for i, d in enumerate(detections):
+            if d.track_id < 0 or not d.location:
+                continue
+            key = (d.location, d.track_id)
+            t = self.open_tracks.get(key)
+            if t is None:
+                self.open_tracks[key] = Tracklet(
+                    d.location, d.track_id, d.timestamp, d.timestamp, d.frame_index, d.frame_index, 1,
+                    d.bbox_xyxy, d.confidence,
+                )
+                self._faces[key] = FaceVotes()
+            else:
+                t.n_detections += 1
+                if d.timestamp < t.start_time:
+                    t.start_time, t.start_frame = d.timestamp, d.frame_index
+                if d.timestamp > t.end_time:
+                    t.end_time, t.end_frame = d.timestamp, d.frame_index
+                if d.confidence > t.confidence:
+                    t.confidence, t.bbox_xyxy = d.confidence, d.bbox_xyxy
+            if d.face_id is not None:
+                self._faces[key].add(d.face_id, d.timestamp)
+            if embeddings is not None and embeddings[i] is not None:
+                vec = np.asarray(embeddings[i], dtype=np.float32).ravel()
+                self._embeddings[key] = self._embeddings[key] + vec if key in self._embeddings else vec.copy()
+            self.clock = max(self.clock, d.timestamp)
+        return self._advance()
+
+    def add_tracklets(self, tracklets: Iterable[Tracklet]) -> List[Tuple[int, JourneySegment]]:
+        for t in tracklets:
+            self._push(t)
+            self.clock = max(self.clock, t.end_time)
+        return self._advance()
+
+    def flush(self) -> List[Tuple[int, JourneySegment]]:
+        """Close every open track and link everything still pending (end of stream)."""
+        return self._advance(final=True)
+
+    def _push(self, t: Tracklet) -> None:
+        heapq.heappush(self._closed, (t.start_time, self._pushed, t))
+        self._pushed += 1
+
+    def _close(self, key: Tuple[str, int]) -> None:
+        t = self.open_tracks.pop(key)
+        t.face_id = self._faces.pop(key).winner()
+        vec = self._embeddings.pop(key, None)
+        if vec is not None:
+            t.embedding = vec / max(float(np.linalg.norm(vec)), 1e-12)
+        self._push(t)
+
+    def _advance(self, final: bool = False) -> List[Tuple[int, JourneySegment]]:
+        if not final and self.clock < self._next_maintenance:
+            return []
+        self._next_maintenance = self.clock + MAINTENANCE_INTERVAL_S
+        timeout = ReIDConfig.tracklet_timeout_s
+        longest = ReIDConfig.max_open_track_s
+        for key in [
+            k for k, t in self.open_tracks.items()
+            if final or t.end_time < self.clock - timeout or t.start_time < self.clock - longest
+        ]:
+            self._close(key)
+
+        # Release closed tracklets in entry order, whole ReID windows at a time:
+        # none may enter before a track that is still open.
+        if final:
+            watermark = math.inf
+        else:
+            watermark = window_start(min([self.clock - timeout] + [t.start_time for t in self.open_tracks.values()]))
+        released = []
+        while self._closed and self._closed[0][0] < watermark:
+            released.append(heapq.heappop(self._closed)[2])
+        segments = self._link(released)
+
+        # Everything still to be linked enters at or after the watermark.
+        cutoff = watermark - self.reid.max_gap_s
+        for global_id in [g for g, t in self.last_by_global.items() if t.end_time < cutoff]:
+            del self.last_by_global[global_id]
+        return segments
+
+    def _link(self, tracklets: List[Tracklet]) -> List[Tuple[int, JourneySegment]]:
+        segments = []
+        for tracklet, global_id in zip(tracklets, self.reid.assign(tracklets)):
+            prev = self.last_by_global.get(global_id)
+            if prev is not None:
+                segment = _transition(self.scorer, prev, tracklet)
+                if segment is not None:
+                    segments.append((global_id, segment))
+            self.last_by_global[global_id] = tracklet
+        return segments
@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .campus_map import TravelTimes, load_travel_times
+from .config import ReIDConfig
+from .detection_store import StringTable
+from .tracklets import Tracklet
+from .utils import linear_assignment
+
+try:
+    import cv2
+except Exception:
+    cv2 = None  # type: ignore
+
+# Transition score of a location pair without a campus travel time (as in CrossCameraReIdentifier)
+UNKNOWN_TRANSITION_SCORE = 0.2
+
+
+def max_gap_seconds(travel: Optional[TravelTimes] = None) -> float:
+    """Absence after which a person is forgotten (``ReIDConfig.max_gap_s`` or, by default,
+    ``travel_slack`` times the longest campus travel time)."""
+    if ReIDConfig.max_gap_s is not None:
+        return float(ReIDConfig.max_gap_s)
+    return ReIDConfig.travel_slack * (travel or load_travel_times()).max_seconds()
+
+
+def appearance_embedding(frame: np.ndarray, bbox_xyxy: Tuple[int, int, int, int]) -> Optional[np.ndarray]:
+    """Hue/saturation histograms of the upper and lower half of a person box, L2-normalized.
+
+    A cheap clothing-colour descriptor for cross-camera matching; None for an empty crop.
+    """
+    x1, y1, x2, y2 = (int(v) for v in bbox_xyxy)
+    crop = frame[max(y1, 0) : max(y2, 0), max(x1, 0) : max(x2, 0)]
+    if crop.size == 0 or cv2 is None:
+        return None
+    hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+    mid = hsv.shape[0] // 2
+    parts = [hsv[:mid], hsv[mid:]] if mid else [hsv]
+    hists = [cv2.calcHist([p], [0, 1], None, [16, 4], [0, 180, 0, 256]).ravel() for p in parts]
+    # Square root (Hellinger) so a few dominant bins do not swamp the cosine distance
+    vec = np.sqrt(np.concatenate(hists)).astype(np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else None
+
+
+class TrackletAppearance:
+    """Running mean embedding per ``(camera, track_id)``, attached to tracklets once they are built."""
+
+    def __init__(self) -> None:
+        self._sums: Dict[Tuple[str, int], np.ndarray] = {}
+
+    def add(self, camera: str, track_id: int, embedding: Optional[np.ndarray]) -> None:
+        if embedding is None:
+            return
+        key = (camera, track_id)
+        vec = np.asarray(embedding, dtype=np.float32).ravel()
+        if key in self._sums:
+            self._sums[key] += vec
+        else:
+            self._sums[key] = vec.copy()
+
+    def merge(self, other: "TrackletAppearance") -> None:
+        for key, vec in other._sums.items():
+            self._sums[key] = self._sums[key] + vec if key in self._sums else vec.copy()
+
+    def attach(self, tracklets: Iterable[Tracklet]) -> None:
+        for t in tracklets:
+            vec = self._sums.get((t.camera, t.track_id))
+            if vec is not None:
+                t.embedding = vec / max(float(np.linalg.norm(vec)), 1e-12)
+
+
+def window_start(t: float) -> float:
+    """Start of the ReID assignment window containing time ``t``."""
+    if not math.isfinite(t):
+        return t
+    return math.floor(t / ReIDConfig.window_s) * ReIDConfig.window_s
+
+
+class ReIDEngine:
+    """Links tracklets from all cameras into global ids.
+
+    Tracklets are taken in order of entry and assigned in windows of
+    ``ReIDConfig.window_s``, aligned to multiples of it so that splitting
+    the input over several calls at window boundaries gives the same ids
+    as one call. For each window, one cost matrix between the new
+    tracklets and every person seen within ``max_gap_seconds()`` combines the cosine
+    distance of their embeddings with the campus travel-time prior, and
+    a linear assignment solver picks the matches. A person's embedding is a
+    moving average over the tracklets assigned to them. Two tracklets are
+    only linked on appearance when both have an embedding, or on an equal
+    face id; anything else starts a new global id. The engine keeps its
+    state, so tracklets can be fed in several calls. People unseen for
+    ``max_gap_seconds()`` are evicted and their slots reused, so memory
+    follows the number of people on campus rather than the run length.
+    """
+
+    def __init__(self) -> None:
+        self.global_id_counter = 0
+        self.track_to_global: Dict[str, int] = {}
+        self.locations = StringTable()
+        self.faces = StringTable()
+        self.travel = load_travel_times()
+        self.max_gap_s = max_gap_seconds(self.travel)
+        self._travel = np.empty((0, 0), dtype=np.float32)
+        # Per slot: global id, last location, exit time, face code, embedding
+        self._gid = np.empty((0,), dtype=np.int64)
+        self._loc = np.empty((0,), dtype=np.int32)
+        self._last_end = np.empty((0,), dtype=np.float64)
+        self._face = np.empty((0,), dtype=np.int32)
+        self._emb: Optional[np.ndarray] = None
+        self._has_emb = np.empty((0,), dtype=bool)
+        # Slots still within max_gap_seconds() of the current window, pruned as time advances
+        self._active = np.empty((0,), dtype=np.int64)
+        self._slot_of: Dict[int, int] = {}  # global id -> slot, for ids not evicted yet
+        self._free: List[int] = []
+        self._used = 0  # slots handed out so far
+        self._sweep_at = 4096
+
+    def _key(self, camera: str, track_id: int) -> str:
+        return f"{camera}:{track_id}"
+
+    def _location_code(self, location: str) -> int:
+        n = len(self.locations)
+        code = self.locations.intern(location)
+        if code == n:
+            # Campus travel times re-indexed by this engine's codes; NaN for locations off the map or without a path
+            codes = self.travel.codes(self.locations.values)
+            known = np.maximum(codes, 0)
+            travel = self.travel.seconds[np.ix_(known, known)].astype(np.float32)
+            travel[(codes < 0)[:, None] | (codes < 0)[None, :] | np.isinf(travel)] = np.nan
+            self._travel = travel
+        return code
+
+    def _grow(self, needed: int, dim: int) -> None:
+        capacity = self._loc.shape[0]
+        if self._emb is None and dim:
+            self._emb = np.zeros((capacity, dim), dtype=np.float32)
+        if needed <= capacity:
+            return
+        new = max(needed, capacity * 2, 1024)
+        self._gid = np.resize(self._gid, new)
+        self._loc = np.resize(self._loc, new)
+        self._last_end = np.resize(self._last_end, new)
+        self._face = np.resize(self._face, new)
+        self._has_emb = np.resize(self._has_emb, new)
+        self._has_emb[capacity:] = False
+        if self._emb is not None:
+            emb = np.zeros((new, self._emb.shape[1]), dtype=np.float32)
+            emb[:capacity] = self._emb
+            self._emb = emb
+
+    def transition_scores(self, from_codes: np.ndarray, to_codes: np.ndarray, dt: np.ndarray) -> np.ndarray:
+        """``CrossCameraReIdentifier.transition_score`` over broadcast arrays of location codes and gaps."""
+        expected = self._travel[from_codes, to_codes]
+        with np.errstate(invalid="ignore"):
+            score = np.clip(1.0 - np.abs(dt - expected) / np.maximum(expected, 1e-3), 0.0, 1.0)
+        score = np.where(np.isnan(expected), UNKNOWN_TRANSITION_SCORE, score)
+        return np.where((dt <= 0) & ~np.isnan(expected), 0.0, score)
+
+    def cost_matrix(
+        self, candidates: np.ndarray, loc: np.ndarray, start: np.ndarray, face: np.ndarray, emb: Optional[np.ndarray]
+    ) -> np.ndarray:
+        """Cost between new tracklets (rows) and the people in slots ``candidates`` (columns); inf = never.
+
+        The hard constraints are applied first, so the travel prior is only
+        evaluated on the few admissible pairs.
+        """
+        cfg = ReIDConfig
+        dt = start[:, None] - self._last_end[candidates][None, :]
+
+        has_q = np.zeros(loc.shape[0], dtype=bool) if emb is None else ~np.isnan(emb[:, 0])
+        both = has_q[:, None] & self._has_emb[candidates][None, :]
+        if both.any():
+            distance = 1.0 - np.nan_to_num(emb) @ self._emb[candidates].T
+        else:
+            distance = np.ones(both.shape, dtype=np.float32)
+
+        g_face = self._face[candidates]
+        named = (face >= 0)[:, None] & (g_face >= 0)[None, :]
+        same_face = named & (face[:, None] == g_face[None, :])
+
+        feasible = (
+            (same_face | (both & (distance <= cfg.max_appearance_distance)))
+            & (dt > 0)
+            & (dt <= self.max_gap_s)
+            & ~(named & ~same_face)
+        )
+        rows, cols = np.nonzero(feasible)
+        cost = np.full(feasible.shape, np.inf, dtype=np.float32)
+        travel = self.transition_scores(self._loc[candidates[cols]], loc[rows], dt[rows, cols])
+        cost[rows, cols] = (
+            cfg.appearance_weight * np.where(both[rows, cols], distance[rows, cols], 0.5)
+            + cfg.travel_weight * (1.0 - travel)
+            - cfg.face_bonus * same_face[rows, cols]
+        )
+        return cost
+
+    def assign(self, tracklets: List[Tracklet]) -> List[int]:
+        """Global id of each tracklet, in input order."""
+        order = sorted(range(len(tracklets)), key=lambda i: tracklets[i].start_time)
+        ids = [0] * len(tracklets)
+        i = 0
+        while i < len(order):
+            window_end = window_start(tracklets[order[i]].start_time) + ReIDConfig.window_s
+            j = i
+            while j < len(order) and tracklets[order[j]].start_time < window_end:
+                j += 1
+            batch = [tracklets[k] for k in order[i:j]]
+            for k, global_id in zip(order[i:j], self._assign_window(batch)):
+                ids[k] = global_id
+            i = j
+        return ids
+
+    def _assign_window(self, batch: List[Tracklet]) -> List[int]:
+        cutoff = batch[0].start_time - self.max_gap_s
+        live = self._last_end[self._active] >= cutoff
+        if not live.all():
+            self._evict(self._active[~live])
+            self._active = self._active[live]
+
+        keys = [self._key(t.camera, t.track_id) for t in batch]
+        slots = [self._slot_of.get(self.track_to_global.get(key, 0), -1) for key in keys]
+        fresh = [i for i, slot in enumerate(slots) if slot < 0]
+        if fresh and self._active.size:
+            rows = [batch[i] for i in fresh]
+            loc = np.array([self._location_code(t.camera) for t in rows], dtype=np.int32)
+            start = np.array([t.start_time for t in rows], dtype=np.float64)
+            face = np.array([self.faces.intern(t.face_id) for t in rows], dtype=np.int32)
+            emb = self._embeddings(rows)
+            cost = self.cost_matrix(self._active, loc, start, face, emb)
+            matched_rows, matched_cols = linear_assignment(cost, ReIDConfig.max_cost)
+            for r, c in zip(matched_rows.tolist(), matched_cols.tolist()):
+                slots[fresh[r]] = int(self._active[c])
+
+        new_slots = []
+        for i, slot in enumerate(slots):
+            if slot < 0:
+                slots[i] = slot = self._new_slot()
+                new_slots.append(slot)
+        if new_slots:
+            self._active = np.concatenate([self._active, np.asarray(new_slots, dtype=np.int64)])
+        ids = []
+        for key, t, slot in zip(keys, batch, slots):
+            global_id = int(self._gid[slot])
+            self.track_to_global[key] = global_id
+            self._update(slot, t)
+            ids.append(global_id)
+        return ids
+
+    def _new_slot(self) -> int:
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = self._used
+            self._used += 1
+            self._grow(self._used, 0)
+        self.global_id_counter += 1
+        self._gid[slot] = self.global_id_counter
+        self._slot_of[self.global_id_counter] = slot
+        self._last_end[slot] = -np.inf
+        self._face[slot] = -1
+        self._has_emb[slot] = False
+        return slot
+
+    def _evict(self, slots: np.ndarray) -> None:
+        for slot in slots.tolist():
+            del self._slot_of[int(self._gid[slot])]
+            self._free.append(slot)
+        # Drop track keys of evicted people once the map has doubled since the last sweep
+        if len(self.track_to_global) > self._sweep_at:
+            self.track_to_global = {k: g for k, g in self.track_to_global.items() if g in self._slot_of}
+            self._sweep_at = 2 * len(self.track_to_global) + 4096
+
+    def _embeddings(self, tracklets: List[Tracklet]) -> Optional[np.ndarray]:
+        if self._emb is None and all(t.embedding is None for t in tracklets):
+            return None
+        dim = self._emb.shape[1] if self._emb is not None else next(
+            np.asarray(t.embedding).size for t in tracklets if t.embedding is not None
+        )
+        out = np.full((len(tracklets), dim), np.nan, dtype=np.float32)
+        for i, t in enumerate(tracklets):
+            if t.embedding is not None:
+                vec = np.asarray(t.embedding, dtype=np.float32).ravel()
+                out[i] = vec / max(float(np.linalg.norm(vec)), 1e-12)
+        return out
+
+    def _update(self, slot: int, t: Tracklet) -> None:
+        if t.end_time >= self._last_end[slot]:
+            self._last_end[slot] = t.end_time
+            self._loc[slot] = self._location_code(t.camera)
+        if t.face_id is not None:
+            self._face[slot] = self.faces.intern(t.face_id)
+        if t.embedding is None:
+            return
+        vec = np.asarray(t.embedding, dtype=np.float32).ravel()
+        self._grow(slot + 1, vec.size)
+        vec = vec / max(float(np.linalg.norm(vec)), 1e-12)
+        if self._has_emb[slot]:
+            m = ReIDConfig.embedding_momentum
+            vec = m * self._emb[slot] + (1.0 - m) * vec
+            vec /= max(float(np.linalg.norm(vec)), 1e-12)
+        self._emb[slot] = vec
+        self._has_emb[slot] = True
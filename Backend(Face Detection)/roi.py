@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .config import CAMERA_SETTINGS
+
+# Fill for pixels outside a polygon ROI; the same grey YOLO pads letterboxes with
+PAD_VALUE = 114
+# ultralytics' inference size when none is given, and the multiple its letterboxes are padded to
+YOLO_DEFAULT_IMGSZ = 640
+YOLO_STRIDE = 32
+
+
+class CameraROI:
+    """Part of a camera frame the person detector looks at, and the size it runs at.
+
+    ``roi`` is None (whole frame), a rectangle ``(x1, y1, x2, y2)`` or a
+    polygon ``[(x, y), ...]``, all in fractions of the frame width and
+    height. Frames are cropped to the ROI's bounding box; for polygons the
+    pixels outside are filled with ``PAD_VALUE``. ``imgsz`` is passed to
+    YOLO when set.
+    """
+
+    def __init__(self, roi: Optional[Sequence] = None, imgsz: Optional[int] = None) -> None:
+        self.roi = roi
+        self.imgsz = imgsz
+        self._shape: Tuple[int, int] | None = None
+        self._box: Tuple[int, int, int, int] = (0, 0, 0, 0)
+        self._mask: np.ndarray | None = None
+
+    @classmethod
+    def for_location(cls, location: Optional[str]) -> "CameraROI":
+        settings = CAMERA_SETTINGS.get(location or "", {})
+        return cls(roi=settings.get("roi"), imgsz=settings.get("imgsz"))
+
+    def predict_kwargs(self) -> Dict[str, int]:
+        return {"imgsz": self.imgsz} if self.imgsz else {}
+
+    def _prepare(self, h: int, w: int) -> None:
+        self._shape = (h, w)
+        self._mask = None
+        if self.roi is None:
+            self._box = (0, 0, w, h)
+            return
+        if len(self.roi) == 4 and not isinstance(self.roi[0], (tuple, list)):
+            x1, y1, x2, y2 = self.roi
+            self._box = (int(x1 * w), int(y1 * h), int(np.ceil(x2 * w)), int(np.ceil(y2 * h)))
+            return
+        pts = np.array([(x * w, y * h) for x, y in self.roi], dtype=np.float32)
+        x1, y1 = np.floor(pts.min(axis=0)).astype(int)
+        x2, y2 = np.ceil(pts.max(axis=0)).astype(int)
+        x1, y1, x2, y2 = max(x1, 0), max(y1, 0), min(x2, w), min(y2, h)
+        self._box = (int(x1), int(y1), int(x2), int(y2))
+        mask = np.zeros((y2 - y1, x2 - x1), dtype=np.uint8)
+        cv2.fillPoly(mask, [np.round(pts - (x1, y1)).astype(np.int32)], 255)
+        self._mask = mask
+
+    def crop(self, frame_bgr: np.ndarray) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """Return the detector input for ``frame_bgr`` and the (x, y) offset to map boxes back."""
+        h, w = frame_bgr.shape[:2]
+        if self._shape != (h, w):
+            self._prepare(h, w)
+        x1, y1, x2, y2 = self._box
+        if self.roi is None:
+            return frame_bgr, (0, 0)
+        region = frame_bgr[y1:y2, x1:x2]
+        if self._mask is None:
+            return region, (x1, y1)
+        out = np.full_like(region, PAD_VALUE)
+        cv2.copyTo(region, self._mask, out)
+        return out, (x1, y1)
+
+
+def shift_box(bbox: Tuple[int, int, int, int], offset: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    ox, oy = offset
+    x1, y1, x2, y2 = bbox
+    return (x1 + ox, y1 + oy, x2 + ox, y2 + oy)
+
+
+def yolo_input_shape(shape: Tuple[int, ...], imgsz: Optional[int] = None) -> Tuple[int, int]:
+    """Height and width of the letterboxed image ultralytics runs on for an image of ``shape``."""
+    imgsz = imgsz or YOLO_DEFAULT_IMGSZ
+    h, w = shape[:2]
+    scale = imgsz / max(h, w, 1)
+    h, w = round(h * scale), round(w * scale)
+    return h + (imgsz - h) % YOLO_STRIDE, w + (imgsz - w) % YOLO_STRIDE
+
+
+@dataclass
+class DetectorStats:
+    """Per-camera detector workload: frames, pixels fed to YOLO and time spent in it.
+
+    ``pixels`` are those of the crop handed to the detector and
+    ``input_pixels`` those of the resized input it actually runs on.
+    """
+
+    frames: int = 0
+    pixels: int = 0
+    input_pixels: int = 0
+    full_pixels: int = 0
+    detector_s: float = 0.0
+
+    def record(
+        self, crop_shape: Tuple[int, ...], frame_shape: Tuple[int, ...], seconds: float, input_shape: Tuple[int, ...]
+    ) -> None:
+        self.frames += 1
+        self.pixels += crop_shape[0] * crop_shape[1]
+        self.input_pixels += input_shape[0] * input_shape[1]
+        self.full_pixels += frame_shape[0] * frame_shape[1]
+        self.detector_s += seconds
+
+    def summary(self) -> dict:
+        n = max(self.frames, 1)
+        return {
+            "frames": self.frames,
+            "megapixels_per_frame": self.input_pixels / n / 1e6,
+            "roi_share": self.pixels / self.full_pixels if self.full_pixels else 1.0,
+            "detector_ms": 1000 * self.detector_s / n,
+        }
+
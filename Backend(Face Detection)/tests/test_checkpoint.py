@@ -0,0 +1,131 @@
+"""A pass interrupted after a checkpoint resumes without losing or repeating detections, attendance or appearance."""
+
+from __future__ import annotations
+
+import pickle
+from typing import List, Optional
+
+import numpy as np
+import pytest
+
+from snmimt_campus_tracker.attendance_system import AttendanceSystem
+from snmimt_campus_tracker.checkpoint import CheckpointStore
+from snmimt_campus_tracker.config import FaceConfig, StoreConfig
+from snmimt_campus_tracker.face_quality import FaceQualityGate
+from snmimt_campus_tracker.face_recognition_system import FaceMatch
+from snmimt_campus_tracker.main import SNMIMTCampusTracker
+from snmimt_campus_tracker.reid import TrackletAppearance
+from snmimt_campus_tracker.tracklets import build_tracklets
+from snmimt_campus_tracker.utils import Detection
+
+FRAMES = 40
+# track id -> (box, identity, first frame)
+PEOPLE = {1: ((0, 0, 40, 80), "alice", 0), 2: ((100, 0, 140, 80), "bob", 0), 3: ((200, 0, 240, 80), "carol", 25)}
+CLOTHES = {1: (200, 40, 40), 2: (40, 200, 40), 3: (40, 40, 200)}  # BGR
+
+
+class Interrupted(Exception):
+    pass
+
+
+class FakeCamera:
+    """Stands in for CameraProcessor: a fixed scene, optionally failing before frame ``crash_at``."""
+
+    def __init__(self, crash_at: Optional[int] = None, keep_tracker: bool = True) -> None:
+        self.crash_at = crash_at
+        self.keep_tracker = keep_tracker
+        self.frame_index = -1
+        self.timings: dict = {}
+        self.starts: List[int] = []
+
+    def stream_video(self, video_path, location, start_frame=0, tracker_state=None, writer_part=0):
+        self.starts.append(start_frame)
+        for i in range(start_frame, FRAMES):
+            if i == self.crash_at:
+                raise Interrupted
+            self.frame_index = i
+            dets = [
+                Detection(track_id, box, 0.9, 0, i, i / 10, location)
+                for track_id, (box, _, first) in PEOPLE.items()
+                if i >= first
+            ]
+            frame = np.zeros((90, 250, 3), np.uint8)
+            for d in dets:
+                x1, y1, x2, y2 = d.bbox_xyxy
+                frame[y1:y2, x1:x2] = CLOTHES[d.track_id]
+            yield frame, dets
+
+    def tracker_state(self) -> Optional[bytes]:
+        return pickle.dumps({"tracks": sorted(PEOPLE)}) if self.keep_tracker else None
+
+    def print_detector_stats(self, location: str) -> None:
+        pass
+
+
+class FakeFaces:
+    def __init__(self) -> None:
+        self.quality_gate = FaceQualityGate()
+        by_box = {box: name for box, name, _ in PEOPLE.values()}
+        self.recognize_persons = lambda frame, boxes, active: [
+            FaceMatch(by_box[tuple(b)], 0.9) if a else None for b, a in zip(boxes, active)
+        ]
+
+
+def _run(camera: FakeCamera, video: str, checkpoints: Optional[CheckpointStore]):
+    tracker = SNMIMTCampusTracker.__new__(SNMIMTCampusTracker)
+    tracker.camera_processor = camera
+    attendance = AttendanceSystem()
+    appearance = TrackletAppearance()
+    detections = tracker.process_video_with_recognition(
+        video, "classroom", FakeFaces(), attendance, checkpoints, appearance
+    )
+    people = {p: r["total_detections"] for day in attendance.daily_attendance.values() for p, r in day.items()}
+    tracklets = build_tracklets({"classroom": detections})
+    appearance.attach(tracklets)
+    return detections, people, {t.track_id: t.embedding for t in tracklets}
+
+
+@pytest.fixture
+def video(tmp_path, monkeypatch):
+    monkeypatch.setattr(StoreConfig, "checkpoint_interval_s", 0.0)
+    path = tmp_path / "class1.mp4"
+    path.write_bytes(b"")
+    return str(path)
+
+
+def _rows(detections) -> list:
+    return sorted((d.frame_index, d.track_id, d.face_id) for d in detections)
+
+
+@pytest.mark.parametrize("keep_tracker", [True, False])
+def test_resume_matches_an_uninterrupted_pass(video, tmp_path, keep_tracker):
+    expected, expected_people, expected_looks = _run(FakeCamera(), video, None)
+    assert expected_people == {"alice": 1, "bob": 1, "carol": 1}
+    # Every track gets its own appearance, and differently dressed people look different
+    assert sorted(expected_looks) == sorted(PEOPLE)
+    assert all(v is not None for v in expected_looks.values())
+    assert float(expected_looks[1] @ expected_looks[2]) < 0.5
+
+    store = CheckpointStore([video], root=tmp_path / "checkpoints")
+    with pytest.raises(Interrupted):
+        _run(FakeCamera(crash_at=20, keep_tracker=keep_tracker), video, store)
+    progress = store.progress(video)
+    assert progress is not None and progress.frame_index == 19
+
+    resumed = FakeCamera(keep_tracker=keep_tracker)
+    detections, people, looks = _run(resumed, video, store)
+    assert resumed.starts == [20]
+    assert people == expected_people
+    assert _rows(detections) == _rows(expected)
+    for track_id, vec in expected_looks.items():
+        np.testing.assert_allclose(looks[track_id], vec, rtol=1e-5)
+    assert store.done(video) is not None and store.progress(video) is None
+
+
+def test_changed_settings_do_not_resume_old_progress(video, tmp_path, monkeypatch):
+    store = CheckpointStore([video], root=tmp_path / "checkpoints")
+    with pytest.raises(Interrupted):
+        _run(FakeCamera(crash_at=20), video, store)
+    monkeypatch.setattr(FaceConfig, "det_thresh", FaceConfig.det_thresh + 0.1)
+    fresh = CheckpointStore([video], root=tmp_path / "checkpoints")
+    assert fresh.dir != store.dir and fresh.progress(video) is None
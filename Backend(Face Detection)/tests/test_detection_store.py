@@ -0,0 +1,88 @@
+"""DetectionBatch keeps every row intact through sealing, spilling, saving and pickling."""
+
+from __future__ import annotations
+
+import pickle
+from typing import List
+
+import numpy as np
+
+from snmimt_campus_tracker.config import StoreConfig
+from snmimt_campus_tracker.detection_store import DetectionBatch
+from snmimt_campus_tracker.utils import Detection
+
+
+def _detections(n: int) -> List[Detection]:
+    rng = np.random.default_rng(0)
+    return [
+        Detection(
+            track_id=int(rng.integers(-1, 20)),
+            bbox_xyxy=tuple(int(v) for v in rng.integers(0, 1000, 4)),
+            confidence=int(rng.integers(64)) / 64,  # stored as float32
+            class_id=0,
+            frame_index=i // 5,
+            timestamp=i / 5 / 25.0,
+            location=["classroom", "civil_hall", None][i % 3],
+            face_id=[None, "alice", "bob"][int(rng.integers(3))],
+        )
+        for i in range(n)
+    ]
+
+
+def _rows(batch) -> list:
+    return [(d.track_id, tuple(d.bbox_xyxy), d.confidence, d.frame_index, d.location, d.face_id) for d in batch]
+
+
+def _spilling(tmp_path) -> DetectionBatch:
+    return DetectionBatch(chunk_rows=64, spill_threshold=100, spill_dir=tmp_path / "spill")
+
+
+def test_spilled_rows_round_trip(tmp_path):
+    dets = _detections(1000)
+    batch = _spilling(tmp_path)
+    for start in range(0, len(dets), 7):
+        batch.extend(dets[start : start + 7])
+    assert len(batch) == len(dets)
+    assert any(isinstance(col, np.memmap) for chunk in batch._chunks for col in chunk.values())
+    assert batch.nbytes() < sum(col.nbytes for col in batch.columns().values())
+    assert _rows(batch) == _rows(dets)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    dets = _detections(500)
+    batch = _spilling(tmp_path)
+    batch.extend(dets)
+    batch.save(tmp_path / "rows.npz")
+    loaded = DetectionBatch.load(tmp_path / "rows.npz")
+    assert _rows(loaded) == _rows(dets)
+    for name, col in batch.columns().items():
+        np.testing.assert_array_equal(loaded.columns()[name], col)
+
+
+def test_face_ids_can_be_written_back_after_spilling(tmp_path):
+    batch = _spilling(tmp_path)
+    batch.extend(_detections(1000))
+    batch.set_face_ids_by_track({3: "carol", 7: "dave"})
+    for d in batch:
+        if d.track_id in (3, 7):
+            assert d.face_id == {3: "carol", 7: "dave"}[d.track_id]
+
+
+def test_pickle_ships_rows_not_spill_files(tmp_path):
+    dets = _detections(400)
+    batch = _spilling(tmp_path)
+    batch.extend(dets)
+    copy = pickle.loads(pickle.dumps(batch))
+    assert copy._spill_path is None
+    assert not any(isinstance(col, np.memmap) for chunk in copy._chunks for col in chunk.values())
+    assert _rows(copy) == _rows(dets)
+
+
+def test_defaults_follow_store_config_at_construction(monkeypatch, tmp_path):
+    monkeypatch.setattr(StoreConfig, "chunk_rows", 32)
+    monkeypatch.setattr(StoreConfig, "spill_threshold", 50)
+    monkeypatch.setattr(StoreConfig, "spill_dir", tmp_path / "configured")
+    batch = DetectionBatch()
+    batch.extend(_detections(200))
+    assert batch.chunk_rows == 32 and batch.spill_threshold == 50
+    assert batch._spill_path is not None and batch._spill_path.parent == tmp_path / "configured"
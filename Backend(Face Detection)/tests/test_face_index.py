@@ -0,0 +1,74 @@
+"""IVF gallery index against exact search."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from snmimt_campus_tracker.face_index import BruteForceIndex, IVFIndex, create_index
+
+DIM = 64
+N_LISTS = 32
+
+
+def _gallery(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    # Identities cluster around a few modes, as face embeddings do
+    modes = rng.standard_normal((16, DIM)).astype(np.float32)
+    refs = modes[rng.integers(0, 16, size=n)] + 0.8 * rng.standard_normal((n, DIM)).astype(np.float32)
+    picks = rng.integers(0, n, size=200)
+    queries = refs[picks] + 0.3 * rng.standard_normal((200, DIM)).astype(np.float32)
+    return [f"student_{i:05d}" for i in range(n)], refs, queries, picks
+
+
+def _top1(index, queries) -> list:
+    return [index.search(q, 1)[0][0] for q in queries]
+
+
+@pytest.fixture(scope="module")
+def gallery():
+    ids, refs, queries, picks = _gallery(4000)
+    exact = BruteForceIndex()
+    exact.add(ids, refs)
+    truth = _top1(exact, queries)
+    # The queries are answerable: exact search finds the identity each was drawn from
+    assert np.mean([t == ids[p] for t, p in zip(truth, picks)]) > 0.95
+    return ids, refs, queries, truth
+
+
+@pytest.mark.parametrize("n_probe, min_recall", [(2, 0.9), (8, 0.98)])
+def test_ivf_recall_against_brute_force(gallery, n_probe, min_recall):
+    ids, refs, queries, truth = gallery
+    ivf = IVFIndex(n_lists=N_LISTS, n_probe=n_probe)
+    ivf.add(ids, refs)
+    assert ivf.is_trained
+    recall = np.mean([a == b for a, b in zip(_top1(ivf, queries), truth)])
+    assert recall >= min_recall
+
+
+def test_probing_every_list_is_exact(gallery):
+    ids, refs, queries, truth = gallery
+    ivf = IVFIndex(n_lists=N_LISTS, n_probe=N_LISTS)
+    ivf.add(ids, refs)
+    assert _top1(ivf, queries) == truth
+
+
+def test_untrained_index_searches_exhaustively():
+    ids, refs, queries, _ = _gallery(100)
+    exact, ivf = BruteForceIndex(), create_index("ivf", n_lists=N_LISTS, n_probe=1)
+    exact.add(ids, refs)
+    ivf.add(ids, refs)
+    assert not ivf.is_trained
+    assert _top1(ivf, queries) == _top1(exact, queries)
+
+
+def test_vectors_added_after_training_are_found(gallery):
+    ids, refs, _, _ = gallery
+    ivf = IVFIndex(n_lists=N_LISTS, n_probe=4)
+    ivf.add(ids, refs)
+    rng = np.random.default_rng(1)
+    late = rng.standard_normal((10, DIM)).astype(np.float32)
+    ivf.add([f"late_{i}" for i in range(10)], late)
+    assert len(ivf) == len(ids) + 10
+    found, sims = ivf.search(late[3], 1)
+    assert found == ["late_3"] and sims[0] == pytest.approx(1.0, abs=1e-5)
@@ -0,0 +1,100 @@
+"""Online journeys (``JourneyEngine``) must match batch reconstruction on the same detections.
+
+Run from the directory holding the package: ``python -m pytest snmimt_campus_tracker/tests``.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from snmimt_campus_tracker.config import TRAVEL_TIME_SECONDS
+from snmimt_campus_tracker.person_tracker import JourneyEngine, reconstruct_person_journey
+from snmimt_campus_tracker.reid import TrackletAppearance
+from snmimt_campus_tracker.utils import Detection
+
+DIM = 32
+
+Visit = Tuple[str, int, float, float, np.ndarray]  # location, track id, enter, leave, embedding
+
+
+def _person(rng: np.random.Generator) -> np.ndarray:
+    base = rng.normal(size=DIM)
+    return base / np.linalg.norm(base)
+
+
+def _background(rng: np.random.Generator, people: int, horizon: float) -> List[Visit]:
+    routes: Dict[str, List[str]] = defaultdict(list)
+    for a, b in TRAVEL_TIME_SECONDS:
+        routes[a].append(b)
+    locations = sorted(routes)
+    visits = []
+    for person in range(people):
+        base = _person(rng)
+        t = float(rng.uniform(0, horizon))
+        loc = locations[rng.integers(len(locations))]
+        for hop in range(int(rng.integers(2, 6))):
+            dwell = float(rng.uniform(10, 60))
+            emb = base + rng.normal(size=DIM) * 0.3 / np.sqrt(DIM)
+            visits.append((loc, 1000 + person * 10 + hop, t, t + dwell, emb))
+            nxt = routes[loc][rng.integers(len(routes[loc]))]
+            t += dwell + TRAVEL_TIME_SECONDS[(loc, nxt)] * float(rng.uniform(0.9, 1.1))
+            loc = nxt
+    return visits
+
+
+def _detections(visits: List[Visit]) -> List[Tuple[Detection, np.ndarray]]:
+    stream = []
+    for loc, track_id, enter, leave, emb in visits:
+        for frame, ts in enumerate(np.arange(enter, leave, 1.0)):
+            stream.append((Detection(track_id, (0, 0, 10, 20), 0.9, 0, frame, float(ts), loc), emb))
+    stream.sort(key=lambda pair: pair[0].timestamp)
+    return stream
+
+
+def _batch(stream: List[Tuple[Detection, np.ndarray]]) -> Dict[int, list]:
+    by_camera: Dict[str, List[Detection]] = defaultdict(list)
+    appearance = TrackletAppearance()
+    for d, emb in stream:
+        by_camera[d.location].append(d)
+        appearance.add(d.location, d.track_id, emb)
+    return {g: segments for g, segments in reconstruct_person_journey(by_camera, appearance).items() if segments}
+
+
+def _online(stream: List[Tuple[Detection, np.ndarray]]) -> Dict[int, list]:
+    engine = JourneyEngine()
+    journeys: Dict[int, list] = defaultdict(list)
+    second: List[Tuple[Detection, np.ndarray]] = []
+    for pair in stream + [(None, None)]:
+        if second and (pair[0] is None or pair[0].timestamp >= second[0][0].timestamp + 1.0):
+            for global_id, segment in engine.add_detections([d for d, _ in second], [e for _, e in second]):
+                journeys[global_id].append(segment)
+            second = []
+        if pair[0] is not None:
+            second.append(pair)
+    for global_id, segment in engine.flush():
+        journeys[global_id].append(segment)
+    return dict(journeys)
+
+
+def test_track_open_longer_than_max_gap_keeps_its_transition():
+    rng = np.random.default_rng(0)
+    student = _person(rng)
+    visits = [("main_entrance", 1, 0.0, 10.0, student), ("classroom", 2, 130.0, 3000.0, student)]
+    visits += _background(rng, 40, 3000.0)
+    stream = _detections(visits)
+
+    batch = _batch(stream)
+    assert any(s.from_location == "main_entrance" and s.to_location == "classroom" and s.end_time == 130.0
+               for segments in batch.values() for s in segments)
+    assert _online(stream) == batch
+
+
+def test_busy_campus_matches_batch():
+    rng = np.random.default_rng(1)
+    stream = _detections(_background(rng, 150, 1800.0))
+    batch = _batch(stream)
+    assert sum(len(s) for s in batch.values()) > 100
+    assert _online(stream) == batch
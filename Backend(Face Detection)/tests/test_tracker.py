@@ -0,0 +1,79 @@
+"""Builtin tracker: tentative tracks, bytetrack's low-score boxes, and what reaches the pipeline."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from snmimt_campus_tracker.camera_processor import CameraProcessor
+from snmimt_campus_tracker.config import TrackingConfig
+from snmimt_campus_tracker.tracker import DISCARDED, TENTATIVE, MultiObjectTracker
+
+LEFT = (10, 10, 60, 130)
+RIGHT = (300, 10, 350, 130)
+
+
+def _step(tracker: MultiObjectTracker, frame_index: int, *boxes_scores) -> list:
+    boxes = np.array([b for b, _ in boxes_scores], dtype=np.float32).reshape(-1, 4)
+    scores = np.array([s for _, s in boxes_scores], dtype=np.float32)
+    return tracker.update(boxes, scores, frame_index).tolist()
+
+
+@pytest.mark.parametrize("tracker_type", ["sort", "bytetrack", "deep_sort"])
+def test_tracks_are_tentative_until_n_init_matches(tracker_type):
+    tracker = MultiObjectTracker(tracker_type)
+    ids = [_step(tracker, i, (LEFT, 0.9), (RIGHT, 0.9)) for i in range(TrackingConfig.n_init + 2)]
+    for frame_ids in ids[: TrackingConfig.n_init - 1]:
+        assert frame_ids == [TENTATIVE, TENTATIVE]
+    confirmed = ids[TrackingConfig.n_init - 1]
+    assert min(confirmed) > 0 and len(set(confirmed)) == 2
+    assert all(frame_ids == confirmed for frame_ids in ids[TrackingConfig.n_init - 1 :])
+
+
+def test_tentative_track_is_dropped_after_one_miss():
+    tracker = MultiObjectTracker("sort")
+    _step(tracker, 0, (LEFT, 0.9))
+    _step(tracker, 1)
+    # The box comes back as a new track, so it needs n_init fresh matches
+    ids = [_step(tracker, i, (LEFT, 0.9))[0] for i in range(2, 2 + TrackingConfig.n_init)]
+    assert ids[:-1] == [TENTATIVE] * (TrackingConfig.n_init - 1)
+    assert ids[-1] > 0
+
+
+def test_bytetrack_low_scores_only_extend_confirmed_tracks():
+    tracker = MultiObjectTracker("bytetrack")
+    low = TrackingConfig.high_conf / 2
+    for i in range(TrackingConfig.n_init):
+        ids = _step(tracker, i, (LEFT, 0.9), (RIGHT, low))
+        assert ids[1] == DISCARDED
+    track_id = ids[0]
+    assert track_id > 0
+    # A dip under high_conf keeps the track; a low box elsewhere still starts nothing
+    assert _step(tracker, TrackingConfig.n_init, (LEFT, low), (RIGHT, low)) == [track_id, DISCARDED]
+
+
+def test_sort_starts_tracks_from_any_score():
+    tracker = MultiObjectTracker("sort")
+    low = TrackingConfig.high_conf / 2
+    ids = [_step(tracker, i, (RIGHT, low))[0] for i in range(TrackingConfig.n_init)]
+    assert ids[-1] > 0
+
+
+def test_only_confirmed_detections_leave_the_camera_processor(monkeypatch):
+    monkeypatch.setattr(TrackingConfig, "tracker_type", "bytetrack")
+    processor = CameraProcessor(model=None, conf=0.5, iou=0.45)
+    frame = np.zeros((160, 400, 3), np.uint8)
+    low = TrackingConfig.high_conf / 2
+    boxes = [(LEFT, 0.9, 0), (RIGHT, low, 0)]
+    per_frame = [processor._track_boxes(frame, boxes, i, 25.0, "gate") for i in range(TrackingConfig.n_init)]
+    assert per_frame[:-1] == [[]] * (TrackingConfig.n_init - 1)
+    assert [d.bbox_xyxy for d in per_frame[-1]] == [LEFT]
+
+
+@pytest.mark.parametrize("tracker_type, expected", [("bytetrack", 0.25), ("sort", 0.5), ("deep_sort", 0.5)])
+def test_bytetrack_lowers_the_detector_threshold(monkeypatch, tracker_type, expected):
+    monkeypatch.setattr(TrackingConfig, "tracker_type", tracker_type)
+    monkeypatch.setattr(TrackingConfig, "high_conf", 0.5)
+    assert CameraProcessor(model=None, conf=0.5, iou=0.45).track_conf == expected
+    # A threshold already below high_conf / 2 is kept
+    assert CameraProcessor(model=None, conf=0.1, iou=0.45).track_conf == 0.1
@@ -0,0 +1,66 @@
+"""Tracking cache keys change with every input that changes the detector output."""
+
+from __future__ import annotations
+
+from snmimt_campus_tracker.config import ModelConfig
+from snmimt_campus_tracker.detection_store import DetectionBatch
+from snmimt_campus_tracker.tracking_cache import TrackingCache
+from snmimt_campus_tracker.utils import Detection
+
+
+def _key(video, tmp_path) -> str:
+    return TrackingCache(video, "classroom", "track", 0.5, 0.5, cache_dir=tmp_path / "cache").key
+
+
+def _onnx(monkeypatch, tmp_path):
+    weights = tmp_path / "yolo.onnx"
+    weights.write_bytes(b"fp32")
+    (tmp_path / "yolo-int8.onnx").write_bytes(b"int8")
+    monkeypatch.setattr(ModelConfig, "backend", "onnx")
+    monkeypatch.setattr(ModelConfig, "onnx_weights", str(weights))
+    monkeypatch.setattr(ModelConfig, "onnx_int8", False)
+    video = tmp_path / "class1.mp4"
+    video.write_bytes(b"not really a video" * 100)
+    return video
+
+
+def test_key_is_stable(monkeypatch, tmp_path):
+    video = _onnx(monkeypatch, tmp_path)
+    assert _key(video, tmp_path) == _key(video, tmp_path)
+
+
+def test_key_changes_with_video_content(monkeypatch, tmp_path):
+    video = _onnx(monkeypatch, tmp_path)
+    before = _key(video, tmp_path)
+    video.write_bytes(b"another video" * 100)
+    assert _key(video, tmp_path) != before
+
+
+def test_key_changes_with_onnx_input_size(monkeypatch, tmp_path):
+    video = _onnx(monkeypatch, tmp_path)
+    before = _key(video, tmp_path)
+    monkeypatch.setattr(ModelConfig, "onnx_imgsz", ModelConfig.onnx_imgsz + 32)
+    assert _key(video, tmp_path) != before
+
+
+def test_int8_key_follows_the_quantized_weights(monkeypatch, tmp_path):
+    video = _onnx(monkeypatch, tmp_path)
+    monkeypatch.setattr(ModelConfig, "onnx_int8", True)
+    before = _key(video, tmp_path)
+    (tmp_path / "yolo.onnx").write_bytes(b"fp32, re-exported")
+    assert _key(video, tmp_path) == before
+    (tmp_path / "yolo-int8.onnx").write_bytes(b"int8, re-quantized")
+    assert _key(video, tmp_path) != before
+
+
+def test_save_replaces_stale_entries(monkeypatch, tmp_path):
+    video = _onnx(monkeypatch, tmp_path)
+    rows = DetectionBatch()
+    rows.extend([Detection(1, (0, 0, 4, 8), 0.9, 0, 0, 0.0, "classroom")])
+    old = TrackingCache(video, "classroom", "track", 0.5, 0.5, cache_dir=tmp_path / "cache")
+    old.save(rows)
+    monkeypatch.setattr(ModelConfig, "onnx_imgsz", ModelConfig.onnx_imgsz + 32)
+    new = TrackingCache(video, "classroom", "track", 0.5, 0.5, cache_dir=tmp_path / "cache")
+    assert new.load() is None
+    new.save(rows)
+    assert not old.path.exists() and len(new.load()) == 1
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from .config import TrackingConfig
+from .detection_store import DetectionBatch
+from .face_recognition_system import FaceMatch
+from .utils import Detection
+
+
+@dataclass
+class TrackIdentity:
+    votes: Dict[str, float] = field(default_factory=lambda: defaultdict(float))
+    counts: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    identity: Optional[str] = None
+    confidence: float = 0.0
+    last_attempt_frame: int = -1
+    confirmed_frame: int = -1
+
+
+class TrackIdentityResolver:
+    """Votes face matches per track so each track is recognized a few times, not every frame.
+
+    A track is recognized until one identity has ``identity_min_votes`` matches
+    holding at least ``identity_vote_ratio`` of the accumulated confidence.
+    After that it is only re-verified every ``identity_reverify_interval``
+    frames (0 disables re-verification). Detections without a track id
+    (``track_id < 0``) are always recognized.
+    """
+
+    def __init__(
+        self,
+        min_votes: Optional[int] = None,
+        vote_ratio: Optional[float] = None,
+        reverify_interval: Optional[int] = None,
+    ) -> None:
+        self.min_votes = TrackingConfig.identity_min_votes if min_votes is None else min_votes
+        self.vote_ratio = TrackingConfig.identity_vote_ratio if vote_ratio is None else vote_ratio
+        self.reverify_interval = TrackingConfig.identity_reverify_interval if reverify_interval is None else reverify_interval
+        self.tracks: Dict[int, TrackIdentity] = {}
+        self.recognitions = 0
+        self.skipped = 0
+
+    def needs_recognition(self, det: Detection) -> bool:
+        if det.track_id < 0:
+            return True
+        state = self.tracks.get(det.track_id)
+        if state is None or state.identity is None:
+            return True
+        if self.reverify_interval <= 0:
+            return False
+        return det.frame_index - state.last_attempt_frame >= self.reverify_interval
+
+    def select(self, dets: List[Detection]) -> List[bool]:
+        """Flag which detections of one frame should go through the face model."""
+        active = [self.needs_recognition(d) for d in dets]
+        n_active = sum(active)
+        self.recognitions += n_active
+        self.skipped += len(active) - n_active
+        return active
+
+    def update(self, det: Detection, match: Optional[FaceMatch]) -> bool:
+        """Record one recognition attempt; returns True when the track's identity is newly confirmed or changed."""
+        if det.track_id < 0:
+            return match is not None
+        state = self.tracks.setdefault(det.track_id, TrackIdentity())
+        state.last_attempt_frame = det.frame_index
+        if match is None:
+            return False
+        state.votes[match.identity] += match.confidence
+        state.counts[match.identity] += 1
+
+        best = max(state.votes, key=state.votes.get)
+        total = sum(state.votes.values())
+        if state.counts[best] < self.min_votes or state.votes[best] < self.vote_ratio * total:
+            return False
+        state.confidence = state.votes[best] / state.counts[best]
+        if best == state.identity:
+            return False
+        state.identity = best
+        state.confirmed_frame = det.frame_index
+        return True
+
+    def identity(self, track_id: int) -> Optional[str]:
+        state = self.tracks.get(track_id)
+        return state.identity if state is not None else None
+
+    def propagate(self, detections: Iterable[Detection]) -> None:
+        """Spread each confirmed identity to every detection of its track."""
+        if isinstance(detections, DetectionBatch):
+            detections.set_face_ids_by_track(
+                {tid: s.identity for tid, s in self.tracks.items() if s.identity is not None}
+            )
+            return
+        for det in detections:
+            identity = self.identity(det.track_id)
+            if identity is not None:
+                det.face_id = identity
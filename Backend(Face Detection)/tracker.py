@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .config import TrackingConfig
+from .utils import iou_matrix, linear_assignment
+
+# Track id of a low-score detection that extended no track (ByteTrack); callers drop it
+DISCARDED = -2
+# Track id of a detection on a track not yet confirmed (fewer than n_init matches); callers drop it
+TENTATIVE = -3
+# 95% chi-square quantile for 4 degrees of freedom, the DeepSORT Mahalanobis gate
+CHI2_GATE_4DOF = 9.4877
+# Appearance features kept per track when TrackingConfig.nn_budget is None
+DEFAULT_NN_BUDGET = 100
+# Process noise relative to box height, as in DeepSORT
+STD_POSITION = 1.0 / 20
+STD_VELOCITY = 1.0 / 160
+
+
+def xyxy_to_cxcywh(boxes: np.ndarray) -> np.ndarray:
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    wh = boxes[:, 2:] - boxes[:, :2]
+    return np.hstack([boxes[:, :2] + wh / 2, wh])
+
+
+def cxcywh_to_xyxy(boxes: np.ndarray) -> np.ndarray:
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    half = boxes[:, 2:] / 2
+    return np.hstack([boxes[:, :2] - half, boxes[:, :2] + half])
+
+
+class BatchKalman:
+    """Constant-velocity Kalman filters over ``[cx, cy, w, h]`` for many tracks at once.
+
+    State rows are ``[cx, cy, w, h, vcx, vcy, vw, vh]``; covariances are
+    stacked ``(n, 8, 8)``. Predict and update are single batched NumPy
+    operations, the same equations ``filterpy.kalman.KalmanFilter`` runs
+    per object.
+    """
+
+    def __init__(self) -> None:
+        self.x = np.empty((0, 8), dtype=np.float64)
+        self.P = np.empty((0, 8, 8), dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self.x.shape[0]
+
+    @staticmethod
+    def _noise(heights: np.ndarray, position: float, velocity: float) -> np.ndarray:
+        std = np.empty((heights.shape[0], 8), dtype=np.float64)
+        std[:, :4] = position * heights[:, None]
+        std[:, 4:] = velocity * heights[:, None]
+        return std**2
+
+    def add(self, measurements: np.ndarray) -> None:
+        z = np.asarray(measurements, dtype=np.float64).reshape(-1, 4)
+        x = np.hstack([z, np.zeros_like(z)])
+        var = self._noise(z[:, 3], 2 * STD_POSITION, 10 * STD_VELOCITY)
+        P = np.zeros((z.shape[0], 8, 8), dtype=np.float64)
+        P[:, np.arange(8), np.arange(8)] = var
+        self.x = np.vstack([self.x, x])
+        self.P = np.concatenate([self.P, P])
+
+    def keep(self, mask: np.ndarray) -> None:
+        self.x = self.x[mask]
+        self.P = self.P[mask]
+
+    def predict(self, steps: int = 1) -> None:
+        if not len(self):
+            return
+        F = np.eye(8)
+        F[:4, 4:] = steps * np.eye(4)
+        self.x = self.x @ F.T
+        Q = self._noise(self.x[:, 3], STD_POSITION, STD_VELOCITY) * steps
+        self.P = F @ self.P @ F.T
+        self.P[:, np.arange(8), np.arange(8)] += Q
+
+    def innovation(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Projected measurement means ``(n, 4)`` and covariances ``(n, 4, 4)``."""
+        R = self._noise(self.x[:, 3], STD_POSITION, 0.0)[:, :4]
+        S = self.P[:, :4, :4].copy()
+        S[:, np.arange(4), np.arange(4)] += R
+        return self.x[:, :4], S
+
+    def mahalanobis(self, measurements: np.ndarray) -> np.ndarray:
+        """Squared Mahalanobis distance of every measurement to every track, ``(n_tracks, n_measurements)``."""
+        mean, S = self.innovation()
+        d = np.asarray(measurements, dtype=np.float64)[None, :, :] - mean[:, None, :]
+        return np.einsum("tni,tij,tnj->tn", d, np.linalg.inv(S), d)
+
+    def update(self, index: np.ndarray, measurements: np.ndarray) -> None:
+        if index.size == 0:
+            return
+        mean, S = self.innovation()
+        P = self.P[index]
+        # K = P H^T S^-1 = (S^-1 H P)^T, as P and S are symmetric and H selects the first four components
+        K = np.linalg.solve(S[index], P[:, :4, :]).transpose(0, 2, 1)
+        residual = np.asarray(measurements, dtype=np.float64) - mean[index]
+        self.x[index] += np.einsum("tij,tj->ti", K, residual)
+        self.P[index] = P - K @ P[:, :4, :]
+
+    def boxes(self) -> np.ndarray:
+        return cxcywh_to_xyxy(self.x[:, :4])
+
+
+class MultiObjectTracker:
+    """In-process multi-object tracker: batched Kalman prediction plus matrix association.
+
+    ``TrackingConfig.tracker_type`` picks the association:
+
+    - ``"sort"``: one Hungarian match on IoU between predicted track boxes
+      and detections.
+    - ``"bytetrack"``: detections at or above ``high_conf`` are matched
+      first; the remaining confirmed tracks then try the low-score ones,
+      which never start tracks and are ``DISCARDED`` when unmatched.
+    - ``"deep_sort"``: confirmed tracks are matched on the cosine distance
+      to their last ``nn_budget`` appearance features, gated by
+      ``max_cosine_distance`` and the Kalman Mahalanobis distance; the rest
+      fall back to IoU. Without features this is SORT.
+
+    Tracks are confirmed after ``n_init`` matches and removed after
+    ``max_age`` frames without one (tentative tracks after one miss). The
+    tracker only sees boxes, so it works behind any detector and source,
+    and it pickles for checkpoints.
+    """
+
+    def __init__(self, tracker_type: Optional[str] = None) -> None:
+        self.tracker_type = tracker_type or TrackingConfig.tracker_type
+        if self.tracker_type not in {"sort", "bytetrack", "deep_sort"}:
+            raise ValueError(f"Unknown tracker_type {self.tracker_type!r}")
+        self.kalman = BatchKalman()
+        self.ids = np.empty((0,), dtype=np.int64)
+        self.hits = np.empty((0,), dtype=np.int64)
+        self.misses = np.empty((0,), dtype=np.int64)  # frames since the last match
+        self.features: Optional[np.ndarray] = None  # (tracks, nn_budget, dim) ring buffers, zeros = empty slot
+        self.feature_slot = np.empty((0,), dtype=np.int64)
+        self.next_id = 1
+        self.last_frame: Optional[int] = None
+
+    def __len__(self) -> int:
+        return self.ids.shape[0]
+
+    @property
+    def confirmed(self) -> np.ndarray:
+        return self.hits >= TrackingConfig.n_init
+
+    def reset(self) -> None:
+        self.__init__(self.tracker_type)
+
+    def update(
+        self,
+        boxes_xyxy: np.ndarray,
+        scores: np.ndarray,
+        frame_index: Optional[int] = None,
+        features: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Advance one frame and return the track id of each detection.
+
+        ``frame_index`` lets the motion model step over skipped frames.
+        Ids are ``TENTATIVE`` for detections on a track that is not yet
+        confirmed and ``DISCARDED`` for rejected low-score detections.
+        """
+        boxes = np.asarray(boxes_xyxy, dtype=np.float64).reshape(-1, 4)
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        steps = 1 if frame_index is None or self.last_frame is None else max(frame_index - self.last_frame, 1)
+        self.last_frame = frame_index if frame_index is not None else (self.last_frame or 0) + 1
+        self.kalman.predict(steps)
+        self.misses += steps
+
+        det_track = np.full(boxes.shape[0], -1, dtype=np.int64)  # track row per detection
+        if self.tracker_type == "bytetrack":
+            high = scores >= TrackingConfig.high_conf
+            self._match_iou(boxes, det_track, np.flatnonzero(high), np.arange(len(self)), TrackingConfig.match_iou)
+            left = self._unmatched_tracks(det_track, self.confirmed)
+            self._match_iou(boxes, det_track, np.flatnonzero(~high), left, 0.5)
+            starts = high
+        else:
+            if self.tracker_type == "deep_sort" and features is not None and self.features is not None:
+                self._match_appearance(boxes, np.asarray(features, dtype=np.float32), det_track)
+                # IoU stage only for tentative tracks and tracks that just missed one frame
+                left = self._unmatched_tracks(det_track, ~self.confirmed | (self.misses <= steps))
+            else:
+                left = np.arange(len(self))
+            self._match_iou(boxes, det_track, np.flatnonzero(det_track < 0), left, TrackingConfig.match_iou)
+            starts = np.ones(boxes.shape[0], dtype=bool)
+
+        matched = np.flatnonzero(det_track >= 0)
+        rows = det_track[matched]
+        self.kalman.update(rows, xyxy_to_cxcywh(boxes[matched]))
+        self.hits[rows] += 1
+        self.misses[rows] = 0
+        if features is not None:
+            self._store_features(rows, np.asarray(features, dtype=np.float32)[matched])
+
+        new = np.flatnonzero((det_track < 0) & starts)
+        if new.size:
+            det_track[new] = self._start_tracks(boxes[new], None if features is None else np.asarray(features)[new])
+
+        out = np.full(det_track.shape, DISCARDED, dtype=np.int64)
+        on_track = np.flatnonzero(det_track >= 0)
+        confirmed = self.confirmed[det_track[on_track]]
+        out[on_track[confirmed]] = self.ids[det_track[on_track[confirmed]]]
+        out[on_track[~confirmed]] = TENTATIVE
+        self._prune()
+        return out
+
+    def _unmatched_tracks(self, det_track: np.ndarray, eligible: np.ndarray) -> np.ndarray:
+        taken = np.zeros(len(self), dtype=bool)
+        taken[det_track[det_track >= 0]] = True
+        return np.flatnonzero(eligible & ~taken)
+
+    def _match_iou(
+        self, boxes: np.ndarray, det_track: np.ndarray, dets: np.ndarray, tracks: np.ndarray, min_iou: float
+    ) -> None:
+        if dets.size == 0 or tracks.size == 0:
+            return
+        cost = 1.0 - iou_matrix(self.kalman.boxes()[tracks], boxes[dets])
+        rows, cols = linear_assignment(cost, 1.0 - min_iou)
+        det_track[dets[cols]] = tracks[rows]
+
+    def _match_appearance(self, boxes: np.ndarray, features: np.ndarray, det_track: np.ndarray) -> None:
+        tracks = np.flatnonzero(self.confirmed)
+        if tracks.size == 0 or boxes.shape[0] == 0:
+            return
+        feats = features / np.maximum(np.linalg.norm(features, axis=1, keepdims=True), 1e-12)
+        n_tracks, budget, dim = self.features.shape
+        # One matmul over every stored feature, then the nearest one per track. Empty
+        # slots are zero vectors, whose distance of 1 is always above the gate.
+        similarity = (self.features.reshape(n_tracks * budget, dim) @ feats.T).reshape(n_tracks, budget, -1)
+        cost = 1.0 - similarity.max(axis=1)[tracks]
+        gate = self.kalman.mahalanobis(xyxy_to_cxcywh(boxes))[tracks] > CHI2_GATE_4DOF
+        cost[gate] = np.inf
+        rows, cols = linear_assignment(cost, TrackingConfig.max_cosine_distance)
+        det_track[cols] = tracks[rows]
+
+    def _store_features(self, rows: np.ndarray, features: np.ndarray) -> None:
+        if rows.size == 0:
+            return
+        if self.features is None:
+            self._allocate_features(features.shape[1])
+        feats = features / np.maximum(np.linalg.norm(features, axis=1, keepdims=True), 1e-12)
+        self.features[rows, self.feature_slot[rows]] = feats
+        self.feature_slot[rows] = (self.feature_slot[rows] + 1) % self.features.shape[1]
+
+    def _allocate_features(self, dim: int) -> None:
+        budget = TrackingConfig.nn_budget or DEFAULT_NN_BUDGET
+        self.features = np.zeros((len(self), budget, dim), dtype=np.float32)
+
+    def _start_tracks(self, boxes: np.ndarray, features: Optional[np.ndarray]) -> np.ndarray:
+        n = boxes.shape[0]
+        rows = np.arange(len(self), len(self) + n)
+        self.kalman.add(xyxy_to_cxcywh(boxes))
+        self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + n)])
+        self.next_id += n
+        self.hits = np.concatenate([self.hits, np.ones(n, dtype=np.int64)])
+        self.misses = np.concatenate([self.misses, np.zeros(n, dtype=np.int64)])
+        self.feature_slot = np.concatenate([self.feature_slot, np.zeros(n, dtype=np.int64)])
+        if self.features is not None:
+            empty = np.zeros((n, *self.features.shape[1:]), dtype=np.float32)
+            self.features = np.concatenate([self.features, empty])
+        if features is not None:
+            self._store_features(rows, np.asarray(features, dtype=np.float32))
+        return rows
+
+    def _prune(self) -> None:
+        tentative_lost = ~self.confirmed & (self.misses > 0)
+        keep = ~tentative_lost & (self.misses <= TrackingConfig.max_age)
+        if keep.all():
+            return
+        self.kalman.keep(keep)
+        self.ids = self.ids[keep]
+        self.hits = self.hits[keep]
+        self.misses = self.misses[keep]
+        self.feature_slot = self.feature_slot[keep]
+        if self.features is not None:
+            self.features = self.features[keep]
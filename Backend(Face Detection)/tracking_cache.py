@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .config import CAMERA_SETTINGS, ModelConfig, StoreConfig, StreamConfig, TrackingConfig
+from .detection_store import DetectionBatch
+from .onnx_detector import onnx_weights_path
+
+try:
+    import ultralytics
+except Exception:
+    ultralytics = None  # type: ignore
+
+# Bump when the detection/tracking output changes for the same inputs
+CACHE_VERSION = 1
+_SAMPLE_BYTES = 1 << 20
+
+_weights_hashes: Dict[Tuple[str, int, int], str] = {}
+
+
+def video_fingerprint(path: str | Path) -> str:
+    """Content hash of a video: its size plus 1 MiB samples from the start, middle and end."""
+    path = Path(path)
+    size = path.stat().st_size
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        for offset in sorted({0, max(size // 2 - _SAMPLE_BYTES // 2, 0), max(size - _SAMPLE_BYTES, 0)}):
+            f.seek(offset)
+            digest.update(f.read(_SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+def weights_fingerprint(weights: str | Path) -> str:
+    """Full content hash of a weights file (memoized per size/mtime); the bare name if it is not on disk yet."""
+    path = Path(weights)
+    if not path.exists():
+        return str(weights)
+    st = path.stat()
+    key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+    if key not in _weights_hashes:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 22), b""):
+                digest.update(block)
+        _weights_hashes[key] = digest.hexdigest()
+    return _weights_hashes[key]
+
+
+def _settings(cls: type) -> dict:
+    return {k: v for k, v in vars(cls).items() if not k.startswith("_") and isinstance(v, (bool, int, float, str, type(None)))}
+
+
+def detector_settings() -> dict:
+    """Everything besides video, camera and thresholds that changes what the detector and tracker output."""
+    onnx = ModelConfig.backend == "onnx"
+    weights = onnx_weights_path() if onnx else ModelConfig.yolo_weights
+    tracking = {k: v for k, v in _settings(TrackingConfig).items() if not k.startswith("identity_")}
+    sampling = {k: v for k, v in _settings(StreamConfig).items() if k in {
+        "adaptive_sampling", "motion_threshold", "motion_pixel_delta", "motion_width", "max_stride", "active_stride"
+    }}
+    return {
+        "version": CACHE_VERSION,
+        "weights": weights_fingerprint(weights),
+        "backend": ModelConfig.backend,
+        "onnx_int8": ModelConfig.onnx_int8 if onnx else None,
+        "onnx_imgsz": ModelConfig.onnx_imgsz if onnx else None,
+        "ultralytics": getattr(ultralytics, "__version__", None),
+        "person_class_id": ModelConfig.person_class_id,
+        "max_detections_per_frame": ModelConfig.max_detections_per_frame,
+        "tracking": tracking,
+        "sampling": sampling,
+    }
+
+
+class TrackingCache:
+    """On-disk cache of one video's detection/tracking output.
+
+    Entries are ``DetectionBatch`` ``.npz`` files named by a key that hashes
+    the video content, the detector weights and every setting that changes
+    the output (thresholds, tracker, sampling, per-camera ROI). Any change
+    produces a new key, so stale entries are never read; they are removed
+    when the new entry is written. ``StoreConfig.tracking_cache_refresh``
+    ignores existing entries and rewrites them.
+    """
+
+    def __init__(
+        self, video_path: str | Path, location: str, mode: str, conf: float, iou: float, cache_dir: Optional[Path] = None
+    ) -> None:
+        self.video_path = Path(video_path)
+        self.location = location
+        self.cache_dir = Path(cache_dir or StoreConfig.tracking_cache_dir)
+        self.prefix = f"{self.video_path.stem}.{location}.{mode}."
+        self.key = self._key(mode, conf, iou)
+        self.path = self.cache_dir / f"{self.prefix}{self.key}.npz"
+
+    def _key(self, mode: str, conf: float, iou: float) -> str:
+        payload = {
+            **detector_settings(),
+            "mode": mode,
+            "video": video_fingerprint(self.video_path),
+            "conf": conf,
+            "iou": iou,
+            "camera": CAMERA_SETTINGS.get(self.location),
+        }
+        blob = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.blake2b(blob, digest_size=12).hexdigest()
+
+    @classmethod
+    def open(cls, video_path: str | Path, location: str, mode: str, conf: float, iou: float) -> Optional["TrackingCache"]:
+        """A cache for this video, or None when caching is off or the source is not a regular file.
+
+        Real-time replay drops frames depending on load, so its output is never cached.
+        """
+        if not StoreConfig.tracking_cache or StreamConfig.replay_realtime or not Path(video_path).is_file():
+            return None
+        return cls(video_path, location, mode, conf, iou)
+
+    def load(self) -> Optional[DetectionBatch]:
+        if StoreConfig.tracking_cache_refresh or not self.path.exists():
+            return None
+        try:
+            return DetectionBatch.load(self.path)
+        except Exception:
+            return None
+
+    def save(self, detections: DetectionBatch) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        detections.save(self.path)
+        for stale in self.cache_dir.glob(f"{self.prefix}*.npz"):
+            if stale != self.path:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .detection_store import DetectionBatch
+from .utils import Detection
+
+
+@dataclass
+class Tracklet:
+    """One camera track collapsed into a single record.
+
+    ``bbox_xyxy`` is the box of the most confident detection. ``face_id``
+    is the most frequent face id among its detections, ties going to the
+    one seen earliest. ``embedding`` is not derived from detections;
+    callers can attach a face or appearance embedding.
+    """
+
+    camera: str
+    track_id: int
+    start_time: float
+    end_time: float
+    start_frame: int
+    end_frame: int
+    n_detections: int
+    bbox_xyxy: Tuple[int, int, int, int]
+    confidence: float
+    face_id: Optional[str] = None
+    embedding: Optional[np.ndarray] = field(default=None, repr=False)
+
+    @property
+    def location(self) -> str:
+        return self.camera
+
+    @property
+    def duration(self) -> float:
+        return self.end_time - self.start_time
+
+
+class FaceVotes:
+    """Face id votes of one track: the most frequent wins, ties go to the face seen earliest."""
+
+    def __init__(self) -> None:
+        self.counts: Counter = Counter()
+        self.first_seen: Dict[str, float] = {}
+
+    def add(self, face_id: str, timestamp: float) -> None:
+        self.counts[face_id] += 1
+        if timestamp < self.first_seen.get(face_id, float("inf")):
+            self.first_seen[face_id] = timestamp
+
+    def winner(self) -> Optional[str]:
+        if not self.counts:
+            return None
+        return max(self.counts, key=lambda face: (self.counts[face], -self.first_seen[face]))
+
+
+def _from_detections(camera: str, detections: Iterable[Detection]) -> List[Tracklet]:
+    tracklets: Dict[int, Tracklet] = {}
+    faces: Dict[int, FaceVotes] = {}
+    for d in detections:
+        t = tracklets.get(d.track_id)
+        if t is None:
+            tracklets[d.track_id] = Tracklet(
+                camera, d.track_id, d.timestamp, d.timestamp, d.frame_index, d.frame_index, 1, d.bbox_xyxy, d.confidence
+            )
+            faces[d.track_id] = FaceVotes()
+        else:
+            t.n_detections += 1
+            if d.timestamp < t.start_time:
+                t.start_time, t.start_frame = d.timestamp, d.frame_index
+            if d.timestamp > t.end_time:
+                t.end_time, t.end_frame = d.timestamp, d.frame_index
+            if d.confidence > t.confidence:
+                t.confidence, t.bbox_xyxy = d.confidence, d.bbox_xyxy
+        if d.face_id is not None:
+            faces[d.track_id].add(d.face_id, d.timestamp)
+    for track_id, votes in faces.items():
+        tracklets[track_id].face_id = votes.winner()
+    return list(tracklets.values())
+
+
+def _from_batch(camera: str, batch: DetectionBatch) -> List[Tracklet]:
+    cols = batch.columns()
+    n = cols["track_id"].shape[0]
+    if n == 0:
+        return []
+    # Sort by track, then by descending confidence, so each group starts with its best detection
+    order = np.lexsort((-cols["confidence"], cols["track_id"]))
+    track_ids = cols["track_id"][order]
+    starts = np.flatnonzero(np.r_[True, track_ids[1:] != track_ids[:-1]])
+    counts = np.diff(np.r_[starts, n])
+    ts = cols["timestamp"][order]
+    frames = cols["frame_index"][order]
+    first = np.minimum.reduceat(ts, starts)
+    last = np.maximum.reduceat(ts, starts)
+    # Frame of the earliest / latest detection: offset of the group's argmin / argmax
+    group = np.repeat(np.arange(len(starts)), counts)
+    first_idx = starts + _group_arg(ts == first[group], starts)
+    last_idx = starts + _group_arg(ts == last[group], starts)
+
+    # Most frequent face id per track, ties going to the face seen earliest (as FaceVotes)
+    face_codes = cols["face_id"][order]
+    best_face = np.full(len(starts), -1, dtype=np.int64)
+    named = face_codes >= 0
+    if named.any():
+        pairs, inverse, pair_counts = np.unique(
+            np.stack([group[named], face_codes[named]], axis=1), axis=0, return_inverse=True, return_counts=True
+        )
+        pair_first = np.full(len(pairs), np.inf)
+        np.minimum.at(pair_first, inverse.ravel(), ts[named])
+        by_count = np.lexsort((pair_first, -pair_counts, pairs[:, 0]))
+        pairs = pairs[by_count]
+        keep = np.r_[True, pairs[1:, 0] != pairs[:-1, 0]]
+        best_face[pairs[keep, 0]] = pairs[keep, 1]
+
+    bboxes = cols["bbox"][order][starts].tolist()
+    confs = cols["confidence"][order][starts].tolist()
+    names = batch.face_ids.values
+    return [
+        Tracklet(
+            camera=camera,
+            track_id=int(track_ids[s]),
+            start_time=float(first[g]),
+            end_time=float(last[g]),
+            start_frame=int(frames[first_idx[g]]),
+            end_frame=int(frames[last_idx[g]]),
+            n_detections=int(counts[g]),
+            bbox_xyxy=tuple(bboxes[g]),
+            confidence=float(confs[g]),
+            face_id=names[best_face[g]] if best_face[g] >= 0 else None,
+        )
+        for g, s in enumerate(starts.tolist())
+    ]
+
+
+def _group_arg(mask: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Offset within each group of its first True in ``mask`` (every group has one)."""
+    positions = np.where(mask, np.arange(mask.shape[0]), mask.shape[0])
+    return np.minimum.reduceat(positions, starts) - starts
+
+
+def build_tracklets(detections_by_camera: Dict[str, Iterable[Detection]]) -> List[Tracklet]:
+    """Collapse every ``(camera, track_id)`` into one ``Tracklet``, sorted by entry time.
+
+    Detections are read, never modified. ``DetectionBatch`` inputs are
+    summarized column-wise without building ``Detection`` objects. As in
+    ``CrossCameraReIdentifier``, untracked detections (id -1) of a camera
+    form one group.
+    """
+    tracklets: List[Tracklet] = []
+    for camera, dets in detections_by_camera.items():
+        if isinstance(dets, DetectionBatch):
+            tracklets.extend(_from_batch(camera, dets))
+        else:
+            tracklets.extend(_from_detections(camera, dets))
+    tracklets.sort(key=lambda t: t.start_time)
+    return tracklets
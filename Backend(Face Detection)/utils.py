@@ -6,6 +6,18 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Tuple
 
+import numpy as np
+
+try:
+    import lap  # lapx
+except Exception:
+    lap = None  # type: ignore
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except Exception:
+    linear_sum_assignment = None  # type: ignore
+
 
 def ensure_dir(path: Path | str) -> Path:
     p = Path(path)
@@ -91,3 +103,96 @@ def compute_iou(box1: Tuple[int, int, int, int], box2: Tuple[int, int, int, int]
     return inter / union
 
 
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between two sets of xyxy boxes, shape (len(a), len(b))."""
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    inter_w = np.clip(np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+def intersection_over_area(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Fraction of each box in ``boxes_a`` covered by each box in ``boxes_b``, shape (len(a), len(b))."""
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    inter_w = np.clip(np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1]), 0, None)
+    area_a = np.maximum((a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1]), 1e-6)
+    return inter_w * inter_h / area_a[:, None]
+
+
+def assign_faces_to_boxes(
+    face_boxes: np.ndarray, boxes: np.ndarray, min_overlap: float = 0.5, prefer_top: bool = False
+) -> np.ndarray:
+    """Greedy one-to-one assignment of face boxes to containing boxes.
+
+    Returns, for each box, the index of its face or -1. A face qualifies when at
+    least ``min_overlap`` of its area lies inside the box; pairs are taken in
+    order of decreasing overlap. With ``prefer_top`` (person boxes), faces near
+    the top of a box rank higher, which separates overlapping people.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    assignment = np.full((boxes.shape[0],), -1, dtype=np.int64)
+    face_boxes = np.asarray(face_boxes, dtype=np.float32).reshape(-1, 4)
+    if face_boxes.shape[0] == 0 or boxes.shape[0] == 0:
+        return assignment
+    overlap = intersection_over_area(face_boxes, boxes)  # (faces, boxes)
+    face_idx, box_idx = np.nonzero(overlap >= min_overlap)
+    rank = overlap[face_idx, box_idx]
+    if prefer_top:
+        centre_y = (face_boxes[face_idx, 1] + face_boxes[face_idx, 3]) / 2.0
+        heights = np.maximum(boxes[box_idx, 3] - boxes[box_idx, 1], 1e-6)
+        rank = rank - 0.5 * np.clip((centre_y - boxes[box_idx, 1]) / heights, 0.0, 1.0)
+    order = np.argsort(-rank, kind="stable")
+    used_faces = np.zeros((face_boxes.shape[0],), dtype=bool)
+    for f, b in zip(face_idx[order].tolist(), box_idx[order].tolist()):
+        if used_faces[f] or assignment[b] >= 0:
+            continue
+        assignment[b] = f
+        used_faces[f] = True
+    return assignment
+
+
+def linear_assignment(cost: np.ndarray, max_cost: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Minimum-cost one-to-one matching of rows to columns, keeping pairs with cost <= ``max_cost``.
+
+    Entries above ``max_cost`` (including inf) are never matched. Rows and
+    columns without any admissible entry are dropped before solving, so sparse
+    problems stay small. Uses lapx when installed, else scipy, else a greedy
+    pass. Returns matched ``(rows, cols)`` index arrays.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    empty = np.empty((0,), dtype=np.int64)
+    if cost.size == 0:
+        return empty, empty
+    admissible = cost <= max_cost
+    rows = np.flatnonzero(admissible.any(axis=1))
+    cols = np.flatnonzero(admissible.any(axis=0))
+    if rows.size == 0:
+        return empty, empty
+    sub = np.where(admissible[np.ix_(rows, cols)], cost[np.ix_(rows, cols)], max_cost + 1.0)
+    if lap is not None:
+        _, x, _ = lap.lapjv(sub, extend_cost=True, cost_limit=max_cost + 1e-9)
+        r = np.flatnonzero(x >= 0)
+        c = x[r]
+    elif linear_sum_assignment is not None:
+        r, c = linear_sum_assignment(sub)
+    else:
+        r, c = [], []
+        used_r, used_c = set(), set()
+        for flat in np.argsort(sub, axis=None).tolist():
+            i, j = divmod(flat, sub.shape[1])
+            if sub[i, j] > max_cost:
+                break
+            if i not in used_r and j not in used_c:
+                used_r.add(i)
+                used_c.add(j)
+                r.append(i)
+                c.append(j)
+        r, c = np.asarray(r, dtype=np.int64), np.asarray(c, dtype=np.int64)
+    keep = sub[r, c] <= max_cost
+    return rows[r[keep]], cols[c[keep]]
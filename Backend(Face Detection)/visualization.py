@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import queue
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .config import ModelConfig
+from .utils import Detection
+
+_END = object()
+
+
+def visualization_mode() -> str:
+    return ModelConfig.visualization_mode if ModelConfig.save_visualization else "off"
+
+
+def draw_detections(frame_bgr: np.ndarray, detections: List[Detection]) -> np.ndarray:
+    for det in detections:
+        x1, y1, x2, y2 = det.bbox_xyxy
+        color = (0, 200, 0) if det.face_id else (255, 128, 0)
+        cv2.rectangle(frame_bgr, (x1, y1), (x2, y2), color, 2)
+        label = f"{det.track_id}" if det.face_id is None else f"{det.track_id} {det.face_id}"
+        cv2.putText(frame_bgr, label, (x1, max(y1 - 6, 12)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+    return frame_bgr
+
+
+def truncate_rows(path: Path, start_frame: int) -> None:
+    """Cut a detections txt before its first row of ``start_frame`` or later."""
+    if not path.exists():
+        return
+    offset = 0
+    with path.open("rb") as f:
+        for line in f:
+            if int(line.split(maxsplit=1)[0]) >= start_frame:
+                break
+            offset += len(line)
+    with path.open("r+b") as f:
+        f.truncate(offset)
+
+
+class VisualizationWriter:
+    """Annotate and encode frames on a background thread, off the inference path.
+
+    ``mode`` is "off", "sampled" (every ``every_n``-th frame plus any frame with
+    a recognized face) or "full". Frames go through a bounded queue; in
+    sampled mode a full queue drops the image (counted in ``dropped``) but
+    keeps its detection rows, in full mode it blocks so the output video
+    stays complete. Detections of every frame are written to one
+    ``<stem>.txt`` per video when ``save_txt``, replacing that of an
+    earlier pass. A pass resumed at ``start_frame`` keeps the rows before
+    it and appends, and writes its video to ``<stem>.part<part>.mp4`` so
+    the frames encoded before the interruption are not overwritten.
+    """
+
+    def __init__(
+        self,
+        output_dir: str | Path,
+        stem: str,
+        fps: float,
+        mode: Optional[str] = None,
+        every_n: Optional[int] = None,
+        queue_depth: Optional[int] = None,
+        save_txt: Optional[bool] = None,
+        start_frame: int = 0,
+        part: int = 0,
+    ) -> None:
+        every_n = ModelConfig.visualization_every_n if every_n is None else every_n
+        queue_depth = ModelConfig.visualization_queue if queue_depth is None else queue_depth
+        save_txt = ModelConfig.save_detections_txt if save_txt is None else save_txt
+        self.mode = visualization_mode() if mode is None else mode
+        if self.mode not in {"off", "sampled", "full"}:
+            raise ValueError(f"Unknown visualization mode: {self.mode!r}")
+        self.output_dir = Path(output_dir)
+        self.stem = stem
+        self.fps = fps
+        self.every_n = max(1, every_n)
+        self.save_txt = save_txt
+        self.start_frame = start_frame
+        self.part = part
+        self.written = 0
+        self.dropped = 0
+        self._video: cv2.VideoWriter | None = None
+        self._txt = None
+        self._thread: threading.Thread | None = None
+        if self.mode == "off" and not save_txt:
+            return
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if save_txt and start_frame > 0:
+            truncate_rows(self.output_dir / f"{stem}.txt", start_frame)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_depth))
+        self._thread = threading.Thread(target=self._run, name="visualization-writer", daemon=True)
+        self._thread.start()
+
+    def _wants_frame(self, frame_index: int, detections: List[Detection]) -> bool:
+        if self.mode == "full":
+            return True
+        if self.mode == "sampled":
+            return frame_index % self.every_n == 0 or any(d.face_id for d in detections)
+        return False
+
+    def submit(self, frame_index: int, frame_bgr: np.ndarray, detections: List[Detection]) -> None:
+        if self._thread is None:
+            return
+        frame = frame_bgr if self._wants_frame(frame_index, detections) else None
+        if frame is None and not (self.save_txt and detections):
+            return
+        item: Tuple[int, Optional[np.ndarray], List[Detection]] = (frame_index, frame, list(detections))
+        if self.mode == "full":
+            self._queue.put(item)
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            if frame is not None:
+                self.dropped += 1
+            # Text rows are cheap and must stay complete; only the image is dropped
+            if self.save_txt and detections:
+                self._queue.put((frame_index, None, item[2]))
+
+    def _run(self) -> None:
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _END:
+                    break
+                frame_index, frame, detections = item
+                if self.save_txt and detections:
+                    if self._txt is None:
+                        self._txt = (self.output_dir / f"{self.stem}.txt").open("a" if self.start_frame > 0 else "w", encoding="utf-8")
+                    for d in detections:
+                        x1, y1, x2, y2 = d.bbox_xyxy
+                        self._txt.write(
+                            f"{frame_index} {d.track_id} {x1} {y1} {x2} {y2} {d.confidence:.3f} {d.face_id or '-'}\n"
+                        )
+                if frame is not None:
+                    if self._video is None:
+                        h, w = frame.shape[:2]
+                        # Sampled output is a flip-book of key frames, so play it slower
+                        fps = self.fps if self.mode == "full" else max(self.fps / self.every_n, 1.0)
+                        name = f"{self.stem}.mp4" if self.part == 0 else f"{self.stem}.part{self.part}.mp4"
+                        path = self.output_dir / name
+                        self._video = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+                    self._video.write(draw_detections(frame.copy(), detections))
+                    self.written += 1
+        finally:
+            if self._video is not None:
+                self._video.release()
+            if self._txt is not None:
+                self._txt.close()
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(_END)
+        self._thread.join()
+        self._thread = None